@@ -2,6 +2,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models import User
 from app.schemas import UserCreate, UserResponse, Token
@@ -9,36 +10,69 @@ from app.core import security
 
 router = APIRouter()
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
 @router.post("/register", response_model=UserResponse)
-def register(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
+async def register(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
     """
     Register a new user.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(_find_user, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this user name already exists in the system",
         )
-    
+
+    try:
+        hashed_password = await security.hash_password(user_in.password)
+    except security.PasswordHashingBusy:
+        raise _busy()
+
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password)
+        hashed_password=hashed_password
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+
+    def save():
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+    await run_in_threadpool(save)
     return user
 
 @router.post("/login", response_model=Token)
-def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
+async def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    try:
+        valid, new_hash = await security.verify_and_update_password(form_data.password, user.hashed_password)
+    except security.PasswordHashingBusy:
+        raise _busy()
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    
-    access_token = security.create_access_token(subject=user.email)
+
+    if new_hash:
+        # Cost factor changed since this hash was made: upgrade it transparently
+        def rehash():
+            user.hashed_password = new_hash
+            db.commit()
+
+        await run_in_threadpool(rehash)
+
+    access_token = security.create_access_token(subject=user.email, user_id=user.id)
     return {"access_token": access_token, "token_type": "bearer"}
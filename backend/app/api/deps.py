@@ -1,35 +1,103 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core import security
+from app.core.principal_cache import MVP_OWNER_KEY, Principal, principal_cache, register_invalidation_hooks
 from app.database import get_db
 from app.models import User
 from pydantic import ValidationError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+register_invalidation_hooks(User)
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = payload.get("sub")
-        if token_data is None:
+        if payload.get("sub") is None:
              raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Could not validate credentials",
             )
+        return payload
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _decode_token(token)["sub"]
+
     user = db.query(User).filter(User.email == token_data).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+def _resolve_principal(payload: dict, db: Session) -> Principal:
+    subject = payload["sub"]
+    principal = principal_cache.get(subject)
+    if principal is not None:
+        return principal
+    if payload.get("uid"):
+        # Token carries the user id: a primary-key existence check per cache miss, so a
+        # deleted user (cache entry dropped by the invalidation hooks) is refused at once
+        if db.scalar(select(User.id).where(User.id == payload["uid"], User.email == subject)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User no longer exists",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal = Principal(id=payload["uid"], email=subject)
+    else:
+        # Tokens issued before the uid claim existed
+        user = db.query(User).filter(User.email == subject).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal(id=user.id, email=user.email)
+    principal_cache.put(subject, principal)
+    return principal
+
+def get_current_principal(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    """
+    Like get_current_user, but served from the token claims and a short-lived
+    cache instead of querying the users table on every request.
+    """
+    return _resolve_principal(_decode_token(token), db)
+
+def get_optional_principal(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[Principal]:
+    """The token's user when a bearer token is sent, else None (never the MVP fallback user)."""
+    if token:
+        return _resolve_principal(_decode_token(token), db)
+    return None
+
+def get_portfolio_owner(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[Principal]:
+    """
+    The user whose portfolio is being accessed: the token's user when a valid
+    bearer token is sent, otherwise the first user (MVP single-user mode).
+    """
+    if token:
+        return _resolve_principal(_decode_token(token), db)
+    owner = principal_cache.get(MVP_OWNER_KEY)
+    if owner is None:
+        user = db.query(User).first()
+        if user is None:
+            return None
+        owner = Principal(id=user.id, email=user.email)
+        principal_cache.put(MVP_OWNER_KEY, owner)
+    return owner
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.deps import get_current_principal
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.database import get_db
+from app.services import journal_repository
+from app.services.journal_scorer import journal_scorer
+
+router = APIRouter()
+
+@router.post("", response_model=schemas.JournalResponse, status_code=201)
+def create_journal(
+    entry: schemas.JournalCreate,
+    db: Session = Depends(get_db),
+    owner: Principal = Depends(get_current_principal)
+):
+    """
+    Saves a trading journal entry. Its sentiment score and embedding are filled in
+    shortly after by the background batch scorer (sentiment_score is null until then).
+    """
+    try:
+        journal = journal_repository.create_entry(
+            db, owner.id, entry.symbol.upper() if entry.symbol else None, entry.content, entry.screenshot_path
+        )
+    except IntegrityError:
+        # User deleted while another replica's principal cache still held it
+        db.rollback()
+        raise HTTPException(status_code=401, detail="User no longer exists", headers={"WWW-Authenticate": "Bearer"})
+    response = schemas.JournalResponse.model_validate(journal)
+    db.commit()
+    journal_scorer.notify()
+    return response
+
+@router.get("", response_model=schemas.JournalPage)
+def list_journals(
+    limit: int = Query(20, ge=1, le=settings.JOURNAL_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    symbol: Optional[str] = None,
+    db: Session = Depends(get_db),
+    owner: Principal = Depends(get_current_principal)
+):
+    """The user's entries, newest first, one keyset-paginated page at a time."""
+    try:
+        entries, next_cursor = journal_repository.list_page(
+            db, owner.id, limit, cursor, symbol.upper() if symbol else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": entries, "next_cursor": next_cursor}
+
+@router.get("/search", response_model=List[schemas.JournalResponse])
+def search_journals(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=settings.JOURNAL_PAGE_MAX),
+    db: Session = Depends(get_db),
+    owner: Principal = Depends(get_current_principal)
+):
+    """Full-text search over the user's entries (words, tickers, quoted phrases, -exclusions)."""
+    return journal_repository.search(db, owner.id, q, limit)
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import schemas, models
-from app.services import portfolio_service
-import yfinance as yf
+from app.services import portfolio_service, portfolio_repository, market_data, valuation
+from app.api.deps import get_portfolio_owner
+from app.core.principal_cache import Principal
+from app.core.responses import FastJSONResponse
+from app.core import conditional
+from app.core.config import settings
+from typing import Optional
 from datetime import datetime
+import logging
+import math
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -20,11 +29,11 @@ def analyze_portfolio(request: schemas.PortfolioAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ai-insight", response_model=dict)
-def get_portfolio_insight(db: Session = Depends(get_db)):
+def get_portfolio_insight(db: Session = Depends(get_db), owner: Optional[Principal] = Depends(get_portfolio_owner)):
     """
     Analyzes the current user's portfolio for long-term investment perspective.
     """
-    portfolio = db.query(models.Portfolio).order_by(models.Portfolio.created_at.desc()).first()
+    portfolio = portfolio_repository.get_latest_portfolio(db, owner.id if owner else None)
     if not portfolio or not portfolio.items:
         return {"insight": "포트폴리오 데이터가 부족하여 분석할 수 없습니다."}
     
@@ -46,48 +55,24 @@ from app.models import User
 from app.core import security
 
 @router.post("/", response_model=bool)
-def save_portfolio(portfolio: schemas.PortfolioCreate, db: Session = Depends(get_db)):
+def save_portfolio(portfolio: schemas.PortfolioCreate, db: Session = Depends(get_db), owner: Optional[Principal] = Depends(get_portfolio_owner)):
     """
     Saves the confirmed portfolio data to the database.
     Ensures a user exists to link the portfolio to (MVP Hack).
     """
     try:
-        # MVP: Link to first found user or create a Demo User
-        user = db.query(User).first()
+        # MVP: Link to the owner (first found user) or create a Demo User
+        user = owner
         if not user:
             user = User(
                 email="demo@logmind.ai",
                 hashed_password=security.get_password_hash("demo1234")
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
-        
-        # Create Portfolio container
-        db_portfolio = models.Portfolio(
-            name=portfolio.name,
-            total_value=0, # Will be calculated
-            user_id=user.id 
-        )
-        db.add(db_portfolio)
-        db.commit()
-        db.refresh(db_portfolio)
-
-        total_val = 0
-        for item in portfolio.items:
-            db_item = models.PortfolioItem(
-                portfolio_id=db_portfolio.id,
-                symbol=item.symbol,
-                name=item.name,
-                quantity=item.quantity,
-                avg_price=item.avg_price,
-                current_price=item.current_price,
-                sector=item.sector
-            )
-            total_val += (item.quantity * (item.current_price or item.avg_price))
-            db.add(db_item)
+            db.flush()
         
-        db_portfolio.total_value = total_val
+        # Portfolio + items in a single transaction
+        portfolio_repository.create_portfolio(db, user.id, portfolio.name, portfolio.items)
         db.commit()
         return True
     except Exception as e:
@@ -95,135 +80,175 @@ def save_portfolio(portfolio: schemas.PortfolioCreate, db: Session = Depends(get
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=schemas.PortfolioAnalysisResponse)
-def get_portfolio(db: Session = Depends(get_db)):
+def get_portfolio(request: Request, db: Session = Depends(get_db), owner: Optional[Principal] = Depends(get_portfolio_owner)):
     """
     Retrieves the latest portfolio and updates prices using yfinance.
+    Sends an ETag over holdings and prices; a matching If-None-Match gets 304.
     """
     # 1. Get latest portfolio
-    portfolio = db.query(models.Portfolio).order_by(models.Portfolio.created_at.desc()).first()
+    portfolio = portfolio_repository.get_latest_portfolio(db, owner.id if owner else None)
     if not portfolio:
         return {"items": [], "total_value": 0, "risk_assessment": "No portfolio found."}
     
     # 2. Update prices (Simple implementation)
-    items_data = []
-    total_value = 0
-    
-    for item in portfolio.items:
-        current_price = item.current_price
-        
+    items = portfolio.items
+    fetched = []
+    for item in items:
         # Determine if we should update price (e.g., if older than 5 mins) -> Skip complexity for now, just fetch every time or use cached
         try:
             # Very naive synchrounous fetching - in production use BackgroundTasks
-            ticker = yf.Ticker(item.symbol)
-            # fast_info is faster
-            price = ticker.fast_info.last_price
+            price = market_data.get_quote(item.symbol).price
             if price:
-                current_price = price
                 # Update DB
                 item.current_price = price
-        except Exception:
-            pass # Keep old price if fetch fails
-        
-        value = float(item.quantity) * float(current_price or 0)
-        total_value += value
-        
-        items_data.append(schemas.PortfolioItemBase(
-            symbol=item.symbol,
-            name=item.name,
-            quantity=item.quantity,
-            avg_price=item.avg_price,
-            current_price=current_price,
-            sector=item.sector
-        ))
+        except Exception as e:
+            logger.warning(f"Quote for {item.symbol} unavailable, keeping the saved price: {e}")
+            price = None # Keep old price if fetch fails
+        fetched.append(price or None)
+
+    # Fetched price, else the cached one; unpriced items count as 0
+    prices = valuation.coalesce(valuation.to_array(fetched), valuation.to_array(item.current_price for item in items))
+    quantities = valuation.to_array(item.quantity for item in items)
+    avg_prices = valuation.to_array(item.avg_price for item in items)
+
+    # Items of a saved portfolio never change, so its id plus the prices identify the body
+    etag = conditional.make_etag(portfolio.id, tuple(prices.tolist()))
+    if conditional.is_not_modified(request, etag):
+        db.commit() # Save updated prices
+        return conditional.not_modified(etag)
+
+    total_value = valuation.value_positions(quantities, avg_prices, prices).total_value
+
+    # Plain floats/strings straight from the DB and the valuation pass: serialized
+    # once by orjson instead of building PortfolioItemBase models that FastAPI re-validates
+    items_data = [
+        {
+            "symbol": item.symbol,
+            "name": item.name,
+            "quantity": quantity,
+            "avg_price": avg_price,
+            "current_price": None if math.isnan(price) else price,
+            "sector": item.sector
+        }
+        for item, quantity, avg_price, price in zip(items, quantities.tolist(), avg_prices.tolist(), prices.tolist())
+    ]
     
     db.commit() # Save updated prices
     
-    return {
+    return FastJSONResponse({
         "items": items_data,
         "total_value": total_value,
         "risk_assessment": "Portfolio loaded successfully."
-    }
+    }, headers={"ETag": etag, "Cache-Control": conditional.REVALIDATE})
 
 @router.get("/prices", response_model=dict)
-def get_realtime_prices(db: Session = Depends(get_db)):
+def get_realtime_prices(
+    request: Request,
+    since: Optional[int] = Query(None, description="Only symbols whose quote version is newer (X-Quote-Version of a previous response)"),
+    db: Session = Depends(get_db),
+    owner: Optional[Principal] = Depends(get_portfolio_owner)
+):
     """
     Fetches real-time prices for the current portfolio items without updating the DB.
-    Optimized for polling.
+    Optimized for polling: X-Quote-Version carries the newest quote version among the
+    holdings, `since` limits the body to symbols changed after it, and ETag /
+    If-None-Match turn an unchanged poll into a 304.
     """
-    portfolio = db.query(models.Portfolio).order_by(models.Portfolio.created_at.desc()).first()
+    portfolio = portfolio_repository.get_latest_portfolio(db, owner.id if owner else None)
     if not portfolio or not portfolio.items:
         return {}
     
     prices = {}
+    versions = {}
     for item in portfolio.items:
         try:
-            ticker = yf.Ticker(item.symbol)
-            # fast_info provides the latest available price efficiently
-            price = ticker.fast_info.last_price
-            prev_close = ticker.fast_info.previous_close
-            change_percent = ((price - prev_close) / prev_close * 100) if prev_close else 0.0
-            
+            quote = market_data.get_quote(item.symbol)
             prices[item.symbol] = {
-                "current_price": price,
-                "change_percent": change_percent
+                "current_price": quote.price,
+                "change_percent": quote.change_percent
             }
-        except Exception:
+            versions[item.symbol] = quote.version
+        except Exception as e:
+            logger.warning(f"Quote for {item.symbol} unavailable, using the saved price: {e}")
             prices[item.symbol] = {
-                "current_price": item.current_price, # Fallback to DB price
+                # Fallback to DB price
+                "current_price": float(item.current_price) if item.current_price is not None else None,
                 "change_percent": 0.0
             }
-            
-    return prices
+            versions[item.symbol] = 0
+    
+    if since is not None:
+        prices = {symbol: data for symbol, data in prices.items() if versions[symbol] > since}
+
+    headers = {"X-Quote-Version": str(max(versions.values()))}
+    etag = conditional.make_etag(portfolio.id, since, tuple((s, d["current_price"], d["change_percent"]) for s, d in prices.items()))
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified(etag, headers)
+    return FastJSONResponse(prices, headers={"ETag": etag, "Cache-Control": conditional.REVALIDATE, **headers})
+
+@router.get("/history", response_model=schemas.PortfolioHistoryPage)
+def get_portfolio_history(
+    limit: int = Query(20, ge=1, le=settings.PORTFOLIO_HISTORY_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_db),
+    owner: Optional[Principal] = Depends(get_portfolio_owner)
+):
+    """
+    The user's saved portfolios (every save is a snapshot), newest first, one
+    keyset-paginated page at a time. Old snapshots are thinned out by the nightly compaction.
+    """
+    if owner is None:
+        return {"items": [], "next_cursor": None}
+    try:
+        portfolios, next_cursor = portfolio_repository.list_history(db, owner.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": portfolios, "next_cursor": next_cursor}
+
+@router.get("/history/{portfolio_id}", response_model=schemas.PortfolioSnapshot)
+def get_portfolio_snapshot(portfolio_id: int, db: Session = Depends(get_db), owner: Optional[Principal] = Depends(get_portfolio_owner)):
+    """One saved portfolio with its holdings as saved (no live prices)."""
+    portfolio = portfolio_repository.get_portfolio(db, owner.id, portfolio_id) if owner else None
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return portfolio
+
+@router.get("/diff", response_model=schemas.PortfolioDiff)
+def diff_portfolios(
+    from_id: int,
+    to_id: int,
+    db: Session = Depends(get_db),
+    owner: Optional[Principal] = Depends(get_portfolio_owner)
+):
+    """
+    Holdings added, removed and changed between two saved portfolios, computed in a
+    single query (e.g. from_id/to_id of two entries of /history).
+    """
+    diff = portfolio_repository.diff_portfolios(db, owner.id, from_id, to_id) if owner else None
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return diff
 
 from fastapi import BackgroundTasks
-from app.services.crawler import DataCrawler
-from app.services.report_generator import ReportGenerator
 from app.services.mailer import EmailService
-from app import rag
+from app.services import report_service
 
 async def generate_and_send_report(user_email: str, portfolio_items: list):
     """
     Background Task: Crawl -> Analyze -> Generate PDF -> Send Email
     """
+    from starlette.concurrency import run_in_threadpool
     try:
         print(f"Starting report generation for {user_email}...")
         
-        # 1. Collect Data & News
-        stock_details = []
-        for item in portfolio_items:
-            # Fetch Financials
-            fin = DataCrawler.get_financial_summary(item.symbol)
-            # Fetch News
-            news = DataCrawler.crawl_news(item.symbol, limit=3)
-            
-            # Simple AI Analysis per stock (Optimization: can be batched)
-            # For now, just a placeholder or simple aggregation
-            ai_summary = f"Sector: {fin.get('sector', 'N/A')}. Recent news mentions: {len(news)} articles."
-            
-            stock_details.append({
-                "symbol": item.symbol,
-                "name": item.name,
-                "quantity": float(item.quantity),
-                "avg_price": float(item.avg_price),
-                "price": float(item.current_price or item.avg_price), # Use current or fallback
-                "profit_rate": round(((float(item.current_price or item.avg_price) - float(item.avg_price)) / float(item.avg_price)) * 100, 2),
-                "per": fin.get("per", "N/A"),
-                "pbr": fin.get("pbr", "N/A"),
-                "ai_summary": ai_summary
-            })
-            
-        # 2. Overall Portfolio Analysis (using existing RAG logic)
-        items_data = [{"symbol": s['symbol'], "quantity": s['quantity'], "avg_price": s['avg_price']} for s in stock_details]
-        overall_insight = rag.analyze_portfolio_long_term(items_data)
-        
-        # 3. Generate PDF
-        generator = ReportGenerator() # Templates are loaded from app/templates
-        pdf_bytes = generator.create_pdf(
-            user_email=user_email,
-            portfolio_data={}, # Can add more metadata
-            ai_insight=overall_insight,
-            stock_details=stock_details
+        # 1. Collect Data & News (each distinct symbol once)
+        symbol_data = await run_in_threadpool(
+            report_service.collect_symbol_data, [item.symbol for item in portfolio_items]
         )
+        stock_details = report_service.build_stock_details(portfolio_items, symbol_data)
+            
+        # 2. Overall Portfolio Analysis + 3. Generate PDF
+        pdf_bytes = await run_in_threadpool(report_service.render_report, user_email, stock_details)
         
         # 4. Send Email
         await EmailService.send_report_email(user_email, pdf_bytes)
@@ -237,18 +262,17 @@ async def generate_and_send_report(user_email: str, portfolio_items: list):
 @router.post("/report", status_code=202)
 async def request_portfolio_report(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    owner: Optional[Principal] = Depends(get_portfolio_owner)
 ):
     """
     Triggers the generation and emailing of the investment report.
     Returns immediately (202 Accepted) while processing in background.
     """
     # Get Portfolio & User
-    # MVP: Assume single user or demo user
-    user = db.query(models.User).first()
-    email = user.email if user else "demo@logmind.ai"
+    email = owner.email if owner else "demo@logmind.ai"
     
-    portfolio = db.query(models.Portfolio).order_by(models.Portfolio.created_at.desc()).first()
+    portfolio = portfolio_repository.get_latest_portfolio(db, owner.id if owner else None)
     if not portfolio or not portfolio.items:
         raise HTTPException(status_code=400, detail="No portfolio found.")
     
@@ -261,87 +285,33 @@ from fastapi.responses import StreamingResponse
 import io
 
 @router.post("/report/download")
-async def download_portfolio_report(db: Session = Depends(get_db)):
+async def download_portfolio_report(db: Session = Depends(get_db), owner: Optional[Principal] = Depends(get_portfolio_owner)):
     """
     Generates and downloads the investment report directly.
     Implementation includes Fail-Safe logic to return a PDF even if data fetch fails.
     """
     import traceback
+    from starlette.concurrency import run_in_threadpool
     
     print(">>> [Report] Request received.", flush=True)
-    portfolio = db.query(models.Portfolio).order_by(models.Portfolio.created_at.desc()).first()
+    portfolio = portfolio_repository.get_latest_portfolio(db, owner.id if owner else None)
     
     if not portfolio or not portfolio.items:
         raise HTTPException(status_code=400, detail="No portfolio found.")
         
-    user = db.query(models.User).first()
-    user_email = user.email if user else "demo@logmind.ai"
-    
-    stock_details = []
-    overall_insight = "Analysis pending..."
+    user_email = owner.email if owner else "demo@logmind.ai"
     
     try:
         # 1. Collect Data & News
         print(">>> [Report] Step 1: Collecting Data...", flush=True)
-        for item in portfolio.items:
-            try:
-                fin = DataCrawler.get_financial_summary(item.symbol)
-                # Fail-safe news fetch
-                news = []
-                try:
-                    news = DataCrawler.crawl_news(item.symbol, limit=3)
-                except Exception as ne:
-                    print(f"News crawl error for {item.symbol}: {ne}")
-                
-                ai_summary = f"Sector: {fin.get('sector', 'N/A')}. News count: {len(news)}"
-                
-                # Prioritize real-time fetched price
-                live_price = float(fin.get("current_price") or item.current_price or item.avg_price)
-                
-                stock_details.append({
-                    "symbol": item.symbol,
-                    "name": item.name,
-                    "quantity": float(item.quantity),
-                    "avg_price": float(item.avg_price),
-                    "price": live_price,
-                    "profit_rate": round(((live_price - float(item.avg_price)) / float(item.avg_price)) * 100, 2) if float(item.avg_price) > 0 else 0.0,
-                    "current_price": live_price,
-                    "per": fin.get("per", "N/A"),
-                    "pbr": fin.get("pbr", "N/A"),
-                    "ai_summary": ai_summary
-                })
-            except Exception as item_e:
-                print(f"Error processing item {item.symbol}: {item_e}")
-                # Add minimal data so process doesn't stop
-                stock_details.append({
-                    "symbol": item.symbol,
-                    "name": item.name,
-                    "quantity": float(item.quantity),
-                    "avg_price": float(item.avg_price),
-                    "price": float(item.avg_price),
-                    "profit_rate": 0.0,
-                    "current_price": float(item.avg_price),
-                    "per": "-", "pbr": "-", "ai_summary": "Data fetch failed."
-                })
-
-        # 2. Overall Portfolio Analysis
-        print(">>> [Report] Step 2: AI Analysis...", flush=True)
-        try:
-            items_data = [{"symbol": s['symbol'], "quantity": s['quantity'], "avg_price": s['avg_price']} for s in stock_details]
-            overall_insight = rag.analyze_portfolio_long_term(items_data)
-        except Exception as ai_e:
-            print(f"AI Analysis failed: {ai_e}")
-            overall_insight = "AI Analysis unavailable at this moment."
-        
-        # 3. Generate PDF
-        print(">>> [Report] Step 3: Generating PDF...", flush=True)
-        generator = ReportGenerator()
-        pdf_bytes = generator.create_pdf(
-            user_email=user_email,
-            portfolio_data={},
-            ai_insight=overall_insight,
-            stock_details=stock_details
+        symbol_data = await run_in_threadpool(
+            report_service.collect_symbol_data, [item.symbol for item in portfolio.items]
         )
+        stock_details = report_service.build_stock_details(portfolio.items, symbol_data)
+
+        # 2. Overall Portfolio Analysis + 3. Generate PDF
+        print(">>> [Report] Step 2: AI Analysis & PDF...", flush=True)
+        pdf_bytes = await run_in_threadpool(report_service.render_report, user_email, stock_details)
         
         print(">>> [Report] Success! PDF generated.", flush=True)
         return StreamingResponse(
@@ -369,5 +339,5 @@ async def download_portfolio_report(db: Session = Depends(get_db)):
                 media_type="application/pdf",
                 headers={"Content-Disposition": "attachment; filename=Error_Report.pdf"}
             )
-        except:
+        except Exception:
              raise HTTPException(status_code=500, detail=f"Report generation completely failed: {str(e)}")
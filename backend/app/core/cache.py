@@ -0,0 +1,281 @@
+import logging
+import struct
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import CACHE_ERRORS, CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """
+    Byte-valued key/value store with per-key TTLs, shared by the quote, crawler
+    and RAG layers. `add` (set if absent) is the primitive used for cross-replica
+    request coalescing; `delete_if` releases a lock only while we still own it;
+    `incr` is a cluster-wide counter (no TTL; None when the store is unreachable).
+    Backends never raise: an unreachable store behaves like an empty one.
+    """
+    name = "base"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_if(self, key: str, value: bytes):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    """Per-process backend (single replica, local runs). Oldest entries go first when full."""
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+        self._counters: Dict[str, int] = {} # Kept apart from entries: never evicted
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self.clock():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._lock:
+            if self.get(key) is not None:
+                return False
+            self._put(key, value, ttl)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_if(self, key: str, value: bytes):
+        with self._lock:
+            if self.get(key) == value:
+                del self._entries[key]
+
+    def incr(self, key: str) -> Optional[int]:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def _put(self, key: str, value: bytes, ttl: float):
+        self._entries.pop(key, None) # Re-insert at the end: eviction order follows writes
+        if len(self._entries) >= self.max_entries:
+            now = self.clock()
+            for k in [k for k, (_, exp) in self._entries.items() if exp <= now]:
+                del self._entries[k]
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (value, self.clock() + ttl)
+
+
+class RedisBackend(CacheBackend):
+    """Backend on any Redis-protocol server (Redis, Valkey, KeyDB), shared by all replicas."""
+    name = "redis"
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        import redis
+
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout,
+                                            health_check_interval=30)
+
+    @contextmanager
+    def _guard(self, operation: str):
+        try:
+            yield
+        except self._errors as e:
+            CACHE_ERRORS.labels(self.name).inc()
+            logger.warning(f"Cache {operation} failed: {e}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._guard("get"):
+            return self._client.get(key)
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._guard("set"):
+            self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._guard("add"):
+            return bool(self._client.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+        return True # Store unreachable: nothing to coalesce on, let the caller proceed
+
+    def delete(self, key: str):
+        with self._guard("delete"):
+            self._client.delete(key)
+
+    def delete_if(self, key: str, value: bytes):
+        # WATCH/MULTI compare-and-delete, so a lock that expired and was re-acquired
+        # by another replica is left alone (no server-side scripting needed)
+        def release(pipe):
+            if pipe.get(key) == value:
+                pipe.multi()
+                pipe.delete(key)
+
+        with self._guard("delete"):
+            self._client.transaction(release, key)
+
+    def incr(self, key: str) -> Optional[int]:
+        # No TTL on counters: with a volatile-* maxmemory-policy they are never evicted
+        with self._guard("incr"):
+            return self._client.incr(key)
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> CacheBackend:
+    """CACHE_URL selects the backend: empty for in-process, redis://host:port/db for a shared one."""
+    if settings.CACHE_URL:
+        return RedisBackend(settings.CACHE_URL, timeout=settings.CACHE_TIMEOUT_SECONDS)
+    return InMemoryBackend(max_entries=settings.CACHE_MEMORY_MAX_ENTRIES)
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    return ":".join([settings.CACHE_KEY_PREFIX, namespace, *map(str, parts)])
+
+
+class _KeyedLocks:
+    """Per-key thread locks, dropped once nobody holds or waits on them."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._guard:
+            lock, users = self._locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._guard:
+                lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+_local_locks = _KeyedLocks()
+
+@contextmanager
+def single_flight(key: str, ready: Callable[[], bool], lease: float = None, wait: float = None) -> Iterator[bool]:
+    """
+    Coalesces the computation of `key` across threads and replicas. Yields True when
+    the caller should compute (it holds the lock, or waited `wait` seconds in vain),
+    False when `ready()` turned true meanwhile because another worker filled the cache.
+    The lock expires after `lease` seconds, so a crashed holder only delays others.
+    """
+    backend = get_backend()
+    lease = settings.CACHE_LOCK_LEASE_SECONDS if lease is None else lease
+    wait = settings.CACHE_LOCK_WAIT_SECONDS if wait is None else wait
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex.encode()
+    # Threads of this process queue locally; only one of them talks to the shared lock
+    with _local_locks.hold(key):
+        if ready():
+            yield False
+            return
+        deadline = time.monotonic() + wait
+        while not backend.add(lock_key, token, lease):
+            time.sleep(settings.CACHE_LOCK_POLL_SECONDS)
+            if ready():
+                yield False
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for {key} after {wait}s; computing it here")
+                yield True
+                return
+        try:
+            # The previous holder may have finished between our check and the lock
+            yield not ready()
+        finally:
+            backend.delete_if(lock_key, token)
+
+# Stored values carry their freshness: format version, then fresh-until (epoch seconds)
+_ENVELOPE = struct.Struct("!Bd")
+
+def _wrap(payload: bytes, fresh_until: float) -> bytes:
+    return _ENVELOPE.pack(1, fresh_until) + payload
+
+def _unwrap(raw: Optional[bytes]) -> Optional[Tuple[float, bytes]]:
+    if raw is None or len(raw) < _ENVELOPE.size or raw[0] != 1:
+        return None
+    return _ENVELOPE.unpack_from(raw)[1], raw[_ENVELOPE.size:]
+
+def get_or_compute(namespace: str, key: str, ttl: float, compute: Callable[[], Any],
+                   encode: Callable[[Any], bytes] = orjson.dumps,
+                   decode: Callable[[bytes], Any] = orjson.loads,
+                   stale_ttl: float = 0) -> Any:
+    """
+    Cached value of `key` in `namespace`, else compute() once cluster-wide and store it
+    for `ttl` seconds. Values are kept `stale_ttl` seconds longer: if compute() raises,
+    the stale value is served instead; without one the exception propagates.
+    Failures are never cached.
+    """
+    backend = get_backend()
+    key = cache_key(namespace, key)
+    entry = _unwrap(backend.get(key))
+    if entry is not None and entry[0] > time.time():
+        CACHE_LOOKUPS.labels(namespace, "hit").inc()
+        return decode(entry[1])
+
+    def ready() -> bool:
+        nonlocal entry
+        entry = _unwrap(backend.get(key)) or entry
+        return entry is not None and entry[0] > time.time()
+
+    with single_flight(key, ready) as compute_here:
+        if not compute_here:
+            CACHE_LOOKUPS.labels(namespace, "coalesced").inc()
+            return decode(entry[1])
+        try:
+            value = compute()
+        except Exception as e:
+            if entry is None:
+                raise
+            CACHE_LOOKUPS.labels(namespace, "stale").inc()
+            logger.warning(f"Serving stale {key}: {e}")
+            return decode(entry[1])
+        CACHE_LOOKUPS.labels(namespace, "miss").inc()
+        try:
+            backend.set(key, _wrap(encode(value), time.time() + ttl), ttl + stale_ttl)
+        except TypeError as e: # Not serializable: serve it uncached
+            logger.warning(f"Not caching {key}: {e}")
+        return value
@@ -0,0 +1,160 @@
+import zlib
+from typing import Dict, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Already-compressed or streaming media; PDFs are deflate-compressed internally
+EXCLUDED_CONTENT_TYPES = (
+    "application/grpc", "application/gzip", "application/x-gzip", "application/zip", "application/pdf",
+    "audio/*", "font/woff", "font/woff2", "image/avif", "image/gif", "image/jpeg", "image/png", "image/webp",
+    "text/event-stream", "video/*",
+)
+
+# Bodies at least this large are compressed in a worker thread instead of on the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}, e.g. "br;q=0, gzip" -> {"br": 0.0, "gzip": 1.0}. Malformed q-values count as 0."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """"br" or "gzip", whichever the client rates higher (brotli on a tie, if installed), or None."""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def process(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _CompressionResponder:
+    """
+    Compresses one response. The start message is held until the first body chunk
+    shows whether compression applies: small single-chunk bodies, responses that are
+    already encoded, partial (206) and excluded content types pass through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, encoding: str, encoder, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder.process, data, final)
+        return self.encoder.process(data, final)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            excluded = (media_type in EXCLUDED_CONTENT_TYPES
+                        or media_type.partition("/")[0] + "/*" in EXCLUDED_CONTENT_TYPES
+                        or media_type.startswith("application/grpc+"))
+            self.passthrough = "content-encoding" in headers or message["status"] == 206 or excluded
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if self.passthrough or message_type != "http.response.body":
+            # Pass-through, or something we do not compress (e.g. pathsend): release the held start first
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.compressing:
+            start, self.start_message = self.start_message, None
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(start)
+                await self.send(message)
+                self.passthrough = True
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.compressing = True
+            body = await self._compress(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send(start)
+        else:
+            body = await self._compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `minimum_size` bytes with the encoding the client
+    rates highest in Accept-Encoding (q-values honoured, so "br;q=0" never gets brotli):
+    brotli when the `brotli` package is installed, else gzip.
+    Dynamic JSON is compressed per request, so levels favour speed over ratio.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        encoder = _BrotliEncoder(self.brotli_quality) if encoding == "br" else _GzipEncoder(self.compresslevel)
+        await _CompressionResponder(self.app, encoding, encoder, self.minimum_size)(scope, receive, send)
@@ -0,0 +1,28 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Browsers revalidate on every poll (sending If-None-Match) instead of reusing a stale body
+REVALIDATE = "no-cache"
+
+def make_etag(*parts) -> str:
+    """
+    Weak ETag over the values a response is built from (weak: the compression
+    middleware may re-encode the bytes). Cheaper than hashing the serialized body.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when If-None-Match lists `etag` (weak comparison) or is '*'."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip() == "*" or candidate.strip().removeprefix("W/") == tag
+               for candidate in header.split(","))
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE, **(headers or {})})
@@ -3,10 +3,104 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     PROJECT_NAME: str = "LogMind AI"
     DATABASE_URL: str = "postgresql://user:password@db:5432/logmind"
+    ASYNC_DATABASE_URL: str = "" # Defaults to DATABASE_URL with the asyncpg driver
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30 # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
     SECRET_KEY: str = "your-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60 # Also how long other replicas may still accept a deleted user
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing (bcrypt)
+    BCRYPT_ROUNDS: int = 12 # Changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32 # Admitted jobs beyond this get 503
     openai_api_key: str = "your-openai-api-key"
+    OPENAI_BASE_URL: str = "" # Empty = api.openai.com
+
+    # Upstream data sources (overridable for offline benchmarks)
+    MARKET_DATA_URL: str = "" # Empty = Yahoo Finance via yfinance
+    NEWS_RSS_URL: str = "https://news.google.com/rss/search"
+
+    # Shared cache (see core/cache.py)
+    CACHE_URL: str = "" # Empty = in-process; redis://host:6379/0 to share across replicas
+    CACHE_KEY_PREFIX: str = "logmind"
+    CACHE_TIMEOUT_SECONDS: float = 0.5 # Per cache round trip; slower counts as a miss
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    CACHE_LOCK_LEASE_SECONDS: float = 15 # A crashed fetcher holds its key at most this long
+    CACHE_LOCK_WAIT_SECONDS: float = 10 # Waiting on another replica's fetch, before fetching ourselves
+    CACHE_LOCK_POLL_SECONDS: float = 0.05
+    FUNDAMENTALS_CACHE_TTL_SECONDS: int = 21600
+    NEWS_CACHE_TTL_SECONDS: int = 900
+    EMBEDDING_CACHE_TTL_SECONDS: int = 604800
+
+    # Upstream protection (see core/resilience.py); rates are per replica, <= 0 disables
+    MARKET_DATA_RATE_PER_SECOND: float = 5 # Yahoo Finance (or MARKET_DATA_URL)
+    MARKET_DATA_BURST: int = 10
+    NEWS_RATE_PER_SECOND: float = 2 # Google News RSS
+    NEWS_BURST: int = 5
+    UPSTREAM_MAX_WAIT_SECONDS: float = 2 # Longer waits for a token fail fast instead
+    BREAKER_FAILURE_RATE: float = 0.5 # Error share over the window that opens the circuit
+    BREAKER_MIN_CALLS: int = 10 # Calls in the window before the rate is judged
+    BREAKER_WINDOW_SECONDS: float = 60
+    BREAKER_OPEN_SECONDS: float = 30 # Before a single probe call is let through
+    QUOTE_STALE_SECONDS: int = 86400 # Last quote kept to serve while the upstream is unavailable
+    STALE_CACHE_SECONDS: int = 86400 # Same, for fundamentals and news beyond their TTL
+
+    # Quote refresh (see services/exchange_calendar.py)
+    QUOTE_MARKET_HOURS: bool = True # False: ignore sessions, always apply the open TTL
+    QUOTE_TTL_OPEN_SECONDS: float = 3 # Max quote age while the symbol's market is open (or unknown)
+    QUOTE_CLOSE_SETTLE_SECONDS: float = 900 # After the close, keep refreshing until the closing price settles
+
+    # HTTP responses
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024 # Smaller bodies are sent uncompressed
+
+    # RAG prompt assembly
+    RAG_TOP_K: int = 6 # Documents retrieved per query, before passage ranking/trimming
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1500 # Max context tokens sent to the LLM
+    RAG_PASSAGE_TOKENS: int = 200 # Passage size documents are split into
+    RAG_HYBRID_SEARCH: bool = False # Fuse full-text/trigram ranking with vector ranking; off until benchmarks/hybrid_search.py shows a recall gain
+    RAG_SEARCH_CANDIDATES: int = 40 # Candidates taken from each ranking before fusion
+    RAG_RRF_K: int = 60 # Reciprocal rank fusion constant; higher flattens rank differences
+
+    RAG_JOURNAL_TOP_K: int = 3 # The asking user's own journal entries added to the context
+
+    # Trading journal
+    JOURNAL_PAGE_MAX: int = 100
+    JOURNAL_SCORER_ENABLED: bool = True # Background sentiment/embedding batch scorer
+    JOURNAL_SCORE_BATCH_SIZE: int = 64 # Entries per embedding call (and per sentiment run)
+    JOURNAL_SCORE_TOKEN_BUDGET: int = 6000 # Prompt tokens of entries per sentiment request
+    JOURNAL_SCORE_INTERVAL_SECONDS: float = 30 # Sweep for unscored entries (e.g. after failures)
+    JOURNAL_SCORE_DELAY_SECONDS: float = 2 # After a new entry, wait to batch up with others
+    JOURNAL_SCORE_MAX_BACKOFF_SECONDS: float = 86400 # Retry delay cap of an entry that keeps failing
+    JOURNAL_CONTENT_MAX_CHARS: int = 8000
+    EMBEDDING_MAX_TOKENS: int = 8000 # Inputs are truncated to this (text-embedding-3-small accepts 8191)
+    EMBEDDING_REQUEST_TOKEN_BUDGET: int = 100000 # Input tokens per embeddings request
+
+    # Portfolio history: every save is a snapshot
+    PORTFOLIO_HISTORY_PAGE_MAX: int = 100
+    PORTFOLIO_KEEP_ALL_DAYS: int = 30 # Every snapshot kept this long; older ones are compacted
+    PORTFOLIO_KEEP_DAILY_DAYS: int = 365 # Then the last snapshot per day; past this, the last per month
+    PORTFOLIO_COMPACTION_ENABLED: bool = True # Runs after the nightly report run (REPORT_SCHEDULE_ENABLED)
+    PORTFOLIO_COMPACTION_BATCH_SIZE: int = 1000 # Snapshots deleted per transaction
+
+    # Observability
+    REQUEST_TIMING_HEADER: bool = False # Always send Server-Timing; otherwise only when X-Request-Timing is set
+
+    # Nightly bulk reports
+    REPORT_SCHEDULE_ENABLED: bool = False
+    REPORT_SCHEDULE_HOUR: int = 18 # UTC (03:00 KST)
+    REPORT_PAGE_SIZE: int = 100
+    REPORT_WORKERS: int = 4
+    REPORT_FETCH_WORKERS: int = 8
+    REPORT_HISTORY_DAYS: int = 180 # Price history window for report analytics
+    SUMMARY_BATCH_TOKEN_BUDGET: int = 6000 # Prompt tokens of holdings per summary request
+    SUMMARY_BATCH_WORKERS: int = 4 # Summary requests in flight per report
+    SUMMARY_CACHE_TTL_SECONDS: int = 43200 # Per (symbol, headlines) summary reuse
 
     class Config:
         env_file = ".env"
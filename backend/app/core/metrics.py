@@ -0,0 +1,157 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# One histogram for every external hop; `stage` is one of
+# yfinance, news_crawl, embedding, vector_search, hybrid_search, journal_search, llm, pdf_render, smtp_send
+STAGE_LATENCY = Histogram(
+    "external_stage_duration_seconds",
+    "Latency of external calls and heavy pipeline stages",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+STAGE_ERRORS = Counter("external_stage_errors_total", "External calls that raised", ["stage"])
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["engine"])
+
+# Worker threads that run sync endpoints and dependencies (anyio default limiter)
+THREADPOOL_BUSY = Gauge("threadpool_busy_threads", "Threads of the request threadpool in use")
+THREADPOOL_WAITING = Gauge("threadpool_waiting_tasks", "Sync handlers queued for a free threadpool thread")
+
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens per LLM request, as reported by the API",
+    ["operation"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+RAG_CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens",
+    "Retrieved-context tokens placed in RAG prompts after dedupe and trimming",
+    buckets=(0, 100, 250, 500, 1000, 1500, 2000, 4000, 8000),
+)
+
+# outcome: ok | error | rate_limited | short_circuited (rejected while the circuit is open)
+UPSTREAM_CALLS = Counter("upstream_calls_total", "Calls to external data providers", ["host", "outcome"])
+UPSTREAM_BREAKER_STATE = Gauge("upstream_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ["host"])
+UPSTREAM_THROTTLE_WAIT = Histogram(
+    "upstream_throttle_wait_seconds",
+    "Time calls waited for a rate-limit token",
+    ["host"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2),
+)
+
+# result: hit | miss (computed here) | coalesced (computed by another thread or replica) | stale (served past TTL, upstream failing)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Shared cache lookups", ["namespace", "result"])
+CACHE_ERRORS = Counter("cache_errors_total", "Cache operations that failed and were treated as misses", ["backend"])
+
+# source: upstream | cache_open (within the open-session TTL) | cache_closed (market closed, last close)
+#         | stale (older quote served because the upstream call failed or was refused)
+QUOTE_REQUESTS = Counter("quote_requests_total", "Quote lookups by where the answer came from", ["source"])
+
+PASSWORD_HASH_QUEUE = Histogram(
+    "password_hash_queue_seconds",
+    "Time password hash/verify jobs wait for a hashing worker",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected_total", "Hash/verify jobs refused by admission control")
+
+# Stage timings of the current request, for the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+@contextmanager
+def timed(stage: str, record_request: bool = True):
+    """
+    Times a block into STAGE_LATENCY and, unless record_request is False
+    (long-lived background tasks), into the current request's timings.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        timings = _request_timings.get() if record_request else None
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator form of `timed`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def in_current_context(fn: Callable) -> Callable:
+    """
+    Wraps fn so it runs in a copy of the caller's context, letting stage timings
+    recorded on plain ThreadPoolExecutor threads reach the originating request.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+def route_template(scope: dict) -> str:
+    """
+    Route label with path parameters put back as placeholders (e.g. /portfolio/{id}),
+    keeping label cardinality bounded. Unmatched paths share one label.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Aggregates stage timings per stage into a Server-Timing header value."""
+    totals = {}
+    for stage, elapsed in timings:
+        count, duration = totals.get(stage, (0, 0.0))
+        totals[stage] = (count + 1, duration + elapsed)
+    parts = [f'{stage};dur={duration * 1000:.1f};desc="x{count}"' for stage, (count, duration) in totals.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+def sample_threadpool():
+    """Updates the threadpool gauges; must be called from the event loop."""
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+
+def render_latest() -> Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,8 @@
+from functools import lru_cache
+from app.core.config import settings
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Shared OpenAI client, built on first use rather than at import time."""
+    from openai import OpenAI
+    return OpenAI(api_key=settings.openai_api_key, base_url=settings.OPENAI_BASE_URL or None)
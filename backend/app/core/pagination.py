@@ -0,0 +1,33 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor: the (created_at, id) of the last row on a page."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError on a malformed cursor."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    created_at, row_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(row_id)
+
+def keyset_page(db: Session, stmt, model, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    One page of `stmt` (a select of `model` rows), newest first, and the cursor of the
+    next page (None on the last one). Keyset pagination on (created_at, id): with an
+    index ending in those columns every page is a range scan, however deep the caller
+    pages. Raises ValueError on a malformed cursor.
+    """
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(tuple_(model.created_at, model.id) < decode_cursor(cursor))
+    rows = db.scalars(stmt).all()
+    if len(rows) <= limit:
+        return list(rows), None
+    rows = rows[:limit]
+    return list(rows), encode_cursor(rows[-1].created_at, rows[-1].id)
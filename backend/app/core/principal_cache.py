@@ -0,0 +1,81 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as needed by request handlers."""
+    id: str
+    email: str
+
+MVP_OWNER_KEY = "__mvp_owner__"
+
+class PrincipalCache:
+    """
+    Small TTL cache mapping a token subject (email) to its Principal.
+    Entries are dropped on expiry, on explicit invalidation and when full.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Principal, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._entries.pop(subject, None)
+            return None
+        return principal
+
+    def put(self, subject: str, principal: Principal):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[subject] = (principal, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+            # The MVP fallback owner may be this user, or may change when users change
+            self._entries.pop(MVP_OWNER_KEY, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (_, exp) in self._entries.items() if exp < now]:
+            del self._entries[key]
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+
+def register_invalidation_hooks(user_model):
+    """Drops cached principals whenever a user row is inserted, updated or deleted."""
+    from sqlalchemy import event, inspect
+
+    def _invalidate(mapper, connection, target):
+        principal_cache.invalidate(target.email)
+        # After an email change the entry is cached under the old subject
+        for old_email in inspect(target).attrs.email.history.deleted:
+            principal_cache.invalidate(old_email)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        if not event.contains(user_model, name, _invalidate):
+            event.listen(user_model, name, _invalidate)
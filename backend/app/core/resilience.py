@@ -0,0 +1,203 @@
+import collections
+import logging
+import threading
+import time
+from typing import Callable, Deque, Dict, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_BREAKER_STATE, UPSTREAM_CALLS, UPSTREAM_THROTTLE_WAIT
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not attempted; callers should serve cached/stale data or degrade."""
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+class RateLimitedError(UpstreamUnavailable):
+    pass
+
+
+# Exception class names (anywhere in the MRO) that mean the upstream itself is struggling,
+# for clients whose errors do not subclass the builtins: requests/curl_cffi ConnectionError
+# and Timeout, yfinance's YFRateLimitError
+_UPSTREAM_FAILURE_NAMES = ("Timeout", "ConnectionError", "RateLimit")
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether an error says the upstream is unhealthy (timeout, connection failure, 429,
+    5xx) rather than that this one request was bad (unknown or delisted symbol, 404,
+    unparseable data). Only the former count toward opening a circuit.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) if response is not None else getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return any(name in cls.__name__ for cls in type(exc).__mro__ for name in _UPSTREAM_FAILURE_NAMES)
+
+
+class TokenBucket:
+    """
+    `rate` calls per second on average, bursts of up to `burst`. A caller that would
+    wait longer than `max_wait` for a token is turned away instead. rate <= 0 disables it.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float:
+        """Seconds to sleep before the call may go out, or -1 if that exceeds max_wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return -1
+            self._tokens -= 1 # May go negative: later callers queue behind the reservation
+            return wait
+
+
+class CircuitBreaker:
+    """
+    Opens when at least `min_calls` calls in the last `window` seconds failed at
+    `failure_rate` or more; while open every call is rejected at once. After
+    `open_seconds` a single probe is let through (half-open): success closes the
+    breaker, failure opens it for another period.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_rate: float, min_calls: int, window: float, open_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._outcomes: Deque[Tuple[float, bool]] = collections.deque()
+        self._lock = threading.Lock()
+        UPSTREAM_BREAKER_STATE.labels(name).set(0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() < self._opened_at + self.open_seconds:
+                    return False
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def cancel(self):
+        """The allowed call was not made after all (e.g. rate limited)."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            now = self.clock()
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._outcomes.clear()
+                    self._set_state(self.CLOSED)
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((now, ok))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._outcomes.clear()
+        self._set_state(self.OPEN)
+        logger.warning(f"Circuit for {self.name} opened for {self.open_seconds:g}s")
+
+    def _set_state(self, state: str):
+        self.state = state
+        UPSTREAM_BREAKER_STATE.labels(self.name).set(self.STATE_VALUES[state])
+
+
+class UpstreamGuard:
+    """Rate limiter + circuit breaker in front of one upstream host."""
+
+    def __init__(self, host: str, limiter: TokenBucket, breaker: CircuitBreaker, max_wait: float):
+        self.host = host
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_wait = max_wait
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs fn, or raises UpstreamUnavailable without calling it. fn's own errors propagate;
+        only upstream-health failures (is_upstream_failure) count against the breaker.
+        """
+        if not self.breaker.allow():
+            UPSTREAM_CALLS.labels(self.host, "short_circuited").inc()
+            raise CircuitOpenError(f"{self.host}: circuit open")
+        wait = self.limiter.reserve(self.max_wait)
+        if wait < 0:
+            self.breaker.cancel()
+            UPSTREAM_CALLS.labels(self.host, "rate_limited").inc()
+            raise RateLimitedError(f"{self.host}: over rate limit")
+        if wait:
+            UPSTREAM_THROTTLE_WAIT.labels(self.host).observe(wait)
+            time.sleep(wait)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.breaker.record(False)
+                UPSTREAM_CALLS.labels(self.host, "error").inc()
+            else:
+                # The upstream answered; this request was bad (e.g. unknown symbol)
+                self.breaker.cancel()
+                UPSTREAM_CALLS.labels(self.host, "request_error").inc()
+            raise
+        self.breaker.record(True)
+        UPSTREAM_CALLS.labels(self.host, "ok").inc()
+        return result
+
+
+_guards: Dict[str, UpstreamGuard] = {}
+_guards_lock = threading.Lock()
+
+def guard(url_or_host: str, rate: float, burst: int) -> UpstreamGuard:
+    """The process-wide guard of one upstream host; every call site sharing a host shares its budget."""
+    host = urlparse(url_or_host).hostname or url_or_host
+    with _guards_lock:
+        if host not in _guards:
+            _guards[host] = UpstreamGuard(
+                host,
+                TokenBucket(rate, burst),
+                CircuitBreaker(host, settings.BREAKER_FAILURE_RATE, settings.BREAKER_MIN_CALLS,
+                               settings.BREAKER_WINDOW_SECONDS, settings.BREAKER_OPEN_SECONDS),
+                settings.UPSTREAM_MAX_WAIT_SECONDS,
+            )
+        return _guards[host]
@@ -0,0 +1,16 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson, for payloads built from already-validated
+    data (DB rows, floats from the valuation engine). Returning it from an endpoint
+    skips FastAPI's response_model validation, so response_model stays for the docs only.
+    Handles numpy scalars/arrays; Decimals must be converted by the caller.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -1,25 +1,113 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Callable, Dict, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_QUEUE, PASSWORD_HASH_REJECTED
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost factor than BCRYPT_ROUNDS are flagged for rehash on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None, user_id: Optional[str] = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        # Lets get_current_principal resolve the caller with a primary-key check (cached)
+        to_encode["uid"] = str(user_id)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+
+class PasswordHashingBusy(Exception):
+    """Raised when too many hash/verify jobs are already admitted."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so auth bursts use at most
+    `workers` cores, and rejects work beyond `max_pending` admitted jobs
+    instead of letting it pile up behind other requests.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+        self._admission = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_time = 0.0
+        self.max_queue_time = 0.0
+        self.total_run_time = 0.0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        if not self._admission.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHashingBusy()
+        enqueued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            PASSWORD_HASH_QUEUE.observe(started_at - enqueued_at)
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                self._admission.release()
+                with self._lock:
+                    self.completed += 1
+                    self.total_queue_time += started_at - enqueued_at
+                    self.max_queue_time = max(self.max_queue_time, started_at - enqueued_at)
+                    self.total_run_time += finished_at - started_at
+
+        return self._executor.submit(job)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self.total_queue_time / done * 1000, 3),
+                "max_queue_ms": round(self.max_queue_time * 1000, 3),
+                "avg_hash_ms": round(self.total_run_time / done * 1000, 3),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.submit(pwd_context.hash, password).result()
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies off the event loop. Returns (valid, new_hash); new_hash is set when
+    the stored hash uses an outdated cost factor and should be replaced.
+    """
+    return await asyncio.wrap_future(
+        password_hasher.submit(pwd_context.verify_and_update, plain_password, hashed_password)
+    )
+
+async def hash_password(password: str) -> str:
+    return await asyncio.wrap_future(password_hasher.submit(pwd_context.hash, password))
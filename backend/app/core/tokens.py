@@ -0,0 +1,52 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Characters per token when no tokenizer is available; low on purpose
+# (Korean text runs close to 1-2 characters per token) so budgets are not overrun
+FALLBACK_CHARS_PER_TOKEN = 2
+
+@lru_cache(maxsize=4)
+def _encoding(model: str = "gpt-4o"):
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # tiktoken downloads its BPE file on first use; offline hosts fall back to an estimate
+        logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of `text` for the gpt-4o tokenizer (conservative estimate without tiktoken)."""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // FALLBACK_CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """`text` cut to at most max_tokens tokens of `model` (a conservative character estimate without tiktoken)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def chunk_by_tokens(payloads: List[Dict], budget: int) -> List[List[Dict]]:
+    """
+    Greedily packs JSON payloads (holdings, journal entries) into requests of at most
+    `budget` prompt tokens. A single payload over budget still gets its own request.
+    """
+    chunks, current, used = [], [], 0
+    for payload in payloads:
+        tokens = count_tokens(json.dumps(payload, ensure_ascii=False))
+        if current and used + tokens > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(payload)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,21 +1,35 @@
 from fastapi import FastAPI, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import engine, Base, get_db
+from app.database import get_db
 from app import models, schemas, rag
 from app.api import auth
 
-# Create tables
-from sqlalchemy import text
-with engine.connect() as connection:
-    connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-    connection.commit()
-
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic migrations (see migrations/); run `alembic upgrade head`
+# before starting the app. Importing this module does not touch the database.
 
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.config import settings
+    from app.services.report_scheduler import report_scheduler
+    from app.services.journal_scorer import journal_scorer
+    if settings.REPORT_SCHEDULE_ENABLED:
+        report_scheduler.start()
+    if settings.JOURNAL_SCORER_ENABLED:
+        journal_scorer.start()
+    yield
+    await report_scheduler.stop()
+    await journal_scorer.stop()
+    from app.database import dispose_async_engine
+    await dispose_async_engine()
+    # Flush queued report emails and close pooled SMTP sessions
+    from app.services.mailer import mail_queue
+    await mail_queue.close()
 
-app = FastAPI(title="LogMind AI API", version="0.1.0")
+app = FastAPI(title="LogMind AI API", version="0.1.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -24,25 +38,80 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Quote-Version"],
 )
 
-from app.api import auth, portfolio
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings as app_settings
+
+# gzip, or brotli when the client accepts it and the package is installed
+app.add_middleware(CompressionMiddleware, minimum_size=app_settings.RESPONSE_COMPRESSION_MIN_BYTES)
+
+import time
+from fastapi import Request, Response
+from app.core import metrics
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram and optional Server-Timing breakdown."""
+    timings = metrics.start_request_timings()
+    metrics.sample_threadpool()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    metrics.REQUEST_LATENCY.labels(
+        request.method, metrics.route_template(request.scope), str(response.status_code)
+    ).observe(elapsed)
+    from app.core.config import settings
+    if settings.REQUEST_TIMING_HEADER or request.headers.get("x-request-timing"):
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings, elapsed)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    from app.database import get_pool_stats
+    for engine_label, stats in get_pool_stats().items():
+        if stats:
+            metrics.DB_POOL_CHECKED_OUT.labels(engine_label).set(stats["checked_out"])
+    metrics.sample_threadpool()
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+from app.api import auth, journal, portfolio
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
+app.include_router(journal.router, prefix="/journals", tags=["journals"])
 
 @app.get("/")
 def read_root():
     return {"message": "LogMind AI API에 오신 것을 환영합니다"}
 
+@app.get("/health/db-pool")
+def db_pool_health():
+    """Connection pool occupancy and checkout wait times."""
+    from app.database import get_pool_stats
+    return get_pool_stats()
+
+@app.get("/health/password-hashing")
+def password_hashing_health():
+    """Password hashing pool admission and queue-time stats."""
+    from app.core.security import password_hasher
+    return password_hasher.stats()
+
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+from typing import Optional
+from app.api.deps import get_optional_principal
+from app.core.principal_cache import Principal
+
 @app.post("/rag/query", response_model=schemas.RAGResponse)
-def query_rag(request: schemas.RAGQueryRequest, db: Session = Depends(get_db)):
+def query_rag(request: schemas.RAGQueryRequest, db: Session = Depends(get_db),
+              principal: Optional[Principal] = Depends(get_optional_principal)):
     logger.info(f"Received RAG query: {request.query}")
     try:
         # Check API Key
@@ -53,15 +122,18 @@ def query_rag(request: schemas.RAGQueryRequest, db: Session = Depends(get_db)):
         # Retrieve relevant docs
         logger.info("Searching knowledge base...")
         docs = rag.search_knowledge(db, request.query)
-        logger.info(f"Found {len(docs)} documents.")
+        # Journals are private: only the authenticated caller's own, never the MVP fallback user's
+        journals = rag.search_journals(db, principal.id, request.query) if principal else []
+        logger.info(f"Found {len(docs)} documents and {len(journals)} journal entries.")
         
         # Generate Answer
         logger.info("Generating answer with GPT-4o...")
-        answer = rag.generate_answer(request.query, docs)
-        logger.info("Answer generated successfully.")
+        result = rag.generate_answer(request.query, docs, journals)
+        logger.info(f"Answer generated successfully (prompt tokens: {result.prompt_tokens}, context tokens: {result.context_tokens}).")
         
-        sources = [doc.source_url for doc in docs if doc.source_url]
-        return {"answer": answer, "sources": list(set(sources))} # Unique sources
+        # Sources of the passages that made it into the prompt
+        return {"answer": result.answer, "sources": result.sources,
+                "prompt_tokens": result.prompt_tokens, "context_tokens": result.context_tokens}
     except Exception as e:
         logger.error(f"Error in query_rag: {str(e)}")
         import traceback
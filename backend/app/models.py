@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, DECIMAL, Date, Text, func
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Boolean, ForeignKey, DateTime, DECIMAL, Date, Float, Text, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from pgvector.sqlalchemy import Vector
 from app.database import Base
 import uuid
@@ -29,11 +29,16 @@ class Portfolio(Base):
     user = relationship("User", back_populates="portfolios")
     items = relationship("PortfolioItem", back_populates="portfolio", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Latest-portfolio-per-user lookups and keyset-paginated history
+        Index("ix_portfolios_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
 class PortfolioItem(Base):
     __tablename__ = "portfolio_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    portfolio_id = Column(Integer, ForeignKey("portfolios.id"))
+    portfolio_id = Column(Integer, ForeignKey("portfolios.id"), index=True)
     symbol = Column(String, nullable=False) # Ticker (e.g., AAPL)
     name = Column(String) # Company Name
     quantity = Column(DECIMAL, nullable=False)
@@ -44,6 +49,14 @@ class PortfolioItem(Base):
 
     portfolio = relationship("Portfolio", back_populates="items")
 
+class PriceHistory(Base):
+    __tablename__ = "price_history"
+
+    # (symbol, ts) primary key doubles as the range-scan index; no surrogate id
+    symbol = Column(String, primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True) # Bar timestamp (daily close)
+    close = Column(Float, nullable=False)
+
 class FinancialStatement(Base):
     __tablename__ = "financial_statements"
 
@@ -57,6 +70,11 @@ class FinancialStatement(Base):
     metrics = Column(JSONB)
     source = Column(Text, default="Financial APIs")
 
+TEXT_SEARCH_CONFIG = "simple"
+CONTENT_TSV_EXPRESSION = (
+    f"to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce(symbol, '') || ' ' || coalesce(content, ''))"
+)
+
 class Journal(Base):
     __tablename__ = "journals"
 
@@ -65,11 +83,24 @@ class Journal(Base):
     symbol = Column(String)
     content = Column(Text, nullable=False)
     screenshot_path = Column(Text)
-    sentiment_score = Column(DECIMAL)
+    sentiment_score = Column(DECIMAL) # -1 (bearish/regretful) .. 1 (confident); NULL until scored
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    embedding = deferred(Column(Vector(1536))) # NULL until the batch scorer embeds it
+    content_tsv = deferred(Column(TSVECTOR, Computed(CONTENT_TSV_EXPRESSION, persisted=True)))
+    score_attempts = Column(Integer, nullable=False, default=0, server_default="0") # Failed scorer passes
+    score_retry_at = Column(DateTime(timezone=True)) # Scorer skips the entry until then (backoff after failures)
 
     user = relationship("User", back_populates="journals")
 
+    __table_args__ = (
+        # Per-user listing, newest first (keyset on created_at, id)
+        Index("ix_journals_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_journals_content_tsv", "content_tsv", postgresql_using="gin"),
+        # Work queue of the batch scorer
+        Index("ix_journals_pending", "id",
+              postgresql_where=text("sentiment_score IS NULL OR embedding IS NULL")),
+    )
+
 class MarketKnowledge(Base):
     __tablename__ = "market_knowledge"
 
@@ -79,3 +110,12 @@ class MarketKnowledge(Base):
     embedding = Column(Vector(1536))
     source_url = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by Postgres; 'simple' keeps tickers, numbers and Korean tokens as-is
+    content_tsv = deferred(Column(TSVECTOR, Computed(CONTENT_TSV_EXPRESSION, persisted=True)))
+
+    __table_args__ = (
+        # Lexical side of hybrid search: full-text terms and trigram (partial word, Korean names) matches
+        Index("ix_market_knowledge_content_tsv", "content_tsv", postgresql_using="gin"),
+        Index("ix_market_knowledge_content_trgm", "content", postgresql_using="gin",
+              postgresql_ops={"content": "gin_trgm_ops"}),
+    )
@@ -1,49 +1,191 @@
+import hashlib
+import re
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.models import MarketKnowledge
+from sqlalchemy import func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from app.models import TEXT_SEARCH_CONFIG, Journal, MarketKnowledge
+from app.core import cache
+from app.core.openai_client import get_openai_client
 from app.core.config import settings
-from openai import OpenAI
-from typing import List
+from app.core.metrics import LLM_PROMPT_TOKENS, RAG_CONTEXT_TOKENS, timed, timed_stage
+from app.core.tokens import count_tokens, truncate_to_tokens
+from app.services import journal_repository
+from app.services.context_builder import build_context
+from dataclasses import dataclass
+from functools import reduce
+from itertools import zip_longest
+from typing import List, Optional
 
-client = OpenAI(api_key=settings.openai_api_key)
+EMBEDDING_MODEL = "text-embedding-3-small"
 
-def get_embedding(text: str) -> List[float]:
-    """OpenAI API를 사용하여 주어진 텍스트의 임베딩 벡터를 생성합니다."""
-    response = client.embeddings.create(
+@timed_stage("embedding")
+def _embed(text: str) -> List[float]:
+    response = get_openai_client().embeddings.create(
         input=text,
-        model="text-embedding-3-small"
+        model=EMBEDDING_MODEL
     )
     return response.data[0].embedding
 
-def search_knowledge(db: Session, query: str, top_k: int = 3):
-    """벡터 유사도를 사용하여 데이터베이스에서 유사한 문서를 검색합니다."""
+def embed_many(texts: List[str]) -> List[List[float]]:
+    """여러 텍스트를 한 번의 API 호출로 임베딩합니다 (입력 순서 유지, 모델 입력 한도로 잘라서)."""
+    if not texts:
+        return []
+    texts = [truncate_to_tokens(text, settings.EMBEDDING_MAX_TOKENS, EMBEDDING_MODEL) for text in texts]
+    # Requests also have a total input limit: split long batches by token budget
+    requests, current, used = [], [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and used + tokens > settings.EMBEDDING_REQUEST_TOKEN_BUDGET:
+            requests.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    requests.append(current)
+    embeddings = []
+    for batch in requests:
+        with timed("embedding"):
+            response = get_openai_client().embeddings.create(input=batch, model=EMBEDDING_MODEL)
+        embeddings += [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    return embeddings
+
+def get_embedding(text: str) -> List[float]:
+    """OpenAI API를 사용하여 주어진 텍스트의 임베딩 벡터를 생성합니다 (공유 캐시에 보관)."""
+    digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    return cache.get_or_compute("embedding", f"{EMBEDDING_MODEL}:{digest}",
+                                settings.EMBEDDING_CACHE_TTL_SECONDS, lambda: _embed(text))
+
+WORD = re.compile(r"\w+")
+MAX_QUERY_TERMS = 32 # Distinct query words OR-ed into the full-text query
+
+def search_knowledge(db: Session, query: str, top_k: int = None):
+    """
+    데이터베이스에서 질의와 관련된 문서를 검색합니다 (관련도 순).
+    RAG_HYBRID_SEARCH가 켜져 있으면 벡터 유사도와 전문/트라이그램 검색 순위를 융합합니다.
+    """
+    top_k = top_k or settings.RAG_TOP_K
     query_embedding = get_embedding(query)
-    
+
+    if not settings.RAG_HYBRID_SEARCH:
+        with timed("vector_search"):
+            return db.scalars(vector_search_statement(query_embedding, top_k)).all()
+
+    with timed("hybrid_search"):
+        return db.scalars(hybrid_search_statement(query, query_embedding, top_k)).all()
+
+def vector_search_statement(query_embedding: List[float], top_k: int):
     # pgvector가 제공하는 코사인 거리(<=>) 사용
-    results = db.scalars(
+    return (
         select(MarketKnowledge)
         .order_by(MarketKnowledge.embedding.cosine_distance(query_embedding))
         .limit(top_k)
-    ).all()
-    
-    return results
+    )
+
+def hybrid_search_statement(query: str, query_embedding: List[float], top_k: int,
+                            candidates: int = None, rrf_k: int = None):
+    """
+    One round trip: the nearest `candidates` by cosine distance and the best
+    `candidates` lexical matches (any query term in the full-text index, or any
+    term's trigram word-similarity hit for names the 'simple' parser can't split,
+    e.g. Korean with particles) are fused by reciprocal rank, sum(1 / (rrf_k + rank)).
+    """
+    candidates = candidates or settings.RAG_SEARCH_CANDIDATES
+    rrf_k = rrf_k or settings.RAG_RRF_K
+
+    distance = MarketKnowledge.embedding.cosine_distance(query_embedding)
+    vector_hits = (
+        select(MarketKnowledge.id, func.row_number().over(order_by=distance).label("rank"))
+        .order_by(distance)
+        .limit(candidates)
+        .cte("vector_hits")
+    )
+
+    # OR of the query's words, each quoted by plainto_tsquery (no tsquery syntax from user input):
+    # documents matching more of them rank higher
+    config = literal(TEXT_SEARCH_CONFIG).cast(REGCONFIG)
+    terms = list(dict.fromkeys(WORD.findall(query.lower())))[:MAX_QUERY_TERMS] or [""]
+    tsquery = reduce(lambda left, right: left.op("||")(right), [func.plainto_tsquery(config, term) for term in terms])
+    # Trigram matching per term as well: word_similarity scores the whole first argument,
+    # so a sentence-length question would almost never clear the <% threshold
+    trigram_hits = [literal(term).bool_op("<%")(MarketKnowledge.content) for term in terms]
+    trigram_score = func.greatest(*[func.word_similarity(term, MarketKnowledge.content) for term in terms])
+    lexical_score = func.ts_rank_cd(MarketKnowledge.content_tsv, tsquery) + trigram_score
+    lexical_hits = (
+        select(MarketKnowledge.id, func.row_number().over(order_by=lexical_score.desc()).label("rank"))
+        .where(or_(MarketKnowledge.content_tsv.bool_op("@@")(tsquery), *trigram_hits))
+        .order_by(lexical_score.desc())
+        .limit(candidates)
+        .cte("lexical_hits")
+    )
+
+    hits = union_all(
+        select(vector_hits.c.id, vector_hits.c.rank),
+        select(lexical_hits.c.id, lexical_hits.c.rank),
+    ).subquery("hits")
+    fused = (
+        select(hits.c.id, func.sum(1.0 / (rrf_k + hits.c.rank)).label("score"))
+        .group_by(hits.c.id)
+        .subquery("fused")
+    )
+    return (
+        select(MarketKnowledge)
+        .join(fused, fused.c.id == MarketKnowledge.id)
+        .order_by(fused.c.score.desc(), MarketKnowledge.id)
+        .limit(top_k)
+    )
+
+def search_journals(db: Session, user_id: str, query: str, top_k: int = None) -> List[Journal]:
+    """질의와 가장 가까운 사용자 본인의 매매 일지를 검색합니다 (임베딩된 일지만)."""
+    top_k = settings.RAG_JOURNAL_TOP_K if top_k is None else top_k
+    if top_k <= 0:
+        return []
+    with timed("journal_search"):
+        return journal_repository.similar_entries(db, user_id, get_embedding(query), top_k)
+
+@dataclass
+class ContextDoc:
+    source_url: str
+    content: str
 
-def generate_answer(query: str, context_docs: List[MarketKnowledge]) -> str:
-    """검색된 컨텍스트를 기반으로 GPT-4o를 사용하여 답변을 생성합니다."""
-    context_text = "\n\n".join([f"Source: {doc.source_url or 'Unknown'}\nContent: {doc.content}" for doc in context_docs])
+def _journal_doc(entry: Journal) -> ContextDoc:
+    header = f"[매매 일지 {entry.created_at:%Y-%m-%d}{' ' + entry.symbol if entry.symbol else ''}"
+    if entry.sentiment_score is not None:
+        header += f", 심리 점수 {float(entry.sentiment_score):+.2f}"
+    return ContextDoc(f"journal:{entry.id}", f"{header}] {entry.content}")
+
+@dataclass
+class RAGAnswer:
+    answer: str
+    sources: List[str]
+    context_tokens: int
+    prompt_tokens: Optional[int]
+
+def generate_answer(query: str, context_docs: List[MarketKnowledge], journal_entries: List[Journal] = ()) -> RAGAnswer:
+    """
+    검색된 컨텍스트(시장 지식 + 사용자의 매매 일지)를 기반으로 GPT-4o를 사용하여 답변을 생성합니다.
+    컨텍스트는 중복 제거/순위화 후 RAG_CONTEXT_TOKEN_BUDGET 토큰 이내로 잘라 넣습니다.
+    """
+    # Interleaved, so the n-th closest journal entry ranks with the n-th closest document
+    journal_docs = [_journal_doc(entry) for entry in journal_entries]
+    docs = [doc for pair in zip_longest(context_docs, journal_docs) for doc in pair if doc is not None]
+    context = build_context(query, docs, settings.RAG_CONTEXT_TOKEN_BUDGET, settings.RAG_PASSAGE_TOKENS)
+    RAG_CONTEXT_TOKENS.observe(context.tokens)
     
     system_prompt = """당신은 월스트리트의 수석 분석가입니다. 
 사용자가 제공한 재무 데이터와 실시간 뉴스, 그리고 사용자의 매매 일지를 바탕으로 가장 객관적이고 날카로운 비평을 제공하십시오. 
 모든 조언은 반드시 제공된 컨텍스트(뉴스, 데이터)를 근거로 들어야 하며, 토스증권의 UI에 맞게 명확한 결론부터 제시하십시오."""
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Context:\n{context_text}\n\nQuestion: {query}"}
-        ]
-    )
-    return response.choices[0].message.content
+    with timed("llm"):
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Context:\n{context.text}\n\nQuestion: {query}"}
+            ]
+        )
+    prompt_tokens = response.usage.prompt_tokens if response.usage else None
+    if prompt_tokens is not None:
+        LLM_PROMPT_TOKENS.labels("rag_answer").observe(prompt_tokens)
+    return RAGAnswer(response.choices[0].message.content, context.sources, context.tokens, prompt_tokens)
 
 def analyze_portfolio_long_term(items: List[dict]) -> str:
     """포트폴리오 구성 종목들을 받아 장기 투자 관점에서 분석합니다."""
@@ -61,13 +203,14 @@ def analyze_portfolio_long_term(items: List[dict]) -> str:
 답변은 짧고 명료하게(3~4문장), '해요'체로 부드럽게 작성해 주세요."""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"내 포트폴리오 구성이다:\n{portfolio_text}\n\n이 포트폴리오의 장기 투자 적합성을 분석해줘."}
-            ]
-        )
+        with timed("llm"):
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"내 포트폴리오 구성이다:\n{portfolio_text}\n\n이 포트폴리오의 장기 투자 적합성을 분석해줘."}
+                ]
+            )
         return response.choices[0].message.content
     except Exception as e:
         return f"분석 중 오류가 발생했습니다: {str(e)}"
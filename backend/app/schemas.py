@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
 from typing import Optional
+from app.core.config import settings
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -22,6 +24,8 @@ class RAGQueryRequest(BaseModel):
 class RAGResponse(BaseModel):
     answer: str
     sources: list[str]
+    prompt_tokens: Optional[int] = None # Whole prompt, as billed
+    context_tokens: Optional[int] = None # Retrieved context part of it
 
 # Portfolio Schemas
 class PortfolioItemBase(BaseModel):
@@ -43,3 +47,56 @@ class PortfolioAnalysisResponse(BaseModel):
     items: list[PortfolioItemBase]
     total_value: Optional[float] = None
     risk_assessment: Optional[str] = None
+
+class PortfolioSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    total_value: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class PortfolioHistoryPage(BaseModel):
+    items: list[PortfolioSummary]
+    next_cursor: Optional[str] = None # Pass as ?cursor= for the next (older) page
+
+class PortfolioSnapshot(PortfolioSummary):
+    items: list[PortfolioItemBase]
+
+class PortfolioDiffItem(BaseModel):
+    symbol: str
+    status: str # added | removed | changed | unchanged
+    quantity_before: Optional[float] = None
+    quantity_after: Optional[float] = None
+    quantity_change: float
+    avg_price_before: Optional[float] = None
+    avg_price_after: Optional[float] = None
+
+class PortfolioDiff(BaseModel):
+    from_id: int
+    to_id: int
+    total_value_before: float
+    total_value_after: float
+    items: list[PortfolioDiffItem]
+
+# Journal Schemas
+class JournalCreate(BaseModel):
+    symbol: Optional[str] = None
+    content: str = Field(min_length=1, max_length=settings.JOURNAL_CONTENT_MAX_CHARS)
+    screenshot_path: Optional[str] = None
+
+class JournalResponse(BaseModel):
+    id: int
+    symbol: Optional[str] = None
+    content: str
+    screenshot_path: Optional[str] = None
+    sentiment_score: Optional[float] = None # None until the batch scorer has run
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JournalPage(BaseModel):
+    items: list[JournalResponse]
+    next_cursor: Optional[str] = None # Pass as ?cursor= for the next (older) page
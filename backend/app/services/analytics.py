@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+@dataclass
+class PortfolioAnalytics:
+    value_series: pd.Series      # Portfolio value per timestamp
+    daily_returns: pd.Series     # Simple returns of value_series
+    drawdown: pd.Series          # Fraction below the running peak (<= 0)
+    total_return: float
+    volatility: float            # Annualized standard deviation of daily returns
+    max_drawdown: float
+    sector_weights: Dict[str, float] = field(default_factory=dict)
+
+
+def portfolio_analytics(closes: pd.DataFrame, quantities: Mapping[str, float],
+                        sectors: Optional[Mapping[str, str]] = None) -> Optional[PortfolioAnalytics]:
+    """
+    Whole-portfolio analytics in one vectorized pass over a (timestamp x symbol)
+    close matrix, e.g. from price_history.load_closes.
+
+    Markets with different holidays are aligned by carrying the last close forward;
+    the series starts once every held symbol has a price. Returns None when fewer
+    than two aligned observations exist.
+    """
+    symbols = [s for s in quantities if s in closes.columns]
+    if not symbols:
+        return None
+    aligned = closes[symbols].sort_index().ffill().dropna()
+    if len(aligned) < 2:
+        return None
+
+    qty = np.array([float(quantities[s]) for s in symbols])
+    prices = aligned.to_numpy(dtype=float)
+    values = prices @ qty
+    value_series = pd.Series(values, index=aligned.index, name="value")
+
+    returns = values[1:] / values[:-1] - 1
+    peaks = np.maximum.accumulate(values)
+    drawdown = values / peaks - 1
+
+    # Latest position values grouped by sector
+    latest = prices[-1] * qty
+    total = latest.sum()
+    sector_weights = {}
+    if total > 0:
+        labels = [(sectors or {}).get(s) or "Unknown" for s in symbols]
+        sector_weights = (pd.Series(latest, index=labels).groupby(level=0).sum() / total) \
+            .sort_values(ascending=False).to_dict()
+
+    return PortfolioAnalytics(
+        value_series=value_series,
+        daily_returns=pd.Series(returns, index=aligned.index[1:], name="return"),
+        drawdown=pd.Series(drawdown, index=aligned.index, name="drawdown"),
+        total_return=float(values[-1] / values[0] - 1) if values[0] else 0.0,
+        volatility=float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(returns) > 1 else 0.0,
+        max_drawdown=float(drawdown.min()),
+        sector_weights=sector_weights,
+    )
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Set
+
+from app.core.tokens import count_tokens
+
+SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n+")
+WORD = re.compile(r"\w+")
+
+# Passages sharing this much of their word 3-grams are treated as the same text
+DUPLICATE_SIMILARITY = 0.8
+
+@dataclass
+class Passage:
+    source: Optional[str]
+    text: str
+    doc_rank: int        # Retrieval rank of the document (0 = nearest)
+    position: int        # Order within the document
+    tokens: int
+    score: float = 0.0
+    shingles: Set[tuple] = field(default_factory=set, repr=False)
+
+@dataclass
+class ContextBundle:
+    text: str
+    tokens: int
+    sources: List[str]        # Distinct known sources of the kept passages
+    passages_used: int
+    passages_dropped: int     # Over budget
+    duplicates_removed: int
+
+
+def split_passages(text: str, max_tokens: int) -> List[str]:
+    """Groups consecutive sentences into passages of at most ~max_tokens tokens."""
+    passages, current, used = [], [], 0
+    for sentence in filter(None, (s.strip() for s in SENTENCE_END.split(text or ""))):
+        tokens = count_tokens(sentence)
+        if current and used + tokens > max_tokens:
+            passages.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+def _shingles(text: str) -> Set[tuple]:
+    words = WORD.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def _is_duplicate(a: Passage, b: Passage) -> bool:
+    """Near-identical, or one passage (mostly) contained in the other."""
+    if not a.shingles or not b.shingles:
+        return a.text == b.text
+    overlap = len(a.shingles & b.shingles)
+    return overlap / min(len(a.shingles), len(b.shingles)) >= DUPLICATE_SIMILARITY
+
+def build_context(query: str, docs: Sequence, budget_tokens: int, passage_tokens: int = 200,
+                  source_of=lambda doc: doc.source_url,
+                  content_of=lambda doc: doc.content) -> ContextBundle:
+    """
+    Assembles a prompt context of at most `budget_tokens` tokens from retrieved docs
+    (ordered nearest first): splits them into passages, drops near-duplicate passages
+    (keeping the better-ranked copy), ranks by retrieval rank and query-term overlap,
+    and fills the budget greedily. Kept passages are emitted in document order.
+    """
+    query_terms = set(WORD.findall(query.lower()))
+    candidates: List[Passage] = []
+    for doc_rank, doc in enumerate(docs):
+        source = source_of(doc)
+        # Charge every passage its source header, so the assembled text stays within budget
+        header_tokens = count_tokens(f"Source: {source or 'Unknown'}\nContent: \n\n")
+        for position, text in enumerate(split_passages(content_of(doc), passage_tokens)):
+            passage = Passage(source, text, doc_rank, position, count_tokens(text) + header_tokens,
+                              shingles=_shingles(text))
+            terms = set(WORD.findall(text.lower()))
+            overlap = len(query_terms & terms) / len(query_terms) if query_terms else 0.0
+            passage.score = 1.0 / (1 + doc_rank) + 0.5 * overlap + 0.1 / (1 + position)
+            candidates.append(passage)
+
+    candidates.sort(key=lambda p: p.score, reverse=True)
+    unique: List[Passage] = []
+    for passage in candidates:
+        if not any(_is_duplicate(passage, kept) for kept in unique):
+            unique.append(passage)
+    duplicates = len(candidates) - len(unique)
+
+    chosen, used = [], 0
+    for passage in unique:
+        if used + passage.tokens <= budget_tokens:
+            chosen.append(passage)
+            used += passage.tokens
+    chosen.sort(key=lambda p: (p.doc_rank, p.position))
+
+    blocks: List[str] = []
+    sources: List[str] = []
+    last_source = object()
+    for passage in chosen:
+        if passage.source != last_source:
+            blocks.append(f"Source: {passage.source or 'Unknown'}\nContent: {passage.text}")
+            last_source = passage.source
+            if passage.source and passage.source not in sources:
+                sources.append(passage.source)
+        else:
+            blocks[-1] += f" {passage.text}"
+    text = "\n\n".join(blocks)
+    return ContextBundle(
+        text=text,
+        tokens=count_tokens(text) if text else 0,
+        sources=sources,
+        passages_used=len(chosen),
+        passages_dropped=len(unique) - len(chosen),
+        duplicates_removed=duplicates,
+    )
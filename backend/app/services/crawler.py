@@ -1,11 +1,16 @@
-import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from typing import Dict, List
 import logging
+from app.core import cache, resilience
+from app.core.config import settings
+from app.core.metrics import timed_stage
+from app.services import exchange_calendar, market_data
 
 logger = logging.getLogger(__name__)
 
+def news_guard() -> resilience.UpstreamGuard:
+    return resilience.guard(settings.NEWS_RSS_URL, settings.NEWS_RATE_PER_SECOND, settings.NEWS_BURST)
+
 class DataCrawler:
     """
     Collects financial data and news for portfolio analysis.
@@ -14,51 +19,13 @@ class DataCrawler:
     @staticmethod
     def get_financial_summary(symbol: str) -> Dict:
         """
-        Fetches key financial metrics using yfinance.
+        Fetches key financial metrics (yfinance, or MARKET_DATA_URL when configured).
         """
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Extract key metrics safely
-            # Try to get real-time price efficiently
-            try:
-                current_price = ticker.fast_info.last_price
-            except:
-                current_price = info.get("currentPrice", info.get("regularMarketPrice", 0))
-
-            metrics = {
-                "current_price": current_price,
-                "market_cap": info.get("marketCap", 0),
-                "per": info.get("trailingPE", 0),
-                "pbr": info.get("priceToBook", 0),
-                "dividend_yield": info.get("dividendYield", 0),
-                "roe": info.get("returnOnEquity", 0),
-                "revenue_growth": info.get("revenueGrowth", 0),
-                "profit_margins": info.get("profitMargins", 0),
-                "sector": info.get("sector", "Unknown"),
-                "industry": info.get("industry", "Unknown")
-            }
-            
-            # Get last 3 years of financials (Revenue & Net Income)
-            try:
-                financials = ticker.financials
-                if not financials.empty:
-                    # Select recent 3 columns
-                    recent_years = financials.columns[:3]
-                    financial_trend = {}
-                    for date in recent_years:
-                        year_str = date.strftime('%Y')
-                        financial_trend[year_str] = {
-                            "revenue": financials.loc.get("Total Revenue", financials.loc.get("TotalRevenue", pd.Series())).get(date),
-                            "net_income": financials.loc.get("Net Income", financials.loc.get("NetIncome", pd.Series())).get(date)
-                        }
-                    metrics["trend"] = financial_trend
-            except Exception as e:
-                logger.warning(f"Financial trend fetch failed for {symbol}: {e}")
-                metrics["trend"] = {}
-                
-            return metrics
+            return market_data.get_fundamentals(symbol)
+        except resilience.UpstreamUnavailable as e:
+            logger.warning(f"Skipping financials for {symbol}: {e}")
+            return {}
         except Exception as e:
             logger.error(f"Failed to fetch financials for {symbol}: {e}")
             return {}
@@ -68,40 +35,55 @@ class DataCrawler:
         """
         Crawls recent news headlines from Google News (via RSS).
         This is lighter and more reliable than scraping raw HTML without a proper crawler.
+        Results are cached for NEWS_CACHE_TTL_SECONDS and fetched once across replicas;
+        when the fetch fails (or the news host is throttled / its circuit is open) the
+        last headlines are served stale, else []. Failures are not cached.
         """
         try:
-            # Use Google News RSS
-            url = f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
-            
-            # For Korean stocks, ensure we search in Korean context if needed, but sticking to English for "Wall Street Analyst" persona
-            if ".KS" in symbol or ".KQ" in symbol:
-                clean_symbol = symbol.replace(".KS", "").replace(".KQ", "")
-                url = f"https://news.google.com/rss/search?q={clean_symbol}+주식&hl=ko&gl=KR&ceid=KR:ko"
-
-            response = requests.get(url, timeout=5)
-            if response.status_code != 200:
-                logger.error(f"News fetch failed status: {response.status_code}")
-                return []
-
-            # Use xml parser for RSS feeds (requires lxml installed)
-            # Use built-in html.parser as lxml is not available in slim image without system deps
-            soup = BeautifulSoup(response.content, features="html.parser")
-            items = soup.find_all("item", limit=limit)
-            
-            news_list = []
-            for item in items:
-                news_list.append({
-                    "title": item.title.text if item.title else "No Title",
-                    "link": item.link.text if item.link else "#",
-                    "pubDate": item.pubDate.text if item.pubDate else "",
-                    "source": item.source.text if item.source else "Google News"
-                })
-                
-            return news_list
+            return cache.get_or_compute("news", f"{symbol}:{limit}", settings.NEWS_CACHE_TTL_SECONDS,
+                                        lambda: news_guard().call(DataCrawler._fetch_news, symbol, limit),
+                                        stale_ttl=settings.STALE_CACHE_SECONDS)
+        except resilience.UpstreamUnavailable as e:
+            logger.warning(f"Skipping news for {symbol}: {e}")
+            return []
         except Exception as e:
             logger.error(f"Failed to crawl news for {symbol}: {e}")
             return []
 
+    @staticmethod
+    @timed_stage("news_crawl")
+    def _fetch_news(symbol: str, limit: int) -> List[Dict]:
+        from bs4 import BeautifulSoup
+
+        # Use Google News RSS
+        url = f"{settings.NEWS_RSS_URL}?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
+        
+        # For Korean stocks, ensure we search in Korean context if needed, but sticking to English for "Wall Street Analyst" persona
+        if exchange_calendar.exchange_for(symbol) is exchange_calendar.KRX:
+            clean_symbol = symbol.rsplit(".", 1)[0]
+            url = f"{settings.NEWS_RSS_URL}?q={clean_symbol}+주식&hl=ko&gl=KR&ceid=KR:ko"
+
+        response = requests.get(url, timeout=5)
+        if response.status_code != 200:
+            # HTTPError carries the status, so the circuit breaker can tell 429/5xx from 4xx
+            raise requests.HTTPError(f"News fetch failed status: {response.status_code}", response=response)
+
+        # Use xml parser for RSS feeds (requires lxml installed)
+        # Use built-in html.parser as lxml is not available in slim image without system deps
+        soup = BeautifulSoup(response.content, features="html.parser")
+        items = soup.find_all("item", limit=limit)
+        
+        news_list = []
+        for item in items:
+            news_list.append({
+                "title": item.title.text if item.title else "No Title",
+                "link": item.link.text if item.link else "#",
+                "pubDate": item.pubDate.text if item.pubDate else "",
+                "source": item.source.text if item.source else "Google News"
+            })
+            
+        return news_list
+
 # Usage Example
 if __name__ == "__main__":
     import json
@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import FrozenSet, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+@dataclass(frozen=True)
+class Exchange:
+    """
+    Regular trading session of one exchange in its local time zone.
+    Weekends are closed; extra closed days can be listed in `holidays`.
+    """
+    name: str
+    tz: ZoneInfo
+    open: time
+    close: time
+    suffixes: Tuple[str, ...] = ()
+    holidays: FrozenSet[date] = field(default_factory=frozenset)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now: datetime) -> bool:
+        local = now.astimezone(self.tz)
+        return self.is_trading_day(local.date()) and self.open <= local.time() < self.close
+
+    def last_close(self, now: datetime) -> datetime:
+        """Most recent session close at or before `now` (UTC)."""
+        local = now.astimezone(self.tz)
+        day = local.date()
+        if local.time() < self.close:
+            day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return datetime.combine(day, self.close, self.tz).astimezone(timezone.utc)
+
+    def next_open(self, now: datetime) -> datetime:
+        """Next session open after `now` (UTC); `now` itself if the market is open."""
+        if self.is_open(now):
+            return now
+        local = now.astimezone(self.tz)
+        day = local.date()
+        if local.time() >= self.open:
+            day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return datetime.combine(day, self.open, self.tz).astimezone(timezone.utc)
+
+
+KRX = Exchange("KRX", ZoneInfo("Asia/Seoul"), time(9, 0), time(15, 30), suffixes=(".KS", ".KQ"))
+US = Exchange("US", ZoneInfo("America/New_York"), time(9, 30), time(16, 0))
+
+SUFFIX_EXCHANGES = {suffix: exchange for exchange in (KRX,) for suffix in exchange.suffixes}
+
+def exchange_for(symbol: str) -> Optional[Exchange]:
+    """
+    Exchange a ticker trades on: Yahoo-style suffixes (.KS/.KQ -> KRX), plain tickers -> US.
+    Unknown suffixes return None (no session knowledge; callers treat them as always open).
+    """
+    symbol = symbol.upper()
+    if "." not in symbol:
+        return US
+    return SUFFIX_EXCHANGES.get(symbol[symbol.rindex("."):])
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from app.core.cache import cache_key, get_backend
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, LLM_PROMPT_TOKENS, in_current_context, timed
+from app.core.openai_client import get_openai_client
+from app.core.tokens import chunk_by_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """당신은 월스트리트의 주식 애널리스트입니다.
+사용자가 보유 종목 목록(JSON)을 줍니다. 각 종목의 재무 지표와 최근 뉴스 헤드라인만 근거로,
+종목마다 한국어 1~2문장의 짧은 코멘트를 '해요'체로 작성하세요.
+반드시 {"summaries": {"<symbol>": "<comment>", ...}} 형식의 JSON 하나로만 답하고,
+입력에 있는 모든 symbol을 그대로 키로 사용하세요."""
+
+# Tokens of the JSON wrapper and chat framing around the holdings
+FRAMING_TOKENS = 50
+
+
+def fingerprint(holding: Dict) -> str:
+    """Identifies what a summary was based on: the headlines (and sector) of one symbol."""
+    basis = json.dumps([holding.get("sector"), sorted(holding.get("headlines") or [])], ensure_ascii=False)
+    return hashlib.blake2b(basis.encode(), digest_size=8).hexdigest()
+
+
+def _holding_payload(holding: Dict) -> Dict:
+    return {
+        "symbol": holding["symbol"],
+        "name": holding.get("name"),
+        "sector": holding.get("sector"),
+        "per": holding.get("per"),
+        "pbr": holding.get("pbr"),
+        "profit_rate": holding.get("profit_rate"),
+        "headlines": holding.get("headlines") or [],
+    }
+
+def _summarize_chunk(chunk: List[Dict]) -> Dict[str, str]:
+    with timed("llm"):
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"holdings": chunk}, ensure_ascii=False)}
+            ],
+            response_format={"type": "json_object"}
+        )
+    if response.usage:
+        LLM_PROMPT_TOKENS.labels("holding_summaries").observe(response.usage.prompt_tokens)
+    summaries = json.loads(response.choices[0].message.content).get("summaries") or {}
+    return {str(symbol): str(text) for symbol, text in summaries.items() if text}
+
+def summarize_holdings(holdings: List[Dict]) -> Dict[str, str]:
+    """
+    One-to-two sentence AI comment per holding, as {symbol: summary}.
+    `holdings` are report rows (symbol, name, sector, per, pbr, profit_rate, headlines).
+    Summaries cached by any replica are reused; the rest are packed into as few
+    structured-output requests as the token budget allows, run in parallel. Symbols whose request
+    failed or that the model skipped are simply absent from the result.
+    """
+    backend = get_backend()
+    result: Dict[str, str] = {}
+    missing: Dict[str, str] = {}
+    payloads = []
+    for holding in holdings:
+        symbol = holding["symbol"]
+        if symbol in result or symbol in missing:
+            continue
+        key = cache_key("summary", symbol, fingerprint(holding))
+        cached = backend.get(key)
+        CACHE_LOOKUPS.labels("summary", "miss" if cached is None else "hit").inc()
+        if cached is not None:
+            result[symbol] = cached.decode()
+        else:
+            missing[symbol] = key
+            payloads.append(_holding_payload(holding))
+    if not payloads:
+        return result
+
+    budget = max(1, settings.SUMMARY_BATCH_TOKEN_BUDGET - count_tokens(SYSTEM_PROMPT) - FRAMING_TOKENS)
+    chunks = chunk_by_tokens(payloads, budget)
+
+    def run(chunk: List[Dict]) -> Dict[str, str]:
+        try:
+            return _summarize_chunk(chunk)
+        except Exception as e:
+            logger.error(f"Holding summary batch failed ({len(chunk)} holdings): {e}")
+            return {}
+
+    if len(chunks) == 1:
+        batches = [run(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(settings.SUMMARY_BATCH_WORKERS, len(chunks))) as pool:
+            batches = list(pool.map(in_current_context(run), chunks))
+
+    for summaries in batches:
+        for symbol, summary in summaries.items():
+            key = missing.get(symbol)
+            if key is None:
+                continue # Not asked for
+            backend.set(key, summary.encode(), settings.SUMMARY_CACHE_TTL_SECONDS)
+            result[symbol] = summary
+    return result
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.pagination import keyset_page
+from app.models import TEXT_SEARCH_CONFIG
+
+def create_entry(db: Session, user_id: str, symbol: Optional[str], content: str,
+                 screenshot_path: Optional[str] = None) -> models.Journal:
+    """Inserts one entry (unscored, unembedded) and returns it. The caller commits."""
+    entry_id = db.execute(
+        insert(models.Journal)
+        .values(user_id=user_id, symbol=symbol, content=content, screenshot_path=screenshot_path)
+        .returning(models.Journal.id)
+    ).scalar_one()
+    return db.get(models.Journal, entry_id)
+
+def list_page(db: Session, user_id: str, limit: int, cursor: Optional[str] = None,
+              symbol: Optional[str] = None) -> Tuple[List[models.Journal], Optional[str]]:
+    """
+    One page of a user's entries, newest first, and the cursor of the next page (None
+    on the last one). Every page is a range scan of ix_journals_user_id_created_at_id.
+    """
+    stmt = select(models.Journal).where(models.Journal.user_id == user_id)
+    if symbol:
+        stmt = stmt.where(models.Journal.symbol == symbol)
+    return keyset_page(db, stmt, models.Journal, limit, cursor)
+
+def search(db: Session, user_id: str, query: str, limit: int) -> List[models.Journal]:
+    """Full-text search over the user's entries (ix_journals_content_tsv), best match first."""
+    tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+    return list(db.scalars(
+        select(models.Journal)
+        .where(models.Journal.user_id == user_id, models.Journal.content_tsv.bool_op("@@")(tsquery))
+        .order_by(func.ts_rank_cd(models.Journal.content_tsv, tsquery).desc(), models.Journal.id.desc())
+        .limit(limit)
+    ).all())
+
+def similar_entries(db: Session, user_id: str, query_embedding: Sequence[float], limit: int) -> List[models.Journal]:
+    """
+    The user's embedded entries nearest to a query embedding (cosine distance). An exact
+    scan of the user's own rows (ix_journals_user_id_created_at_id): a shared ANN index
+    would apply the user filter after the index scan and could return fewer than `limit`.
+    """
+    # MATERIALIZED keeps the planner from folding the user filter into an index-ordered scan
+    mine = (
+        select(models.Journal.id, models.Journal.embedding)
+        .where(models.Journal.user_id == user_id, models.Journal.embedding.is_not(None))
+        .cte("mine")
+        .prefix_with("MATERIALIZED")
+    )
+    distance = mine.c.embedding.cosine_distance(query_embedding)
+    nearest = select(mine.c.id, distance.label("distance")).order_by(distance).limit(limit).subquery()
+    return list(db.scalars(
+        select(models.Journal)
+        .join(nearest, nearest.c.id == models.Journal.id)
+        .order_by(nearest.c.distance)
+    ).all())
+
+def claim_pending(db: Session, limit: int) -> List[Tuple[models.Journal, bool]]:
+    """
+    Oldest entries still missing a sentiment score or an embedding (ix_journals_pending)
+    and not backing off after a failure, as (entry, needs_embedding), row-locked with
+    SKIP LOCKED so scorers on other replicas take different entries. The locks hold
+    until the caller commits.
+    """
+    return [tuple(row) for row in db.execute(
+        select(models.Journal, models.Journal.embedding.is_(None))
+        .where(
+            or_(models.Journal.sentiment_score.is_(None), models.Journal.embedding.is_(None)),
+            or_(models.Journal.score_retry_at.is_(None), models.Journal.score_retry_at <= func.now()),
+        )
+        .order_by(models.Journal.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()]
+
+def defer_entry(entry: models.Journal, base_delay: float, max_delay: float) -> None:
+    """Counts a failed scorer pass and backs the entry off exponentially, so it cannot block the queue."""
+    entry.score_attempts = (entry.score_attempts or 0) + 1
+    delay = min(max_delay, base_delay * 2 ** (entry.score_attempts - 1))
+    entry.score_retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
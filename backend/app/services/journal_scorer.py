@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional
+
+from app import models, rag
+from app.core.config import settings
+from app.core.metrics import LLM_PROMPT_TOKENS, timed
+from app.core.openai_client import get_openai_client
+from app.core.tokens import chunk_by_tokens, count_tokens
+from app.database import SessionLocal
+from app.services import journal_repository
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """당신은 트레이딩 코치입니다. 사용자의 매매 일지 목록(JSON)을 줍니다.
+각 일지에 드러난 투자 심리를 -1(공포/후회/비관)부터 1(확신/낙관)까지의 실수 하나로 평가하세요.
+반드시 {"scores": {"<id>": <score>, ...}} 형식의 JSON 하나로만 답하고, 입력의 모든 id를 키로 사용하세요."""
+
+# Tokens of the JSON wrapper and chat framing around the entries
+FRAMING_TOKENS = 50
+# Failed one-by-one embedding calls in a row before a pass stops trying
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+def _score_chunk(chunk: List[Dict]) -> Dict[int, float]:
+    with timed("llm"):
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"entries": chunk}, ensure_ascii=False)}
+            ],
+            response_format={"type": "json_object"}
+        )
+    if response.usage:
+        LLM_PROMPT_TOKENS.labels("journal_sentiment").observe(response.usage.prompt_tokens)
+    scores = json.loads(response.choices[0].message.content).get("scores") or {}
+    result = {}
+    for entry_id, score in scores.items():
+        try:
+            result[int(entry_id)] = max(-1.0, min(1.0, float(score)))
+        except (TypeError, ValueError):
+            continue # Model answered something that is not a score
+    return result
+
+def score_sentiments(entries: List[models.Journal]) -> Dict[int, float]:
+    """
+    Sentiment in [-1, 1] per entry id, from as few structured-output requests as
+    JOURNAL_SCORE_TOKEN_BUDGET allows. Entries of a failed request are left out.
+    """
+    payloads = [{"id": entry.id, "symbol": entry.symbol, "content": entry.content} for entry in entries]
+    budget = max(1, settings.JOURNAL_SCORE_TOKEN_BUDGET - count_tokens(SYSTEM_PROMPT) - FRAMING_TOKENS)
+    scores: Dict[int, float] = {}
+    for chunk in chunk_by_tokens(payloads, budget):
+        try:
+            scores.update(_score_chunk(chunk))
+        except Exception as e:
+            logger.error(f"Journal sentiment batch failed ({len(chunk)} entries): {e}")
+    return scores
+
+def embed_entries(entries: List[models.Journal]) -> List[models.Journal]:
+    """
+    Sets the embedding of as many entries as possible and returns those embedded: the
+    whole batch in one call, or, if that fails, one entry at a time so a single bad
+    entry does not fail the rest. Gives up after a few failures in a row (upstream down).
+    """
+    try:
+        for entry, embedding in zip(entries, rag.embed_many([entry.content for entry in entries])):
+            entry.embedding = embedding
+        return list(entries)
+    except Exception as e:
+        logger.error(f"Journal embedding batch failed ({len(entries)} entries), retrying one by one: {e}")
+    embedded, failures = [], 0
+    for entry in entries:
+        try:
+            entry.embedding = rag.embed_many([entry.content])[0]
+            embedded.append(entry)
+            failures = 0
+        except Exception as e:
+            logger.error(f"Journal {entry.id} embedding failed: {e}")
+            failures += 1
+            if failures >= MAX_CONSECUTIVE_FAILURES:
+                break
+    return embedded
+
+def score_pending(batch_size: int = None) -> int:
+    """
+    Scores and embeds unprocessed entries, batch_size at a time (one embedding call and
+    one or a few sentiment calls per batch), until none are left. Returns entries updated.
+    An entry left unfinished by a pass is backed off (journal_repository.defer_entry), so
+    entries that keep failing cannot hold up the ones behind them.
+    """
+    batch_size = batch_size or settings.JOURNAL_SCORE_BATCH_SIZE
+    updated = 0
+    while True:
+        db = SessionLocal()
+        try:
+            claimed = journal_repository.claim_pending(db, batch_size)
+            if not claimed:
+                return updated
+            to_embed = [entry for entry, needs_embedding in claimed if needs_embedding]
+            to_score = [entry for entry, _ in claimed if entry.sentiment_score is None]
+
+            embedded = {entry.id for entry in embed_entries(to_embed)} if to_embed else set()
+            scores = score_sentiments(to_score) if to_score else {}
+            for entry in to_score:
+                if entry.id in scores:
+                    entry.sentiment_score = scores[entry.id]
+            for entry, needs_embedding in claimed:
+                if (needs_embedding and entry.id not in embedded) or entry.sentiment_score is None:
+                    journal_repository.defer_entry(entry, settings.JOURNAL_SCORE_INTERVAL_SECONDS,
+                                                   settings.JOURNAL_SCORE_MAX_BACKOFF_SECONDS)
+            db.commit()
+
+            progressed = embedded | set(scores)
+            updated += len(progressed)
+            if not progressed or len(claimed) < batch_size:
+                return updated # Nothing more to do, or the upstream is failing: retry on the next sweep
+        finally:
+            db.close()
+
+
+class JournalScorer:
+    """
+    Background batch scorer. Sweeps for unscored entries every JOURNAL_SCORE_INTERVAL_SECONDS;
+    notify() after a new entry makes it run sooner, after JOURNAL_SCORE_DELAY_SECONDS so
+    entries written close together share one batch. Safe to run on every replica.
+    """
+
+    def __init__(self, interval: float = None, delay: float = None):
+        self.interval = settings.JOURNAL_SCORE_INTERVAL_SECONDS if interval is None else interval
+        self.delay = settings.JOURNAL_SCORE_DELAY_SECONDS if delay is None else delay
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def notify(self):
+        """Callable from request threads."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                await asyncio.sleep(self.delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                updated = await self._loop.run_in_executor(None, score_pending)
+                if updated:
+                    logger.info(f"Scored {updated} journal entries")
+            except Exception as e:
+                logger.error(f"Journal scoring sweep failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="journal-scorer")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._loop = None
+
+
+journal_scorer = JournalScorer()
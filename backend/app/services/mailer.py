@@ -1,49 +1,260 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from pydantic_settings import BaseSettings
-import os
-from typing import List
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+import aiosmtplib
+from pydantic_settings import BaseSettings
+
+from app.core.metrics import timed
 
 logger = logging.getLogger(__name__)
 
 # Email Configuration
 class EmailSettings(BaseSettings):
-    MAIL_USERNAME: str = os.getenv("MAIL_USERNAME", "apikey") # SendGrid/Gmail User
-    MAIL_PASSWORD: str = os.getenv("MAIL_PASSWORD", "")       # API Key or App Password
-    MAIL_FROM: str = os.getenv("MAIL_FROM", "noreply@logmind.ai")
-    MAIL_PORT: int = int(os.getenv("MAIL_PORT", 587))
-    MAIL_SERVER: str = os.getenv("MAIL_SERVER", "smtp.sendgrid.net")
+    MAIL_USERNAME: str = "apikey"              # SendGrid/Gmail User
+    MAIL_PASSWORD: str = ""                    # API Key or App Password
+    MAIL_FROM: str = "noreply@logmind.ai"
+    MAIL_PORT: int = 587
+    MAIL_SERVER: str = "smtp.sendgrid.net"
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT: float = 30.0
+
+    # Delivery tuning
+    MAIL_POOL_SIZE: int = 2                    # Persistent SMTP sessions (= sender workers)
+    MAIL_BATCH_SIZE: int = 20                  # Max messages sent over one session checkout
+    MAIL_BATCH_WAIT_SECONDS: float = 0.05      # How long a worker waits to fill a batch
+    MAIL_MAX_RETRIES: int = 3
+    MAIL_RETRY_BACKOFF_SECONDS: float = 1.0    # Doubles on every attempt
+    MAIL_IDLE_TIMEOUT_SECONDS: float = 60.0    # Sessions idle longer than this are re-checked
 
     class Config:
         env_file = ".env"
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=EmailSettings().MAIL_USERNAME,
-    MAIL_PASSWORD=EmailSettings().MAIL_PASSWORD,
-    MAIL_FROM=EmailSettings().MAIL_FROM,
-    MAIL_PORT=EmailSettings().MAIL_PORT,
-    MAIL_SERVER=EmailSettings().MAIL_SERVER,
-    MAIL_STARTTLS=EmailSettings().MAIL_STARTTLS,
-    MAIL_SSL_TLS=EmailSettings().MAIL_SSL_TLS,
-    USE_CREDENTIALS=EmailSettings().USE_CREDENTIALS,
-    VALIDATE_CERTS=EmailSettings().VALIDATE_CERTS
-)
+email_settings = EmailSettings()
+
+
+class SMTPConnectionPool:
+    """
+    Keeps a small set of authenticated SMTP sessions open so that
+    consecutive messages skip the TCP + STARTTLS + AUTH handshake.
+    """
+
+    def __init__(self, settings: EmailSettings):
+        self.settings = settings
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        s = self.settings
+        smtp = aiosmtplib.SMTP(
+            hostname=s.MAIL_SERVER,
+            port=s.MAIL_PORT,
+            use_tls=s.MAIL_SSL_TLS,
+            start_tls=s.MAIL_STARTTLS,
+            validate_certs=s.VALIDATE_CERTS,
+            timeout=s.MAIL_TIMEOUT,
+        )
+        await smtp.connect()
+        if s.USE_CREDENTIALS and s.MAIL_PASSWORD:
+            await smtp.login(s.MAIL_USERNAME, s.MAIL_PASSWORD)
+        return smtp
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            smtp, released_at = self._idle.pop()
+            if not smtp.is_connected:
+                continue
+            # Servers drop idle sessions silently; probe before reuse
+            if time.monotonic() - released_at > self.settings.MAIL_IDLE_TIMEOUT_SECONDS:
+                try:
+                    await smtp.noop()
+                except aiosmtplib.SMTPException:
+                    self.discard(smtp)
+                    continue
+            return smtp
+        return await self._connect()
+
+    def release(self, smtp: aiosmtplib.SMTP):
+        if smtp.is_connected:
+            self._idle.append((smtp, time.monotonic()))
+
+    def discard(self, smtp: aiosmtplib.SMTP):
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        while self._idle:
+            smtp, _ = self._idle.pop()
+            try:
+                await smtp.quit()
+            except Exception:
+                self.discard(smtp)
+
+
+@dataclass
+class _OutboundMessage:
+    message: EmailMessage
+    future: asyncio.Future
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _is_transient(exc: Exception) -> bool:
+    """4xx replies, dropped sessions and timeouts are worth retrying; 5xx are not."""
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return all(400 <= r.code < 500 for r in exc.recipients)
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return 400 <= exc.code < 500
+    return isinstance(exc, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                            aiosmtplib.SMTPTimeoutError, asyncio.TimeoutError, OSError))
+
+
+class MailQueue:
+    """
+    Outbound queue drained by MAIL_POOL_SIZE workers. Each worker takes up to
+    MAIL_BATCH_SIZE queued messages and sends them over a single pooled session,
+    retrying transient failures with exponential backoff.
+    """
+
+    def __init__(self, settings: EmailSettings = email_settings):
+        self.settings = settings
+        self.pool = SMTPConnectionPool(settings)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"mail-worker-{i}")
+            for i in range(max(1, self.settings.MAIL_POOL_SIZE))
+        ]
+
+    async def send(self, message: EmailMessage) -> None:
+        """Enqueues a message and waits until it is delivered (or definitively fails)."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_OutboundMessage(message, future))
+        await future
+
+    async def _next_batch(self) -> List[_OutboundMessage]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.settings.MAIL_BATCH_WAIT_SECONDS
+        while len(batch) < self.settings.MAIL_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._send_batch(batch)
+            except asyncio.CancelledError:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.cancel()
+                raise
+            except Exception as e:
+                # Unexpected bug: fail the batch's senders instead of leaving them waiting, keep the worker
+                logger.exception(f"Mail worker failed on a batch of {len(batch)}: {e}")
+                for item in batch:
+                    if not item.future.done():
+                        self._fail(item, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch: List[_OutboundMessage]):
+        pending = batch
+        while pending:
+            retry = []
+            smtp = None
+            try:
+                smtp = await self.pool.acquire()
+            except Exception as e:
+                retry = pending
+                last_error = e
+            else:
+                for item in pending:
+                    try:
+                        # Workers outlive requests, so keep this out of per-request timings
+                        with timed("smtp_send", record_request=False):
+                            await smtp.send_message(item.message)
+                    except Exception as e:
+                        last_error = e
+                        if not _is_transient(e):
+                            self._fail(item, e)
+                            continue
+                        retry.append(item)
+                        if not smtp.is_connected:
+                            # Session is gone; everything left goes to the retry round
+                            retry.extend(pending[pending.index(item) + 1:])
+                            break
+                    else:
+                        self.sent += 1
+                        item.future.set_result(None)
+                if smtp.is_connected:
+                    self.pool.release(smtp)
+                else:
+                    self.pool.discard(smtp)
+
+            pending = []
+            for item in retry:
+                item.attempts += 1
+                if item.attempts > self.settings.MAIL_MAX_RETRIES:
+                    self._fail(item, last_error)
+                else:
+                    pending.append(item)
+            if pending:
+                delay = self.settings.MAIL_RETRY_BACKOFF_SECONDS * (2 ** (pending[0].attempts - 1))
+                logger.warning(f"Transient SMTP failure ({last_error}); retrying {len(pending)} message(s) in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _fail(self, item: _OutboundMessage, error: Exception):
+        self.failed += 1
+        if not item.future.done():
+            item.future.set_exception(error)
+
+    async def close(self):
+        """Waits for queued messages, then stops workers and closes pooled sessions."""
+        if self._queue is not None:
+            await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.pool.close()
+
+
+mail_queue = MailQueue()
+
 
 class EmailService:
     @staticmethod
-    async def send_report_email(email_to: str, pdf_bytes: bytes, filename: str = "Investment_Report.pdf"):
-        """
-        Sends an email with the PDF report attached.
-        """
-        try:
-            message = MessageSchema(
-                subject="[LogMind AI] Your Investment Analysis Report",
-                recipients=[email_to],
-                body="""
+    def build_report_message(email_to: str, pdf_bytes: bytes, filename: str = "Investment_Report.pdf",
+                             settings: EmailSettings = email_settings) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = "[LogMind AI] Your Investment Analysis Report"
+        message["From"] = settings.MAIL_FROM
+        message["To"] = email_to
+        message.set_content("Attached is your latest AI-driven portfolio analysis report.")
+        message.add_alternative("""
                 <html>
                     <body>
                         <h1>Investment Report Ready</h1>
@@ -51,13 +262,18 @@ class EmailService:
                         <p>Best regards,<br>LogMind AI Team</p>
                     </body>
                 </html>
-                """,
-                subtype=MessageType.html,
-                attachments=[(filename, pdf_bytes, "application/pdf")]
-            )
+                """, subtype="html")
+        message.add_attachment(pdf_bytes, maintype="application", subtype="pdf", filename=filename)
+        return message
 
-            fm = FastMail(conf)
-            await fm.send_message(message)
+    @staticmethod
+    async def send_report_email(email_to: str, pdf_bytes: bytes, filename: str = "Investment_Report.pdf"):
+        """
+        Sends an email with the PDF report attached.
+        """
+        try:
+            message = EmailService.build_report_message(email_to, pdf_bytes, filename)
+            await mail_queue.send(message)
             logger.info(f"Email sent successfully to {email_to}")
             return True
         except Exception as e:
@@ -0,0 +1,305 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import orjson
+import requests
+
+from app.core import cache, resilience
+from app.core.config import settings
+from app.core.metrics import QUOTE_REQUESTS, timed
+from app.services import exchange_calendar
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Quote:
+    symbol: str
+    price: Optional[float]
+    previous_close: Optional[float]
+    version: int = 0 # See QuoteVersions; set by get_quote
+
+    @property
+    def change_percent(self) -> float:
+        if self.price is None or not self.previous_close:
+            return 0.0
+        return (self.price - self.previous_close) / self.previous_close * 100
+
+
+class YahooProvider:
+    """
+    Quotes and fundamentals from Yahoo Finance via yfinance.
+    """
+    host = "finance.yahoo.com"
+
+    def quote(self, symbol: str) -> Quote:
+        import yfinance as yf
+
+        # fast_info provides the latest available price efficiently
+        fast_info = yf.Ticker(symbol).fast_info
+        return Quote(symbol, fast_info.last_price, fast_info.previous_close)
+
+    def fundamentals(self, symbol: str) -> Dict:
+        import yfinance as yf
+        import pandas as pd
+
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+
+        # Extract key metrics safely
+        # Try to get real-time price efficiently
+        try:
+            current_price = ticker.fast_info.last_price
+        except Exception as e:
+            logger.debug(f"fast_info unavailable for {symbol}, using info: {e}")
+            current_price = info.get("currentPrice", info.get("regularMarketPrice", 0))
+
+        metrics = {
+            "current_price": current_price,
+            "market_cap": info.get("marketCap", 0),
+            "per": info.get("trailingPE", 0),
+            "pbr": info.get("priceToBook", 0),
+            "dividend_yield": info.get("dividendYield", 0),
+            "roe": info.get("returnOnEquity", 0),
+            "revenue_growth": info.get("revenueGrowth", 0),
+            "profit_margins": info.get("profitMargins", 0),
+            "sector": info.get("sector", "Unknown"),
+            "industry": info.get("industry", "Unknown")
+        }
+
+        # Get last 3 years of financials (Revenue & Net Income)
+        try:
+            financials = ticker.financials
+            if not financials.empty:
+                # Select recent 3 columns
+                recent_years = financials.columns[:3]
+                financial_trend = {}
+                for date in recent_years:
+                    year_str = date.strftime('%Y')
+                    financial_trend[year_str] = {
+                        "revenue": financials.loc.get("Total Revenue", financials.loc.get("TotalRevenue", pd.Series())).get(date),
+                        "net_income": financials.loc.get("Net Income", financials.loc.get("NetIncome", pd.Series())).get(date)
+                    }
+                metrics["trend"] = financial_trend
+        except Exception as e:
+            logger.warning(f"Financial trend fetch failed for {symbol}: {e}")
+            metrics["trend"] = {}
+
+        return metrics
+
+    def history(self, symbol: str, start: datetime) -> List[Tuple[datetime, float]]:
+        import yfinance as yf
+
+        closes = yf.Ticker(symbol).history(start=start.strftime("%Y-%m-%d"), interval="1d", auto_adjust=False)["Close"]
+        return [(ts.to_pydatetime().astimezone(timezone.utc), float(close))
+                for ts, close in closes.dropna().items()]
+
+
+class HttpProvider:
+    """
+    Quotes and fundamentals from a JSON service exposing
+    GET /quote/{symbol}, GET /fundamentals/{symbol} and GET /history/{symbol}?start=
+    (used by the offline benchmark's fake quote server).
+    """
+
+    def __init__(self, base_url: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.host = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _get(self, path: str) -> Dict:
+        response = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def quote(self, symbol: str) -> Quote:
+        data = self._get(f"/quote/{symbol}")
+        return Quote(symbol, data.get("price"), data.get("previous_close"))
+
+    def fundamentals(self, symbol: str) -> Dict:
+        return self._get(f"/fundamentals/{symbol}")
+
+    def history(self, symbol: str, start: datetime) -> List[Tuple[datetime, float]]:
+        data = self._get(f"/history/{symbol}?start={start.strftime('%Y-%m-%d')}")
+        return [(datetime.fromisoformat(ts), float(close)) for ts, close in data.get("closes", [])]
+
+
+class QuoteVersions:
+    """
+    Per-symbol quote version, shared by all replicas: each symbol's last observed
+    (price, previous_close) and its version live in the cache backend, and a new
+    version is drawn from one cluster-wide counter only when those values change.
+    Versions only grow, so clients can ask for "symbols changed since version N";
+    an unchanged quote keeps its version whichever replica refetched it.
+    While the store is unreachable quotes get version 0 (clients resync once it recovers).
+    """
+
+    COUNTER = "quote-version-counter"
+    RECORD_TTL = 7 * 24 * 3600 # Spans long holidays; an expired record only costs a spurious bump
+
+    def __init__(self, backend: cache.CacheBackend = None):
+        self._backend = backend
+
+    @property
+    def backend(self) -> cache.CacheBackend:
+        return self._backend or cache.get_backend()
+
+    def _record(self, symbol: str) -> Optional[Dict]:
+        raw = self.backend.get(cache.cache_key("quote-version", symbol))
+        return orjson.loads(raw) if raw is not None else None
+
+    def observe(self, quote: Quote) -> int:
+        seen = self._record(quote.symbol)
+        if seen and (seen["price"], seen["previous_close"]) == (quote.price, quote.previous_close):
+            return seen["version"]
+        version = self.backend.incr(cache.cache_key(self.COUNTER))
+        if version is None:
+            return 0
+        record = {"price": quote.price, "previous_close": quote.previous_close, "version": version}
+        self.backend.set(cache.cache_key("quote-version", quote.symbol), orjson.dumps(record), self.RECORD_TTL)
+        return version
+
+    def get(self, symbol: str) -> int:
+        seen = self._record(symbol)
+        return seen["version"] if seen else 0
+
+quote_versions = QuoteVersions()
+
+
+class QuoteCache:
+    """
+    Market-hours-aware quote cache. While a symbol's exchange is open (or its exchange
+    is unknown) quotes are reused for at most `open_ttl` seconds. After the close a symbol
+    is fetched once, then once more when the closing price has settled, and that quote is
+    served until the next session opens: nights, weekends and holidays cost ~2 calls per symbol.
+    Entries live in the shared cache backend, and concurrent misses for one symbol, on any
+    replica, wait for a single upstream fetch.
+    """
+
+    def __init__(self, open_ttl: float = None, settle_seconds: float = None, market_hours: bool = None,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+                 backend: cache.CacheBackend = None):
+        self.open_ttl = timedelta(seconds=settings.QUOTE_TTL_OPEN_SECONDS if open_ttl is None else open_ttl)
+        self.settle = timedelta(seconds=settings.QUOTE_CLOSE_SETTLE_SECONDS if settle_seconds is None else settle_seconds)
+        self.market_hours = settings.QUOTE_MARKET_HOURS if market_hours is None else market_hours
+        self.clock = clock
+        self._backend = backend
+
+    @property
+    def backend(self) -> cache.CacheBackend:
+        return self._backend or cache.get_backend()
+
+    def _load(self, symbol: str) -> Optional[Tuple[Quote, datetime]]:
+        raw = self.backend.get(cache.cache_key("quote", symbol))
+        if raw is None:
+            return None
+        data = orjson.loads(raw)
+        quote = Quote(symbol, data["price"], data["previous_close"], data["version"])
+        return quote, datetime.fromtimestamp(data["fetched_at"], timezone.utc)
+
+    def _store(self, quote: Quote, now: datetime):
+        exchange = exchange_calendar.exchange_for(quote.symbol) if self.market_hours else None
+        ttl = self.open_ttl
+        if exchange is not None and not exchange.is_open(now):
+            ttl = max(ttl, exchange.next_open(now) - now) # Served until the next session
+        data = {"price": quote.price, "previous_close": quote.previous_close, "version": quote.version,
+                "fetched_at": now.timestamp()}
+        # Kept past its freshness, to serve while the upstream is unavailable
+        self.backend.set(cache.cache_key("quote", quote.symbol), orjson.dumps(data),
+                         max(ttl.total_seconds(), settings.QUOTE_STALE_SECONDS, 1.0))
+
+    def _fresh_source(self, symbol: str, entry: Optional[Tuple[Quote, datetime]], now: datetime) -> Optional[str]:
+        """'cache_closed' / 'cache_open' if the cached quote may be served, else None."""
+        if entry is None:
+            return None
+        fetched_at = entry[1]
+        exchange = exchange_calendar.exchange_for(symbol) if self.market_hours else None
+        if exchange is not None and not exchange.is_open(now):
+            settled = exchange.last_close(now) + self.settle
+            # One quote taken after the close is served while the closing price settles,
+            # and one taken after settling is served until the next open
+            if fetched_at >= settled or (now < settled and fetched_at >= settled - self.settle):
+                return "cache_closed"
+        if now - fetched_at < self.open_ttl:
+            return "cache_open"
+        return None
+
+    def get(self, symbol: str, fetch: Callable[[str], Quote]) -> Quote:
+        if not self.market_hours and not self.open_ttl:
+            return fetch(symbol) # Caching disabled
+        entry = self._load(symbol)
+        source = self._fresh_source(symbol, entry, self.clock())
+        if source is None:
+            def ready() -> bool:
+                nonlocal entry, source
+                entry = self._load(symbol)
+                source = self._fresh_source(symbol, entry, self.clock())
+                return source is not None
+
+            with cache.single_flight(cache.cache_key("quote", symbol), ready) as fetch_here:
+                if fetch_here:
+                    try:
+                        quote = fetch(symbol)
+                    except Exception as e:
+                        if entry is None:
+                            raise
+                        logger.warning(f"Serving stale quote for {symbol}: {e}")
+                        QUOTE_REQUESTS.labels("stale").inc()
+                        return entry[0]
+                    self._store(quote, self.clock())
+                    QUOTE_REQUESTS.labels("upstream").inc()
+                    return quote
+        QUOTE_REQUESTS.labels(source).inc()
+        return entry[0]
+
+quote_cache = QuoteCache()
+
+@lru_cache(maxsize=1)
+def get_provider():
+    if settings.MARKET_DATA_URL:
+        return HttpProvider(settings.MARKET_DATA_URL)
+    return YahooProvider()
+
+def upstream_guard() -> resilience.UpstreamGuard:
+    """Rate limit and circuit breaker shared by every call to the market data provider."""
+    return resilience.guard(get_provider().host, settings.MARKET_DATA_RATE_PER_SECOND, settings.MARKET_DATA_BURST)
+
+def _call_provider(method: str, *args):
+    def call():
+        with timed("yfinance"):
+            return getattr(get_provider(), method)(*args)
+    return upstream_guard().call(call)
+
+def _fetch_quote(symbol: str) -> Quote:
+    quote = _call_provider("quote", symbol)
+    quote.version = quote_versions.observe(quote)
+    return quote
+
+def get_quote(symbol: str) -> Quote:
+    """
+    Latest price and previous close for one symbol, versioned. Served from quote_cache
+    when the market is closed or the quote is younger than the open-session TTL, and
+    stale from it when the upstream fails or is refused (see core/resilience.py).
+    Raises on upstream failure when nothing is cached.
+    """
+    return quote_cache.get(symbol, _fetch_quote)
+
+
+def get_fundamentals(symbol: str) -> Dict:
+    """
+    Valuation metrics, sector and financial trend for one symbol, cached for
+    FUNDAMENTALS_CACHE_TTL_SECONDS across replicas (and served stale while the
+    upstream fails). Raises on upstream failure when nothing is cached.
+    """
+    return cache.get_or_compute(
+        "fundamentals", symbol, settings.FUNDAMENTALS_CACHE_TTL_SECONDS, lambda: _call_provider("fundamentals", symbol),
+        encode=lambda metrics: orjson.dumps(metrics, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        stale_ttl=settings.STALE_CACHE_SECONDS,
+    )
+
+def get_history(symbol: str, start: datetime) -> List[Tuple[datetime, float]]:
+    """Daily (UTC timestamp, close) bars since `start`, oldest first. Raises on upstream failure."""
+    return _call_provider("history", symbol, start)
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, delete, extract, func, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.core.pagination import keyset_page
+from app.services import valuation
+
+def latest_portfolio_stmt(user_id: str):
+    """
+    Latest portfolio of a user with its items joined in, as one statement.
+    Served by ix_portfolios_user_id_created_at_id (backward scan, LIMIT 1)
+    and ix_portfolio_items_portfolio_id for the item join.
+    """
+    return (
+        select(models.Portfolio)
+        .where(models.Portfolio.user_id == user_id)
+        .order_by(models.Portfolio.created_at.desc(), models.Portfolio.id.desc())
+        .limit(1)
+        .options(joinedload(models.Portfolio.items))
+    )
+
+def get_latest_portfolio(db: Session, user_id: Optional[str]) -> Optional[models.Portfolio]:
+    """Returns the user's newest portfolio with items already loaded, or None."""
+    if user_id is None:
+        return None
+    return db.scalars(latest_portfolio_stmt(user_id)).unique().first()
+
+def create_portfolio(db: Session, user_id: str, name: str, items) -> int:
+    """
+    Writes a portfolio and all of its items with two statements: one INSERT ... RETURNING
+    for the portfolio and one executemany (batched into multi-row VALUES) for the items.
+    total_value prices each item at current_price, falling back to avg_price. The caller commits.
+    """
+    items = list(items)
+    rows = [{
+        "symbol": item.symbol,
+        "name": item.name,
+        "quantity": item.quantity,
+        "avg_price": item.avg_price,
+        "current_price": item.current_price,
+        "sector": item.sector,
+    } for item in items]
+    total_value = valuation.value_items(items).total_value
+
+    portfolio_id = db.execute(
+        insert(models.Portfolio)
+        .values(name=name, user_id=user_id, total_value=total_value)
+        .returning(models.Portfolio.id)
+    ).scalar_one()
+    if rows:
+        for row in rows:
+            row["portfolio_id"] = portfolio_id
+        db.execute(insert(models.PortfolioItem), rows)
+    return portfolio_id
+
+def list_history(db: Session, user_id: str, limit: int,
+                 cursor: Optional[str] = None) -> Tuple[List[models.Portfolio], Optional[str]]:
+    """
+    One page of a user's saved portfolios (without items), newest first, and the cursor
+    of the next page. Every page is a range scan of ix_portfolios_user_id_created_at_id.
+    """
+    stmt = select(models.Portfolio).where(models.Portfolio.user_id == user_id)
+    return keyset_page(db, stmt, models.Portfolio, limit, cursor)
+
+def get_portfolio(db: Session, user_id: str, portfolio_id: int) -> Optional[models.Portfolio]:
+    """One of the user's saved portfolios with its items, or None (missing or someone else's)."""
+    return db.scalars(
+        select(models.Portfolio)
+        .where(models.Portfolio.id == portfolio_id, models.Portfolio.user_id == user_id)
+        .options(joinedload(models.Portfolio.items))
+    ).unique().first()
+
+def _side(column, portfolio_id: int):
+    return func.sum(case((models.Portfolio.id == portfolio_id, column)))
+
+def _across_sides(column, portfolio_id: int):
+    """A per-portfolio value repeated on every row: max over the whole (grouped) result."""
+    return func.max(func.max(case((models.Portfolio.id == portfolio_id, column)))).over()
+
+def diff_stmt(user_id: str, from_id: int, to_id: int):
+    """
+    Per-symbol holdings of two of a user's portfolios side by side, as one grouped scan
+    of both portfolios' items (ix_portfolio_items_portfolio_id). Lots of the same symbol
+    are merged: total quantity and quantity-weighted average price. A side is NULL when
+    the symbol is not held there. Every row also carries both portfolios' total_value and
+    whether each was found; an empty portfolio contributes one row with a NULL symbol.
+    """
+    item = models.PortfolioItem
+    quantity_before = _side(item.quantity, from_id)
+    quantity_after = _side(item.quantity, to_id)
+    return (
+        select(
+            item.symbol,
+            quantity_before.label("quantity_before"),
+            quantity_after.label("quantity_after"),
+            (_side(item.quantity * item.avg_price, from_id) / func.nullif(quantity_before, 0)).label("avg_price_before"),
+            (_side(item.quantity * item.avg_price, to_id) / func.nullif(quantity_after, 0)).label("avg_price_after"),
+            _across_sides(models.Portfolio.total_value, from_id).label("total_value_before"),
+            _across_sides(models.Portfolio.total_value, to_id).label("total_value_after"),
+            _across_sides(1, from_id).label("has_before"),
+            _across_sides(1, to_id).label("has_after"),
+        )
+        .select_from(models.Portfolio)
+        .outerjoin(item, item.portfolio_id == models.Portfolio.id)
+        .where(models.Portfolio.id.in_((from_id, to_id)), models.Portfolio.user_id == user_id)
+        .group_by(item.symbol)
+        .order_by(item.symbol)
+    )
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+def diff_portfolios(db: Session, user_id: str, from_id: int, to_id: int) -> Optional[Dict]:
+    """
+    What changed between two of the user's portfolios: each symbol's quantity and average
+    price before/after and whether it was added, removed, changed or unchanged.
+    None if either portfolio is missing or not the user's.
+    """
+    rows = db.execute(diff_stmt(user_id, from_id, to_id)).all()
+    if not rows or rows[0].has_before is None or rows[0].has_after is None:
+        return None
+
+    items = []
+    for row in rows:
+        if row.symbol is None:
+            continue # An empty side
+        before, after = _float(row.quantity_before), _float(row.quantity_after)
+        avg_before, avg_after = _float(row.avg_price_before), _float(row.avg_price_after)
+        if before is None:
+            status = "added"
+        elif after is None:
+            status = "removed"
+        elif before != after or avg_before != avg_after:
+            status = "changed"
+        else:
+            status = "unchanged"
+        items.append({
+            "symbol": row.symbol,
+            "status": status,
+            "quantity_before": before,
+            "quantity_after": after,
+            "quantity_change": (after or 0.0) - (before or 0.0),
+            "avg_price_before": avg_before,
+            "avg_price_after": avg_after,
+        })
+    return {
+        "from_id": from_id,
+        "to_id": to_id,
+        "total_value_before": _float(rows[0].total_value_before) or 0.0,
+        "total_value_after": _float(rows[0].total_value_after) or 0.0,
+        "items": items,
+    }
+
+def compactable_ids_stmt(keep_all_before: datetime, keep_daily_before: datetime, limit: int):
+    """
+    Ids of snapshots older than keep_all_before that retention drops: of each user's
+    snapshots, only the last one per day is kept, and before keep_daily_before only the
+    last one per month. A user's newest snapshot is always the last of its bucket.
+    """
+    created_at = models.Portfolio.created_at
+    year, month, day = extract("year", created_at), extract("month", created_at), extract("day", created_at)
+    # yyyymm and yyyymmdd never collide, so one partition key covers both tiers
+    bucket = case((created_at < keep_daily_before, year * 100 + month), else_=year * 10000 + month * 100 + day)
+    ranked = (
+        select(
+            models.Portfolio.id,
+            func.row_number().over(
+                partition_by=(models.Portfolio.user_id, bucket),
+                order_by=(created_at.desc(), models.Portfolio.id.desc()),
+            ).label("rank"),
+        )
+        .where(created_at < keep_all_before)
+        .subquery()
+    )
+    return select(ranked.c.id).where(ranked.c.rank > 1).limit(limit)
+
+def delete_portfolios(db: Session, portfolio_ids: List[int]) -> None:
+    """Deletes portfolios and their items in two statements. The caller commits."""
+    db.execute(delete(models.PortfolioItem).where(models.PortfolioItem.portfolio_id.in_(portfolio_ids)))
+    db.execute(delete(models.Portfolio).where(models.Portfolio.id.in_(portfolio_ids)))
+
+def compact_history(db: Session, keep_all_days: int, keep_daily_days: int, batch_size: int,
+                    now: datetime = None) -> int:
+    """
+    Applies the retention policy of compactable_ids_stmt, committing every batch_size
+    snapshots so locks stay short. Returns the number of snapshots deleted.
+    """
+    now = now or datetime.now(timezone.utc)
+    keep_all_before = now - timedelta(days=keep_all_days)
+    keep_daily_before = now - timedelta(days=max(keep_daily_days, keep_all_days))
+    deleted = 0
+    while True:
+        ids = list(db.scalars(compactable_ids_stmt(keep_all_before, keep_daily_before, batch_size)))
+        if not ids:
+            return deleted
+        delete_portfolios(db, ids)
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
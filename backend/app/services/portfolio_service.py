@@ -1,12 +1,10 @@
-from openai import OpenAI
-from app.core.config import settings
+from app.core.openai_client import get_openai_client
+from app.core.metrics import timed_stage
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=settings.openai_api_key)
-
 SYSTEM_PROMPT = """
 You are a financial portfolio analyzer. Your task is to extract portfolio holdings from a screenshot.
 Identify the Ticker Symbol (e.g., AAPL, TSLA, 005930.KS), Quantity (Shares), Average Price, and if possible, the Sector.
@@ -32,9 +30,10 @@ If you cannot identify specific numbers, make a reasonable estimate or return 0,
 If the image is not a portfolio, return an empty items list.
 """
 
+@timed_stage("llm")
 def analyze_portfolio_image(image_base64: str):
     try:
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import exchange_calendar, market_data
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement when bulk appending
+APPEND_CHUNK = 5000
+
+def _insert(db: Session):
+    """Dialect INSERT supporting ON CONFLICT DO NOTHING (Postgres in production, SQLite for local runs)."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(models.PriceHistory)
+
+def append_prices(db: Session, rows: Iterable[Tuple[str, datetime, float]]) -> int:
+    """
+    Bulk-appends (symbol, ts, close) rows with multi-row INSERTs.
+    Bars already stored are skipped, so overlapping backfills are harmless.
+    Does not commit. Returns the number of rows sent.
+    """
+    values = [{"symbol": symbol, "ts": ts, "close": close} for symbol, ts, close in rows]
+    for i in range(0, len(values), APPEND_CHUNK):
+        stmt = _insert(db).values(values[i:i + APPEND_CHUNK]).on_conflict_do_nothing(index_elements=["symbol", "ts"])
+        db.execute(stmt)
+    return len(values)
+
+def latest_timestamps(db: Session, symbols: List[str]) -> Dict[str, datetime]:
+    """Most recent stored bar per symbol (symbols without history are absent)."""
+    stmt = (
+        select(models.PriceHistory.symbol, func.max(models.PriceHistory.ts))
+        .where(models.PriceHistory.symbol.in_(symbols))
+        .group_by(models.PriceHistory.symbol)
+    )
+    return {symbol: _as_utc(ts) for symbol, ts in db.execute(stmt)}
+
+def is_current(symbol: str, last: datetime, now: datetime, max_age: timedelta = timedelta(days=1)) -> bool:
+    """
+    Whether a symbol's newest stored bar already covers its last completed session.
+    Daily bars are stamped at local midnight (KRX bars fall on the previous UTC day),
+    so the check compares exchange-local dates; weekends and listed holidays never
+    look stale. Symbols without session knowledge fall back to `last` being within `max_age`.
+    """
+    exchange = exchange_calendar.exchange_for(symbol)
+    if exchange is None:
+        return last >= now - max_age
+    return last.astimezone(exchange.tz).date() >= exchange.last_close(now).astimezone(exchange.tz).date()
+
+def backfill(db: Session, symbols: Iterable[str], start: datetime, max_age: timedelta = timedelta(days=1)) -> int:
+    """
+    Fetches bars missing since `start` (or since the last stored bar) for symbols
+    whose newest bar predates their last completed session (see is_current), and
+    appends them in one pass. Upstream failures are logged per symbol; commits once at the end.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return 0
+    latest = latest_timestamps(db, symbols)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for symbol in symbols:
+        last = latest.get(symbol)
+        if last is not None and is_current(symbol, last, now, max_age):
+            continue
+        try:
+            bars = market_data.get_history(symbol, max(start, last) if last else start)
+        except Exception as e:
+            logger.warning(f"Price history fetch failed for {symbol}: {e}")
+            continue
+        rows.extend((symbol, ts, close) for ts, close in bars)
+    appended = append_prices(db, rows)
+    db.commit()
+    return appended
+
+def load_closes(db: Session, symbols: List[str], start: datetime, end: Optional[datetime] = None):
+    """
+    Closes for `symbols` in [start, end) as a pandas DataFrame:
+    one row per timestamp, one column per symbol (NaN where a market had no bar).
+    """
+    import pandas as pd
+
+    stmt = (
+        select(models.PriceHistory.ts, models.PriceHistory.symbol, models.PriceHistory.close)
+        .where(models.PriceHistory.symbol.in_(symbols), models.PriceHistory.ts >= start)
+        .order_by(models.PriceHistory.ts)
+    )
+    if end is not None:
+        stmt = stmt.where(models.PriceHistory.ts < end)
+    frame = pd.DataFrame(db.execute(stmt).all(), columns=["ts", "symbol", "close"])
+    if frame.empty:
+        return pd.DataFrame(columns=symbols, dtype=float)
+    frame["ts"] = pd.to_datetime(frame["ts"], utc=True)
+    return frame.pivot(index="ts", columns="symbol", values="close")
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite returns naive datetimes
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
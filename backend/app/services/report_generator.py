@@ -1,17 +1,11 @@
 import io
 import base64
 import logging
+from app.core.metrics import timed_stage
+from app.services import valuation
 from typing import List, Dict
 from datetime import datetime
-import matplotlib
-matplotlib.use('Agg') # Essential for Docker environments without display
-import matplotlib.pyplot as plt
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
+from xml.sax.saxutils import escape
 
 logger = logging.getLogger(__name__)
 
@@ -24,35 +18,78 @@ class ReportGenerator:
         # ReportLab doesn't use HTML templates directly in this simple mode
         pass
 
-    def _generate_chart(self, items: List[Dict]) -> io.BytesIO:
+    def _generate_chart(self, items: List[Dict], values=None) -> io.BytesIO:
         """
         Generates a Pie Chart for portfolio allocation and returns BytesIO.
         """
+        # Imported on first use: matplotlib adds noticeably to app import time.
+        # Figure + Agg canvas instead of pyplot: reports render concurrently and
+        # pyplot's current-figure state is shared across threads.
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
         try:
             labels = [item['symbol'] for item in items]
-            sizes = [item['quantity'] * item['current_price'] for item in items]
+            sizes = values if values is not None else [item['quantity'] * item['current_price'] for item in items]
             
-            plt.figure(figsize=(6, 4))
-            plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=['#3182f6', '#f04452', '#33c759', '#ffb300'])
-            plt.axis('equal') 
+            fig = Figure(figsize=(6, 4))
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=['#3182f6', '#f04452', '#33c759', '#ffb300'])
+            ax.axis('equal') 
             
             img_io = io.BytesIO()
-            plt.savefig(img_io, format='png', bbox_inches='tight')
+            fig.savefig(img_io, format='png', bbox_inches='tight')
             img_io.seek(0)
-            plt.close()
             return img_io
         except Exception as e:
             logger.error(f"Chart generation failed: {e}")
             return None
 
+    def _generate_performance_chart(self, performance) -> io.BytesIO:
+        """
+        Line chart of portfolio value with drawdown underneath, returns BytesIO.
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        try:
+            fig = Figure(figsize=(6, 4))
+            FigureCanvasAgg(fig)
+            ax_value, ax_dd = fig.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+            ax_value.plot(performance.value_series.index, performance.value_series.values, color='#3182f6')
+            ax_value.set_ylabel('Value')
+            ax_value.grid(alpha=0.3)
+            ax_dd.fill_between(performance.drawdown.index, performance.drawdown.values * 100, 0, color='#f04452', alpha=0.5)
+            ax_dd.set_ylabel('Drawdown %')
+            fig.autofmt_xdate()
+
+            img_io = io.BytesIO()
+            fig.savefig(img_io, format='png', bbox_inches='tight')
+            img_io.seek(0)
+            return img_io
+        except Exception as e:
+            logger.error(f"Performance chart generation failed: {e}")
+            return None
+
+    @timed_stage("pdf_render")
     def create_pdf(self, 
                    user_email: str, 
                    portfolio_data: Dict, 
                    ai_insight: str, 
-                   stock_details: List[Dict]) -> bytes:
+                   stock_details: List[Dict],
+                   performance=None) -> bytes:
         """
         Generates PDF using ReportLab Platypus.
+        `performance` (analytics.PortfolioAnalytics) adds a performance section when given.
         """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib import colors
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfbase import pdfmetrics
+
         try:
             buffer = io.BytesIO()
             
@@ -89,7 +126,12 @@ class ReportGenerator:
             story.append(Spacer(1, 24))
             
             # 2. Portfolio Overview
-            total_value = sum([s['price'] * s['quantity'] for s in stock_details])
+            holdings = valuation.value_positions(
+                [s['quantity'] for s in stock_details],
+                [s['avg_price'] for s in stock_details],
+                [s['price'] for s in stock_details],
+            )
+            total_value = holdings.total_value
             
             story.append(Paragraph("1. Portfolio Overview", styles['Heading2']))
             story.append(Spacer(1, 6))
@@ -98,7 +140,7 @@ class ReportGenerator:
             
             # Chart
             try:
-                chart_io = self._generate_chart(stock_details)
+                chart_io = self._generate_chart(stock_details, holdings.values)
                 if chart_io:
                     img = Image(chart_io, width=400, height=260)
                     story.append(img)
@@ -107,8 +149,40 @@ class ReportGenerator:
                 
             story.append(Spacer(1, 24))
             
+            section = 2
+            if performance is not None:
+                # Performance over stored price history
+                story.append(Paragraph(f"{section}. Performance", styles['Heading2']))
+                story.append(Spacer(1, 6))
+                period = (f"{performance.value_series.index[0].strftime('%Y-%m-%d')} ~ "
+                          f"{performance.value_series.index[-1].strftime('%Y-%m-%d')}")
+                story.append(Paragraph(
+                    f"Period: {period} | Return: {performance.total_return * 100:.2f}% | "
+                    f"Volatility (ann.): {performance.volatility * 100:.2f}% | "
+                    f"Max Drawdown: {performance.max_drawdown * 100:.2f}%", styles['Normal']))
+                story.append(Spacer(1, 12))
+                chart_io = self._generate_performance_chart(performance)
+                if chart_io:
+                    story.append(Image(chart_io, width=400, height=260))
+                if performance.sector_weights:
+                    story.append(Spacer(1, 12))
+                    sector_table = Table(
+                        [['Sector', 'Weight']] + [[k, f"{v * 100:.1f}%"] for k, v in performance.sector_weights.items()],
+                        colWidths=[200, 80])
+                    sector_table.setStyle(TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('FONTNAME', (0, 0), (-1, -1), font_name),
+                        ('FONTSIZE', (0, 0), (-1, -1), 9),
+                        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
+                        ('GRID', (0, 0), (-1, -1), 1, colors.white),
+                    ]))
+                    story.append(sector_table)
+                story.append(Spacer(1, 24))
+                section += 1
+
             # 3. Asset Details (Table)
-            story.append(Paragraph("2. Asset Details", styles['Heading2']))
+            story.append(Paragraph(f"{section}. Asset Details", styles['Heading2']))
             story.append(Spacer(1, 12))
             
             table_data = [['Symbol', 'Name', 'Qty', 'Avg Price', 'Current', 'Returns']]
@@ -143,10 +217,17 @@ class ReportGenerator:
                 ('FONTSIZE', (0, 1), (-1, -1), 9),
             ]))
             story.append(t)
-            story.append(Spacer(1, 24))
+            story.append(Spacer(1, 12))
+
+            # Per-holding AI notes
+            for s in stock_details:
+                if s.get('ai_summary'):
+                    story.append(Paragraph(f"<b>{escape(s['symbol'])}</b>: {escape(s['ai_summary'])}", styles['Normal']))
+                    story.append(Spacer(1, 4))
+            story.append(Spacer(1, 20))
             
             # 4. AI Insight
-            story.append(Paragraph("3. AI Analyst Insight", styles['Heading2']))
+            story.append(Paragraph(f"{section + 1}. AI Analyst Insight", styles['Heading2']))
             story.append(Spacer(1, 6))
             
             # Sanitize Text for PDF (ReportLab limitations on default font)
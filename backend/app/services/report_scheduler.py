@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app import models
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services import portfolio_repository, report_service
+from app.services.mailer import EmailService
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BulkReportStats:
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    duration_seconds: float = 0.0
+    users: int = 0
+    reports_sent: int = 0
+    reports_failed: int = 0
+    holdings: int = 0            # Symbol references across all portfolios
+    symbols_fetched: int = 0     # Distinct symbols actually fetched upstream
+
+    @property
+    def reports_per_second(self) -> float:
+        return self.reports_sent / self.duration_seconds if self.duration_seconds else 0.0
+
+    @property
+    def dedup_ratio(self) -> float:
+        return self.holdings / self.symbols_fetched if self.symbols_fetched else 0.0
+
+    def as_dict(self) -> Dict:
+        data = asdict(self)
+        data["started_at"] = self.started_at.isoformat()
+        data["reports_per_second"] = round(self.reports_per_second, 3)
+        data["dedup_ratio"] = round(self.dedup_ratio, 2)
+        return data
+
+
+def iter_latest_portfolios(db: Session, page_size: int) -> Iterator[List[Tuple[str, models.Portfolio]]]:
+    """
+    Streams (email, latest portfolio with items) for every user, one page at a time.
+    Uses keyset pagination on user_id so each page is an index range scan.
+    """
+    last_user_id = None
+    while True:
+        stmt = (
+            select(models.User.email, models.Portfolio)
+            .join(models.Portfolio, models.Portfolio.user_id == models.User.id)
+            .distinct(models.Portfolio.user_id)
+            .order_by(models.Portfolio.user_id, models.Portfolio.created_at.desc())
+            .options(selectinload(models.Portfolio.items))
+            .limit(page_size)
+        )
+        if last_user_id is not None:
+            stmt = stmt.where(models.Portfolio.user_id > last_user_id)
+        page = db.execute(stmt).all()
+        if not page:
+            return
+        yield [(email, portfolio) for email, portfolio in page]
+        last_user_id = page[-1][1].user_id
+        # Release loaded objects; the next page starts from a clean identity map
+        db.expunge_all()
+
+
+class BulkReportRunner:
+    """
+    One bulk run: pages through users, fetches each distinct symbol (and backfills
+    its price history) once for the whole run, and renders/sends reports through a
+    bounded worker pool.
+    """
+
+    def __init__(self, page_size: int = None, report_workers: int = None, fetch_workers: int = None):
+        self.page_size = page_size or settings.REPORT_PAGE_SIZE
+        self.report_workers = report_workers or settings.REPORT_WORKERS
+        self.fetch_workers = fetch_workers or settings.REPORT_FETCH_WORKERS
+        self.stats = BulkReportStats()
+        self._symbol_data: Dict[str, asyncio.Future] = {}
+        self._history: Dict[str, asyncio.Future] = {}
+
+    def _symbol_future(self, loop, executor, symbol: str) -> asyncio.Future:
+        future = self._symbol_data.get(symbol)
+        if future is None:
+            future = loop.run_in_executor(executor, report_service.fetch_symbol_data, symbol)
+            self._symbol_data[symbol] = future
+            self.stats.symbols_fetched += 1
+        return future
+
+    @staticmethod
+    def _backfill_history(symbols: List[str]):
+        try:
+            report_service.backfill_history(symbols)
+        except Exception as e:
+            # Reports still render from whatever history is stored
+            logger.error(f"Price history backfill failed for {len(symbols)} symbols: {e}")
+
+    def _backfill_page(self, loop, executor, page):
+        """One backfill per page for the symbols no earlier page of this run has seen."""
+        symbols = list(dict.fromkeys(
+            item.symbol for _, portfolio in page for item in portfolio.items if item.symbol not in self._history
+        ))
+        if symbols:
+            future = loop.run_in_executor(executor, self._backfill_history, symbols)
+            self._history.update(dict.fromkeys(symbols, future))
+
+    async def _report_for(self, loop, render_executor, fetch_executor, email: str, items, slots: asyncio.Semaphore):
+        try:
+            symbols = list(dict.fromkeys(item.symbol for item in items))
+            fetched = await asyncio.gather(*[self._symbol_future(loop, fetch_executor, s) for s in symbols])
+            stock_details = report_service.build_stock_details(items, dict(zip(symbols, fetched)))
+            await asyncio.gather(*{self._history[s] for s in symbols})
+            pdf_bytes = await loop.run_in_executor(
+                render_executor, report_service.render_report, email, stock_details, False
+            )
+            if await EmailService.send_report_email(email, pdf_bytes):
+                self.stats.reports_sent += 1
+            else:
+                self.stats.reports_failed += 1
+        except Exception as e:
+            logger.error(f"Bulk report failed for {email}: {e}")
+            self.stats.reports_failed += 1
+        finally:
+            slots.release()
+
+    async def run(self) -> BulkReportStats:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        # Backpressure: paging pauses while report_workers reports are in flight
+        slots = asyncio.Semaphore(self.report_workers)
+        tasks = []
+        db = SessionLocal()
+        try:
+            with ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="report-fetch") as fetch_executor, \
+                 ThreadPoolExecutor(self.report_workers, thread_name_prefix="report-render") as render_executor:
+                pages = iter_latest_portfolios(db, self.page_size)
+                while True:
+                    page = await loop.run_in_executor(None, next, pages, None)
+                    if page is None:
+                        break
+                    self._backfill_page(loop, fetch_executor, page)
+                    for email, portfolio in page:
+                        items = list(portfolio.items)
+                        if not items:
+                            continue
+                        self.stats.users += 1
+                        self.stats.holdings += len(items)
+                        await slots.acquire()
+                        tasks.append(asyncio.create_task(
+                            self._report_for(loop, render_executor, fetch_executor, email, items, slots)
+                        ))
+                await asyncio.gather(*tasks)
+        finally:
+            db.close()
+            self._symbol_data.clear()
+            self._history.clear()
+        self.stats.duration_seconds = time.perf_counter() - start
+        logger.info(f"Bulk report run finished: {self.stats.as_dict()}")
+        return self.stats
+
+
+def compact_portfolio_history() -> int:
+    """Applies the PORTFOLIO_KEEP_* retention policy to every user's saved portfolios."""
+    db = SessionLocal()
+    try:
+        deleted = portfolio_repository.compact_history(
+            db, settings.PORTFOLIO_KEEP_ALL_DAYS, settings.PORTFOLIO_KEEP_DAILY_DAYS,
+            settings.PORTFOLIO_COMPACTION_BATCH_SIZE,
+        )
+    finally:
+        db.close()
+    logger.info(f"Portfolio compaction removed {deleted} snapshots")
+    return deleted
+
+
+class ReportScheduler:
+    """
+    Runs BulkReportRunner once a day at REPORT_SCHEDULE_HOUR (UTC), then the
+    portfolio history compaction (PORTFOLIO_COMPACTION_ENABLED).
+    """
+
+    def __init__(self, hour: int = None):
+        self.hour = settings.REPORT_SCHEDULE_HOUR if hour is None else hour
+        self.last_stats: Optional[BulkReportStats] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def seconds_until_next_run(self, now: datetime = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            try:
+                self.last_stats = await BulkReportRunner().run()
+            except Exception as e:
+                logger.error(f"Bulk report run aborted: {e}")
+            if settings.PORTFOLIO_COMPACTION_ENABLED:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, compact_portfolio_history)
+                except Exception as e:
+                    logger.error(f"Portfolio compaction aborted: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="report-scheduler")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+report_scheduler = ReportScheduler()
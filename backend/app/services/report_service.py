@@ -0,0 +1,185 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+from app.core.config import settings
+from app.core.metrics import in_current_context
+from app.database import SessionLocal
+from app.services import valuation
+from app.services.crawler import DataCrawler
+from app.services.report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+FETCH_FAILED_SUMMARY = "Data fetch failed."
+
+def fetch_symbol_data(symbol: str, news_limit: int = 3) -> Dict:
+    """
+    Collects financials and recent news for one symbol.
+    News failures are tolerated so a report can still be produced.
+    """
+    fin = DataCrawler.get_financial_summary(symbol)
+    news = []
+    try:
+        news = DataCrawler.crawl_news(symbol, limit=news_limit)
+    except Exception as ne:
+        logger.warning(f"News crawl error for {symbol}: {ne}")
+    return {"fin": fin, "news": news}
+
+def collect_symbol_data(symbols: Iterable[str], max_workers: int = 8) -> Dict[str, Dict]:
+    """
+    Fetches data for each distinct symbol exactly once, in parallel.
+    """
+    unique = list(dict.fromkeys(symbols))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as pool:
+        return dict(zip(unique, pool.map(in_current_context(fetch_symbol_data), unique)))
+
+def build_stock_details(items, symbol_data: Dict[str, Dict]) -> List[Dict]:
+    """
+    Turns portfolio items plus prefetched symbol data into report rows.
+    Prices and profit rates for all rows come from one valuation pass.
+    Items whose data could not be processed get a minimal fail-safe row.
+    """
+    items = list(items)
+    rows, live_prices = [], []
+    for item in items:
+        try:
+            data = symbol_data.get(item.symbol) or {"fin": {}, "news": []}
+            fin, news = data["fin"], data["news"]
+
+            # Placeholder until the batched AI summary (render_report) replaces it
+            ai_summary = f"Sector: {fin.get('sector', 'N/A')}. News count: {len(news)}"
+
+            rows.append({
+                "symbol": item.symbol,
+                "name": item.name,
+                "per": fin.get("per", "N/A"),
+                "pbr": fin.get("pbr", "N/A"),
+                "sector": fin.get("sector") or item.sector,
+                "headlines": [n.get("title") for n in news if n.get("title")],
+                "ai_summary": ai_summary
+            })
+            # Prioritize real-time fetched price
+            live_prices.append(float(fin["current_price"]) if fin.get("current_price") else None)
+        except Exception as item_e:
+            logger.error(f"Error processing item {item.symbol}: {item_e}")
+            # Add minimal data so process doesn't stop: valued at avg_price
+            rows.append({
+                "symbol": item.symbol,
+                "name": item.name,
+                "per": "-", "pbr": "-", "sector": item.sector, "headlines": [], "ai_summary": FETCH_FAILED_SUMMARY
+            })
+            live_prices.append(float(item.avg_price))
+
+    result = valuation.value_items(items, live_prices)
+    quantities = valuation.to_array(item.quantity for item in items).tolist()
+    avg_prices = valuation.to_array(item.avg_price for item in items).tolist()
+    for i, row in enumerate(rows):
+        price = float(result.prices[i])
+        row.update({
+            "quantity": quantities[i],
+            "avg_price": avg_prices[i],
+            "price": price,
+            "current_price": price,
+            "profit_rate": round(float(result.profit_rates[i]), 2),
+        })
+    return rows
+
+def history_start(days: int = None) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days or settings.REPORT_HISTORY_DAYS)
+
+def backfill_history(symbols: Iterable[str], days: int = None) -> int:
+    """Backfills stored closes for `symbols` over the report window. Returns rows appended."""
+    from app.services import price_history
+
+    db = SessionLocal()
+    try:
+        return price_history.backfill(db, symbols, history_start(days))
+    finally:
+        db.close()
+
+def portfolio_performance(stock_details: List[Dict], days: int = None, backfill: bool = True):
+    """
+    Value series, returns, volatility, drawdown and sector weights over the last
+    `days` of stored closes. Missing history is backfilled first unless `backfill`
+    is False (the caller already did). Returns None when there is not enough history.
+    """
+    from app.services import analytics, price_history
+
+    start = history_start(days)
+    quantities: Dict[str, float] = {}
+    sectors: Dict[str, str] = {}
+    for s in stock_details:
+        quantities[s["symbol"]] = quantities.get(s["symbol"], 0.0) + s["quantity"]
+        sectors.setdefault(s["symbol"], s.get("sector"))
+
+    if backfill:
+        backfill_history(quantities, days)
+    db = SessionLocal()
+    try:
+        closes = price_history.load_closes(db, list(quantities), start)
+    finally:
+        db.close()
+    return analytics.portfolio_analytics(closes, quantities, sectors)
+
+def attach_ai_summaries(stock_details: List[Dict]):
+    """
+    Replaces placeholder ai_summary values with batched LLM summaries.
+    Rows whose symbol could not be summarized keep their placeholder.
+    """
+    from app.services import holding_summaries
+
+    summaries = holding_summaries.summarize_holdings(
+        [s for s in stock_details if s.get("ai_summary") != FETCH_FAILED_SUMMARY]
+    )
+    for s in stock_details:
+        if s["symbol"] in summaries:
+            s["ai_summary"] = summaries[s["symbol"]]
+
+def render_report(user_email: str, stock_details: List[Dict], backfill: bool = True) -> bytes:
+    """
+    Runs the overall AI analysis, the per-holding summaries and the performance
+    analytics concurrently, then renders the PDF report. Bulk runs pass
+    `backfill=False` after backfilling the run's symbols once themselves.
+    """
+    from app import rag
+
+    def overall_analysis() -> str:
+        try:
+            items_data = [{"symbol": s['symbol'], "quantity": s['quantity'], "avg_price": s['avg_price']} for s in stock_details]
+            return rag.analyze_portfolio_long_term(items_data)
+        except Exception as ai_e:
+            logger.error(f"AI Analysis failed: {ai_e}")
+            return "AI Analysis unavailable at this moment."
+
+    def performance_analytics():
+        try:
+            return portfolio_performance(stock_details, backfill=backfill)
+        except Exception as pe:
+            logger.error(f"Performance analytics failed: {pe}")
+            return None
+
+    def holding_summaries():
+        try:
+            attach_ai_summaries(stock_details)
+        except Exception as se:
+            logger.error(f"Holding summaries failed: {se}")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        insight_future = pool.submit(in_current_context(overall_analysis))
+        performance_future = pool.submit(in_current_context(performance_analytics))
+        pool.submit(in_current_context(holding_summaries)).result()
+        overall_insight = insight_future.result()
+        performance = performance_future.result()
+
+    generator = ReportGenerator()
+    return generator.create_pdf(
+        user_email=user_email,
+        portfolio_data={},
+        ai_insight=overall_insight,
+        stock_details=stock_details,
+        performance=performance
+    )
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+def to_array(values: Iterable) -> np.ndarray:
+    """float64 array from numbers, Decimals or None (None -> NaN), converted once."""
+    return np.array(values if isinstance(values, (list, tuple)) else list(values), dtype=float)
+
+def coalesce(*arrays: np.ndarray) -> np.ndarray:
+    """Element-wise first non-NaN value across the arrays (NaN if all are missing)."""
+    result = arrays[0].copy()
+    for fallback in arrays[1:]:
+        missing = np.isnan(result)
+        result[missing] = fallback[missing]
+    return result
+
+@dataclass
+class Valuation:
+    prices: np.ndarray        # Price each position was valued at (0 where unknown)
+    values: np.ndarray        # quantity * price
+    costs: np.ndarray         # quantity * avg_price
+    pnl: np.ndarray           # values - costs
+    profit_rates: np.ndarray  # Percent vs. avg_price, 0 where avg_price <= 0
+    weights: np.ndarray       # Share of total value, 0 when the total is 0
+    total_value: float
+    total_cost: float
+    total_pnl: float
+
+    @property
+    def total_profit_rate(self) -> float:
+        return self.total_pnl / self.total_cost * 100 if self.total_cost > 0 else 0.0
+
+
+def value_positions(quantities, avg_prices, prices) -> Valuation:
+    """
+    Values a whole portfolio in one vectorized pass. Inputs are equal-length arrays
+    (or anything to_array accepts); positions with a NaN price are valued at 0.
+    """
+    qty = quantities if isinstance(quantities, np.ndarray) else to_array(quantities)
+    avg = avg_prices if isinstance(avg_prices, np.ndarray) else to_array(avg_prices)
+    price = prices if isinstance(prices, np.ndarray) else to_array(prices)
+
+    qty = np.nan_to_num(qty)
+    avg = np.nan_to_num(avg)
+    price = np.nan_to_num(price)
+
+    values = qty * price
+    costs = qty * avg
+    pnl = values - costs
+    profit_rates = np.divide(price - avg, avg, out=np.zeros_like(price), where=avg > 0) * 100
+    total_value = float(values.sum())
+    weights = values / total_value if total_value else np.zeros_like(values)
+    total_cost = float(costs.sum())
+
+    return Valuation(
+        prices=price,
+        values=values,
+        costs=costs,
+        pnl=pnl,
+        profit_rates=profit_rates,
+        weights=weights,
+        total_value=total_value,
+        total_cost=total_cost,
+        total_pnl=total_value - total_cost,
+    )
+
+def value_items(items, prices: Optional[Iterable] = None) -> Valuation:
+    """
+    Values objects with quantity/avg_price/current_price attributes (ORM items or schemas).
+    `prices` overrides current_price where not None; anything still missing falls back to avg_price.
+    """
+    items = list(items)
+    avg = to_array(item.avg_price for item in items)
+    price = to_array(item.current_price for item in items)
+    if prices is not None:
+        price = coalesce(to_array(prices), price)
+    return value_positions(to_array(item.quantity for item in items), avg, coalesce(price, avg))
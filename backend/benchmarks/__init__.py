@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the LogMind backend.
+
+Run from the backend directory, e.g. ``python -m benchmarks.mail_throughput``.
+"""
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app import models
+from app.api.deps import get_current_principal, get_current_user
+from app.core import security
+from app.database import SessionLocal, engine
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me/db")
+    def me_db(user: models.User = Depends(get_current_user)):
+        return {"id": user.id}
+
+    @app.get("/me/cached")
+    def me_cached(principal=Depends(get_current_principal)):
+        return {"id": principal.id}
+
+    return app
+
+async def hammer(client: httpx.AsyncClient, path: str, token: str, total: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return total / (time.perf_counter() - start)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Requests/sec of an authenticated endpoint: per-request user query vs. cached principal.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    models.User.__table__.create(engine, checkfirst=True)
+    db = SessionLocal()
+    user = models.User(email=f"bench-{time.time_ns()}@logmind.ai", hashed_password="-")
+    db.add(user)
+    db.commit()
+    token = security.create_access_token(subject=user.email, user_id=user.id)
+    db.close()
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        db_rps = await hammer(client, "/me/db", token, args.requests, args.concurrency)
+        cached_rps = await hammer(client, "/me/cached", token, args.requests, args.concurrency)
+
+    print(f"Requests: {args.requests} | concurrency: {args.concurrency}")
+    print(f"  get_current_user (DB per request) : {db_rps:8.1f} req/s")
+    print(f"  get_current_principal (cached)    : {cached_rps:8.1f} req/s")
+    print(f"  speedup                           : {cached_rps / db_rps:8.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
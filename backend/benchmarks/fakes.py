@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.smtp_sink import SMTPSink
+
+EMBEDDING_DIM = 1536
+SECTORS = ["Technology", "Healthcare", "Financials", "Energy", "Consumer Cyclical", "Industrials"]
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+
+def fake_price(symbol: str) -> float:
+    return round(20 + _seed(symbol) % 48000 / 100, 2)
+
+def fake_embedding(text: str) -> List[float]:
+    """Deterministic unit-ish vector, so identical texts embed identically."""
+    rng = random.Random(_seed(text))
+    return [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIM)]
+
+def fake_fundamentals(symbol: str) -> Dict:
+    seed = _seed(symbol)
+    return {
+        "current_price": fake_price(symbol),
+        "market_cap": 10_000_000_000 + seed % 2_000_000_000_000,
+        "per": round(8 + seed % 4000 / 100, 2),
+        "pbr": round(0.5 + seed % 1500 / 100, 2),
+        "dividend_yield": round(seed % 500 / 10000, 4),
+        "roe": round(seed % 4000 / 10000, 4),
+        "revenue_growth": round((seed % 600 - 200) / 1000, 3),
+        "profit_margins": round(seed % 3500 / 10000, 4),
+        "sector": SECTORS[seed % len(SECTORS)],
+        "industry": "Benchmark Industry",
+        "trend": {},
+    }
+
+def fake_history(symbol: str, start: datetime) -> List[List]:
+    """Weekday closes from `start` to today: a seeded random walk ending near fake_price."""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    day = max(start, today - timedelta(days=3650))
+    days = []
+    while day <= today:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    rng = random.Random(_seed(symbol))
+    close, closes = fake_price(symbol), []
+    for day in reversed(days):
+        closes.append([day.isoformat(), round(close, 2)])
+        close /= 1 + rng.gauss(0.0004, 0.018)
+    return closes[::-1]
+
+def fake_rss(query: str, items: int = 8) -> str:
+    entries = "".join(
+        f"<item><title>{query} headline {i}</title><link>https://news.example.com/{_seed(query) % 10000}/{i}</link>"
+        f"<pubDate>{formatdate(time.time() - i * 3600)}</pubDate><source>Fake Wire</source></item>"
+        for i in range(items)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{query}</title>{entries}</channel></rss>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeUpstreams"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload, status: int = 200):
+        self._send(status, json.dumps(payload).encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        upstreams = self.server.upstreams
+        if parts[0] == "quote" and len(parts) == 2:
+            upstreams.hit("quote")
+            price = fake_price(parts[1])
+            return self._json({"price": price, "previous_close": round(price * 0.99, 2)})
+        if parts[0] == "fundamentals" and len(parts) == 2:
+            upstreams.hit("quote")
+            return self._json(fake_fundamentals(parts[1]))
+        if parts[0] == "history" and len(parts) == 2:
+            upstreams.hit("quote")
+            start = parse_qs(url.query).get("start", ["1970-01-01"])[0]
+            start = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+            return self._json({"closes": fake_history(parts[1], start)})
+        if url.path == "/rss/search":
+            upstreams.hit("news")
+            query = parse_qs(url.query).get("q", ["market"])[0]
+            return self._send(200, fake_rss(query).encode(), "application/rss+xml")
+        self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        upstreams = self.server.upstreams
+        if self.path.endswith("/embeddings"):
+            upstreams.hit("embedding")
+            inputs = body.get("input")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            return self._json({
+                "object": "list",
+                "model": body.get("model", "text-embedding-3-small"),
+                "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(str(text))}
+                         for i, text in enumerate(inputs)],
+                "usage": {"prompt_tokens": 8 * len(inputs), "total_tokens": 8 * len(inputs)},
+            })
+        if self.path.endswith("/chat/completions"):
+            upstreams.hit("llm")
+            return self._json(self._chat_completion(body))
+        self._json({"error": "not found"}, 404)
+
+    def _chat_completion(self, body: Dict) -> Dict:
+        messages = body.get("messages", [])
+        has_image = any(
+            isinstance(m.get("content"), list) and any(part.get("type") == "image_url" for part in m["content"])
+            for m in messages
+        )
+        if has_image:
+            symbols = ["AAPL", "MSFT", "NVDA", "005930.KS"]
+            content = json.dumps({
+                "items": [{"symbol": s, "name": s, "quantity": 10, "avg_price": fake_price(s) * 0.9,
+                           "current_price": fake_price(s), "sector": fake_fundamentals(s)["sector"]} for s in symbols],
+                "total_value": sum(fake_price(s) * 10 for s in symbols),
+                "risk_assessment": "Benchmark portfolio.",
+            })
+        elif (body.get("response_format") or {}).get("type") == "json_object":
+            try:
+                payload = json.loads(messages[-1]["content"])
+                holdings = payload.get("holdings", [])
+                entries = payload.get("entries", [])
+            except (ValueError, AttributeError, KeyError):
+                holdings, entries = [], []
+            if entries:
+                content = json.dumps({"scores": {str(e["id"]): round(fake_price(e.get("content", "")) % 2 - 1, 2)
+                                                 for e in entries}})
+            else:
+                content = json.dumps({"summaries": {
+                    h["symbol"]: f"{h['symbol']}는 최근 헤드라인 {len(h.get('headlines', []))}건 기준으로 중립적이에요."
+                    for h in holdings
+                }} if holdings else {}, ensure_ascii=False)
+        else:
+            content = "포트폴리오는 기술주 비중이 높아요. 분산을 늘리면 변동성을 줄일 수 있어요."
+        prompt_chars = sum(len(json.dumps(m.get("content"))) for m in messages)
+        return {
+            "id": f"chatcmpl-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_chars // 4 + len(content) // 4},
+        }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, upstreams: "FakeUpstreams"):
+        self.upstreams = upstreams
+        super().__init__(address, _Handler)
+
+
+class FakeUpstreams:
+    """
+    One local HTTP server standing in for Yahoo (quote/fundamentals/history JSON),
+    Google News (RSS) and OpenAI (chat, vision, embeddings), plus an SMTP sink.
+    Each upstream has its own simulated latency in seconds.
+    """
+
+    def __init__(self, quote_latency: float = 0.05, news_latency: float = 0.15, llm_latency: float = 0.8,
+                 embedding_latency: float = 0.1, smtp_latency: float = 0.002, host: str = "127.0.0.1"):
+        self.latency = {"quote": quote_latency, "news": news_latency, "llm": llm_latency, "embedding": embedding_latency}
+        self.calls = {name: 0 for name in self.latency}
+        self._lock = threading.Lock()
+        self._http = _Server((host, 0), self)
+        self.host = host
+        self.port = self._http.server_address[1]
+        self.smtp = SMTPSink(host=host, latency=smtp_latency)
+        self._smtp_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def hit(self, upstream: str):
+        with self._lock:
+            self.calls[upstream] += 1
+        time.sleep(self.latency[upstream])
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def app_env(self) -> Dict[str, str]:
+        """Environment variables pointing the backend at these fakes."""
+        return {
+            "MARKET_DATA_URL": self.base_url,
+            "NEWS_RSS_URL": f"{self.base_url}/rss/search",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "OPENAI_API_KEY": "sk-benchmark",
+            "MAIL_SERVER": self.smtp.host,
+            "MAIL_PORT": str(self.smtp.port),
+            "MAIL_STARTTLS": "false",
+            "MAIL_SSL_TLS": "false",
+            "USE_CREDENTIALS": "false",
+            "VALIDATE_CERTS": "false",
+        }
+
+    def start(self) -> "FakeUpstreams":
+        threading.Thread(target=self._http.serve_forever, name="fake-upstreams", daemon=True).start()
+        started = threading.Event()
+
+        def run_smtp():
+            self._smtp_loop = asyncio.new_event_loop()
+            self._smtp_loop.run_until_complete(self.smtp.start())
+            started.set()
+            self._smtp_loop.run_forever()
+
+        threading.Thread(target=run_smtp, name="fake-smtp", daemon=True).start()
+        started.wait(5)
+        return self
+
+    def stop(self):
+        self._http.shutdown()
+        if self._smtp_loop:
+            asyncio.run_coroutine_threadsafe(self.smtp.stop(), self._smtp_loop).result(5)
+            self._smtp_loop.call_soon_threadsafe(self._smtp_loop.stop)
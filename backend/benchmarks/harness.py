@@ -0,0 +1,99 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from benchmarks.fakes import FakeUpstreams, fake_embedding
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_SYMBOLS = ["AAPL", "MSFT", "NVDA", "GOOGL", "AMZN", "TSLA", "META", "005930.KS", "000660.KS", "035420.KQ",
+                 "JPM", "V", "XOM", "UNH", "KO", "PEP", "COST", "AVGO", "ORCL", "ADBE"]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def prepare_database(database_url: str, env: Dict[str, str], knowledge_docs: int = 200):
+    """
+    Brings the benchmark database to the current schema and seeds market knowledge.
+    SQLite (quick local runs) gets the non-vector tables only; RAG scenarios need Postgres.
+    """
+    if database_url.startswith("sqlite"):
+        code = ("from app.database import Base, engine\n"
+                "from app import models  # noqa: F401\n"
+                "for t in ('users', 'portfolios', 'portfolio_items', 'price_history'):\n"
+                "    Base.metadata.tables[t].create(engine, checkfirst=True)\n")
+        subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True)
+        return
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True)
+
+    from sqlalchemy import create_engine, text
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM market_knowledge WHERE source_url LIKE 'bench://%'")).scalar()
+        for i in range(existing, knowledge_docs):
+            symbol = BENCH_SYMBOLS[i % len(BENCH_SYMBOLS)]
+            content = (f"{symbol} quarterly update {i}: revenue grew, margins held and management guided "
+                       f"for steady demand. Analysts watch valuation and rate sensitivity. ") * 4
+            conn.execute(
+                text("INSERT INTO market_knowledge (symbol, content, embedding, source_url) "
+                     "VALUES (:symbol, :content, :embedding, :url)"),
+                {"symbol": symbol, "content": content, "embedding": str(fake_embedding(content)),
+                 "url": f"bench://{symbol}/{i}"},
+            )
+    engine.dispose()
+
+
+class BenchmarkApp:
+    """
+    Runs the backend under uvicorn in a subprocess, wired to FakeUpstreams.
+    """
+
+    def __init__(self, database_url: str, upstreams: FakeUpstreams, workers: int = 1,
+                 extra_env: Optional[Dict[str, str]] = None):
+        self.port = free_port()
+        self.workers = workers
+        # Quote caching off by default so results do not depend on the wall-clock market session;
+        # upstream rate limits off, since the fakes are local and load is the point
+        self.env = {**os.environ, **upstreams.app_env(), "DATABASE_URL": database_url,
+                    "QUOTE_MARKET_HOURS": "false", "QUOTE_TTL_OPEN_SECONDS": "0",
+                    "MARKET_DATA_RATE_PER_SECOND": "0", "NEWS_RATE_PER_SECOND": "0",
+                    "JOURNAL_SCORER_ENABLED": "false", **(extra_env or {})}
+        self.proc: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 30.0) -> "BenchmarkApp":
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=self.env,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.05)
+        self.stop()
+        raise TimeoutError("benchmark app did not start")
+
+    def seed_portfolio(self, holdings: int):
+        items = [{"symbol": BENCH_SYMBOLS[i % len(BENCH_SYMBOLS)] + ("" if i < len(BENCH_SYMBOLS) else f".{i}"),
+                  "name": f"Holding {i}", "quantity": 5 + i, "avg_price": 100.0}
+                 for i in range(holdings)]
+        httpx.post(f"{self.base_url}/portfolio/", json={"name": "Benchmark", "items": items}, timeout=60).raise_for_status()
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait(10)
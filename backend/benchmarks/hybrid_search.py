@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import math
+import random
+import re
+import time
+
+from sqlalchemy import delete
+
+from app import models, rag
+from app.database import SessionLocal
+from benchmarks.fakes import EMBEDDING_DIM
+from benchmarks.stats import percentile
+
+FIXTURE_PREFIX = "fixture://hybrid/"
+
+COMPANIES = [
+    ("005930.KS", "삼성전자", "Samsung Electronics"),
+    ("000660.KS", "SK하이닉스", "SK hynix"),
+    ("035420.KQ", "네이버", "NAVER"),
+    ("005380.KS", "현대차", "Hyundai Motor"),
+    ("AAPL", "애플", "Apple"),
+    ("NVDA", "엔비디아", "NVIDIA"),
+    ("TSLA", "테슬라", "Tesla"),
+    ("MSFT", "마이크로소프트", "Microsoft"),
+]
+METRICS = ["매출", "영업이익", "순이익", "HBM 출하량", "배당금"]
+FILLER = [
+    "시장 전반은 금리 경로와 환율 변동에 민감하게 움직였다.",
+    "Analysts expect demand to stay firm while valuation remains stretched.",
+    "기관 투자자의 순매수가 이어지며 업종 지수가 강세를 보였다.",
+    "Management reiterated its capital return policy on the earnings call.",
+    "반도체와 인터넷 업종의 실적 전망이 엇갈리고 있다.",
+]
+WORD = re.compile(r"\w+")
+
+def bow_embedding(text: str):
+    """
+    Offline stand-in for text-embedding-3-small: hashed bag of words, L2-normalized.
+    It shares words rather than meaning, so use --openai for relevance numbers that matter.
+    """
+    vector = [0.0] * EMBEDDING_DIM
+    for word in WORD.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def make_corpus(distractors: int, seed: int = 11):
+    """
+    (docs, queries): one fact doc per company/quarter/metric with a distinct figure,
+    plus filler-only distractors. Each query names exactly one fact doc, by Korean
+    name (written with a particle in the doc), ticker, or exact figure.
+    """
+    rng = random.Random(seed)
+    docs, queries = [], []
+    for symbol, name, english in COMPANIES:
+        for quarter in range(1, 5):
+            for metric in METRICS:
+                figure = f"{rng.randint(1, 99)}.{rng.randint(0, 9)}"
+                url = f"{FIXTURE_PREFIX}{symbol}/{quarter}/{metric}"
+                content = (f"{name}의 2026년 {quarter}분기 {metric}은 {figure}조원으로 집계됐다 ({symbol}, {english}). "
+                           + " ".join(rng.sample(FILLER, 3)))
+                docs.append((symbol, content, url))
+                kind = rng.choice(["name", "ticker", "figure"])
+                if kind == "name":
+                    query = f"{name} {quarter}분기 {metric}"
+                elif kind == "ticker":
+                    query = f"{symbol} {quarter}분기 {metric} 실적"
+                else:
+                    query = f"{metric} {figure}조원 기록한 회사"
+                queries.append((kind, query, url))
+    for i in range(distractors):
+        symbol = rng.choice(COMPANIES)[0]
+        docs.append((symbol, " ".join(rng.sample(FILLER, 4)), f"{FIXTURE_PREFIX}filler/{i}"))
+    return docs, queries
+
+def seed(db, docs, embed):
+    db.execute(delete(models.MarketKnowledge).where(models.MarketKnowledge.source_url.like(f"{FIXTURE_PREFIX}%")))
+    db.add_all([
+        models.MarketKnowledge(symbol=symbol, content=content, embedding=embed(content), source_url=url)
+        for symbol, content, url in docs
+    ])
+    db.commit()
+
+def evaluate(db, statement_for, queries, embeddings, top_k: int):
+    """Rank of the relevant doc per query (None if not retrieved), and latency samples (ms)."""
+    ranks, samples = [], []
+    for (_, query, relevant), embedding in zip(queries, embeddings):
+        start = time.perf_counter()
+        urls = [doc.source_url for doc in db.scalars(statement_for(query, embedding, top_k)).all()]
+        samples.append((time.perf_counter() - start) * 1000)
+        ranks.append(urls.index(relevant) + 1 if relevant in urls else None)
+    return ranks, samples
+
+def recall(ranks) -> float:
+    return sum(rank is not None for rank in ranks) / len(ranks) if ranks else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vector-only vs. hybrid (full-text/trigram + vector, RRF) retrieval on a fixture corpus. "
+                    "Uses DATABASE_URL: Postgres with pgvector and pg_trgm, migrated to head.")
+    parser.add_argument("--distractors", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--openai", action="store_true", help="Embed with the real embedding model (needs OPENAI_API_KEY)")
+    parser.add_argument("--keep", action="store_true", help="Leave the fixture rows in market_knowledge")
+    args = parser.parse_args()
+
+    embed = rag.get_embedding if args.openai else bow_embedding
+    docs, queries = make_corpus(args.distractors)
+    db = SessionLocal()
+    try:
+        seed(db, docs, embed)
+        embeddings = [embed(query) for _, query, _ in queries]
+        methods = {
+            "vector": lambda query, embedding, top_k: rag.vector_search_statement(embedding, top_k),
+            "hybrid": rag.hybrid_search_statement,
+        }
+        print(f"{len(docs)} docs ({args.distractors} distractors), {len(queries)} queries, top_k={args.top_k}, "
+              f"{'openai' if args.openai else 'bag-of-words'} embeddings")
+        print(f"{'method':<7} | {'recall@k':>8} | {'MRR':>5} | {'p50 ms':>7} | {'p95 ms':>7} | "
+              f"recall by query kind (name / ticker / figure)")
+        for name, statement_for in methods.items():
+            evaluate(db, statement_for, queries[:5], embeddings[:5], args.top_k) # Warm caches and plans
+            ranks, samples = evaluate(db, statement_for, queries, embeddings, args.top_k)
+            mrr = sum(1.0 / rank for rank in ranks if rank) / len(ranks)
+            by_kind = [f"{recall([r for r, q in zip(ranks, queries) if q[0] == kind]):.2f}"
+                       for kind in ("name", "ticker", "figure")]
+            print(f"{name:<7} | {recall(ranks):>8.2f} | {mrr:>5.2f} | {percentile(samples, 50):>7.2f} | "
+                  f"{percentile(samples, 95):>7.2f} | {' / '.join(by_kind)}")
+    finally:
+        if not args.keep:
+            db.rollback()
+            db.execute(delete(models.MarketKnowledge).where(models.MarketKnowledge.source_url.like(f"{FIXTURE_PREFIX}%")))
+            db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
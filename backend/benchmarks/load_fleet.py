@@ -0,0 +1,198 @@
+"""
+Load profile of the real deployment: many dashboard tabs polling /portfolio/prices
+every few seconds, a few users downloading reports and asking the RAG assistant.
+Dashboards ramp up step by step until the app saturates.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fakes import FakeUpstreams
+from benchmarks.harness import BenchmarkApp, prepare_database
+from benchmarks.stats import percentile
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Flat {'name{labels}': value} view of the Prometheus text format."""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, _, value = line.rpartition(" ")
+            try:
+                values[key] = float(value)
+            except ValueError:
+                pass
+    return values
+
+
+class Step:
+    def __init__(self, dashboards: int):
+        self.dashboards = dashboards
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.max_threadpool_waiting = 0.0
+        self.max_threadpool_busy = 0.0
+        self.max_db_checked_out = 0.0
+        self.db_wait_sum = 0.0
+        self.db_wait_count = 0.0
+
+    def record(self, kind: str, elapsed: float, ok: bool):
+        if ok:
+            self.latencies[kind].append(elapsed)
+        else:
+            self.errors[kind] += 1
+
+
+async def virtual_user(client: httpx.AsyncClient, kind: str, method: str, path: str, body, interval: float,
+                       step_ref: List[Step], stop: asyncio.Event):
+    # Spread first requests over one interval, like tabs opened at different times
+    await asyncio.sleep(random.uniform(0, interval))
+    while not stop.is_set():
+        step = step_ref[0]
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - started
+        step.record(kind, elapsed, ok)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0.0, interval - elapsed))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def sample_server(client: httpx.AsyncClient, step_ref: List[Step], stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            values = parse_metrics((await client.get("/metrics")).text)
+        except httpx.HTTPError:
+            values = {}
+        step = step_ref[0]
+        step.max_threadpool_waiting = max(step.max_threadpool_waiting, values.get("threadpool_waiting_tasks", 0))
+        step.max_threadpool_busy = max(step.max_threadpool_busy, values.get("threadpool_busy_threads", 0))
+        step.max_db_checked_out = max(step.max_db_checked_out, values.get('db_pool_checked_out{engine="sync"}', 0))
+        step.db_wait_sum = values.get('db_pool_checkout_wait_seconds_sum{engine="sync"}', step.db_wait_sum)
+        step.db_wait_count = values.get('db_pool_checkout_wait_seconds_count{engine="sync"}', step.db_wait_count)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_fleet(args, base_url: str) -> List[Dict]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        stop = asyncio.Event()
+        step_ref = [Step(0)]
+        tasks = [asyncio.create_task(sample_server(client, step_ref, stop))]
+        for _ in range(args.reporters):
+            tasks.append(asyncio.create_task(virtual_user(
+                client, "report", "POST", "/portfolio/report/download", None, args.report_interval, step_ref, stop)))
+        for _ in range(args.askers):
+            tasks.append(asyncio.create_task(virtual_user(
+                client, "rag", "POST", "/rag/query", {"query": "내 포트폴리오 리스크는?"}, args.ask_interval, step_ref, stop)))
+
+        rows = []
+        prev_wait_sum = prev_wait_count = 0.0
+        dashboards = 0
+        for target in args.ramp:
+            step = Step(target)
+            step.db_wait_sum, step.db_wait_count = prev_wait_sum, prev_wait_count
+            step_ref[0] = step
+            for _ in range(target - dashboards):
+                tasks.append(asyncio.create_task(virtual_user(
+                    client, "prices", "GET", "/portfolio/prices", None, args.poll_interval, step_ref, stop)))
+            dashboards = target
+            await asyncio.sleep(args.step_seconds)
+
+            prices = step.latencies["prices"]
+            offered = target / args.poll_interval
+            achieved = len(prices) / args.step_seconds
+            total = len(prices) + step.errors["prices"]
+            waits = step.db_wait_count - prev_wait_count
+            rows.append({
+                "dashboards": target,
+                "offered_rps": round(offered, 1),
+                "achieved_rps": round(achieved, 1),
+                "p50_ms": round(percentile(prices, 50) * 1000, 1),
+                "p95_ms": round(percentile(prices, 95) * 1000, 1),
+                "error_rate": round(step.errors["prices"] / total, 3) if total else 0.0,
+                "report_p95_ms": round(percentile(step.latencies["report"], 95) * 1000, 1),
+                "rag_p95_ms": round(percentile(step.latencies["rag"], 95) * 1000, 1),
+                "threadpool_busy_max": step.max_threadpool_busy,
+                "threadpool_waiting_max": step.max_threadpool_waiting,
+                "db_checked_out_max": step.max_db_checked_out,
+                "db_wait_avg_ms": round((step.db_wait_sum - prev_wait_sum) / waits * 1000, 2) if waits else 0.0,
+            })
+            prev_wait_sum, prev_wait_count = step.db_wait_sum, step.db_wait_count
+
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return rows
+
+
+def saturated(row: Dict, slo_p95_ms: float) -> bool:
+    return (row["p95_ms"] > slo_p95_ms
+            or row["achieved_rps"] < 0.9 * row["offered_rps"]
+            or row["error_rate"] > 0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard polling fleet load test against local fake upstreams.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--ramp", type=int, nargs="+", default=[10, 25, 50, 100, 200],
+                        help="Virtual dashboards per step")
+    parser.add_argument("--step-seconds", type=float, default=30)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--reporters", type=int, default=2)
+    parser.add_argument("--report-interval", type=float, default=30.0)
+    parser.add_argument("--askers", type=int, default=2)
+    parser.add_argument("--ask-interval", type=float, default=15.0)
+    parser.add_argument("--holdings", type=int, default=10)
+    parser.add_argument("--quote-latency", type=float, default=0.05)
+    parser.add_argument("--slo-p95-ms", type=float, default=1500)
+    parser.add_argument("--min-dashboards", type=int, default=0,
+                        help="Fail if the app saturates below this many dashboards")
+    args = parser.parse_args()
+    if not args.database_url.startswith("postgresql"):
+        print("note: RAG askers disabled (needs Postgres with pgvector)")
+        args.askers = 0
+
+    upstreams = FakeUpstreams(quote_latency=args.quote_latency).start()
+    app = BenchmarkApp(args.database_url, upstreams)
+    try:
+        prepare_database(args.database_url, app.env)
+        app.start()
+        app.seed_portfolio(args.holdings)
+        rows = asyncio.run(run_fleet(args, app.base_url))
+    finally:
+        app.stop()
+        upstreams.stop()
+
+    columns = list(rows[0].keys())
+    print(" | ".join(columns))
+    saturation = None
+    for row in rows:
+        flag = saturated(row, args.slo_p95_ms)
+        if flag and saturation is None:
+            saturation = row["dashboards"]
+        print(" | ".join(str(row[c]) for c in columns) + ("  <- saturated" if flag else ""))
+    print(f"upstream calls: {upstreams.calls}")
+    if saturation is None:
+        print(f"no saturation up to {rows[-1]['dashboards']} dashboards")
+    else:
+        print(f"saturation point: {saturation} dashboards")
+        if saturation < args.min_dashboards:
+            print(f"FAIL: saturated below --min-dashboards={args.min_dashboards}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
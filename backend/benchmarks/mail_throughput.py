@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+
+from app.services.mailer import EmailService, EmailSettings, MailQueue
+from benchmarks.smtp_sink import SMTPSink
+
+PDF_STUB = b"%PDF-1.4\n" + b"0" * 50_000  # ~50KB attachment, roughly a one-page report
+
+def sink_settings(sink: SMTPSink, **overrides) -> EmailSettings:
+    return EmailSettings(
+        MAIL_SERVER=sink.host, MAIL_PORT=sink.port,
+        MAIL_STARTTLS=False, MAIL_SSL_TLS=False, USE_CREDENTIALS=False, VALIDATE_CERTS=False,
+        **overrides,
+    )
+
+async def per_message_connection(sink: SMTPSink, count: int) -> float:
+    """Previous behaviour: one SMTP session per report."""
+    settings = sink_settings(sink)
+    start = time.perf_counter()
+    for i in range(count):
+        message = EmailService.build_report_message(f"user{i}@example.com", PDF_STUB, settings=settings)
+        await aiosmtplib.send(message, hostname=sink.host, port=sink.port, start_tls=False)
+    return time.perf_counter() - start
+
+async def pooled_queue(sink: SMTPSink, count: int, pool_size: int, batch_size: int) -> float:
+    settings = sink_settings(sink, MAIL_POOL_SIZE=pool_size, MAIL_BATCH_SIZE=batch_size)
+    queue = MailQueue(settings)
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        queue.send(EmailService.build_report_message(f"user{i}@example.com", PDF_STUB, settings=settings))
+        for i in range(count)
+    ])
+    elapsed = time.perf_counter() - start
+    await queue.close()
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure report email delivery throughput against a local SMTP sink.")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated SMTP server latency per command (s)")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    sink = await SMTPSink(latency=args.latency).start()
+    try:
+        naive = await per_message_connection(sink, args.messages)
+        naive_conns = sink.connections
+        pooled = await pooled_queue(sink, args.messages, args.pool_size, args.batch_size)
+        pooled_conns = sink.connections - naive_conns
+    finally:
+        await sink.stop()
+
+    print(f"Messages: {args.messages} | sink latency: {args.latency * 1000:.1f}ms/command")
+    print(f"  per-message connection : {args.messages / naive:8.1f} msg/s ({naive_conns} sessions)")
+    print(f"  pooled + batched queue : {args.messages / pooled:8.1f} msg/s ({pooled_conns} sessions)")
+    print(f"  speedup                : {naive / pooled:8.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
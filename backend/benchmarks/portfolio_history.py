@@ -0,0 +1,107 @@
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import portfolio_repository
+
+TABLES = ["users", "portfolios", "portfolio_items"]
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "META", "AMZN", "GOOGL", "005930.KS", "000660.KS", "035420.KQ"]
+
+def seed(db, user_id: str, days: int, saves_per_day: int, now: datetime):
+    """`saves_per_day` snapshots of a 10-holding portfolio for each of the last `days` days."""
+    for day in range(days, 0, -1):
+        for save in range(saves_per_day):
+            created_at = now - timedelta(days=day) + timedelta(minutes=10 * save)
+            portfolio_id = db.execute(
+                insert(models.Portfolio)
+                .values(user_id=user_id, name="Bench", total_value=10000 + day, created_at=created_at)
+                .returning(models.Portfolio.id)
+            ).scalar_one()
+            db.execute(insert(models.PortfolioItem), [
+                {"portfolio_id": portfolio_id, "symbol": symbol, "quantity": 10 + (day + i) % 7, "avg_price": 100.0 + i}
+                for i, symbol in enumerate(SYMBOLS)
+            ])
+    db.commit()
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def offset_page(db, user_id: str, page: int, limit: int):
+    """The OFFSET pagination keyset pages replace: cost grows with the page number."""
+    return db.scalars(
+        select(models.Portfolio)
+        .where(models.Portfolio.user_id == user_id)
+        .order_by(models.Portfolio.created_at.desc(), models.Portfolio.id.desc())
+        .offset(page * limit)
+        .limit(limit)
+    ).all()
+
+def keyset_page(db, user_id: str, page: int, limit: int):
+    """Walks to `page` through cursors, timing only the last request."""
+    cursor = None
+    for _ in range(page):
+        _, cursor = portfolio_repository.list_history(db, user_id, limit, cursor)
+    return cursor
+
+def diff_in_python(db, user_id: str, from_id: int, to_id: int):
+    """Loading both snapshots with their items and diffing client-side."""
+    before = {item.symbol: item.quantity for item in portfolio_repository.get_portfolio(db, user_id, from_id).items}
+    after = {item.symbol: item.quantity for item in portfolio_repository.get_portfolio(db, user_id, to_id).items}
+    return {symbol: (before.get(symbol), after.get(symbol)) for symbol in before.keys() | after.keys()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio history paging, diff and compaction (uses DATABASE_URL).")
+    parser.add_argument("--days", type=int, default=400)
+    parser.add_argument("--saves-per-day", type=int, default=6)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name in TABLES:
+        Base.metadata.tables[name].create(engine, checkfirst=True)
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    user = models.User(email=f"bench-{time.time_ns()}@logmind.ai", hashed_password="-")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    seed(db, user_id, args.days, args.saves_per_day, now)
+    count = lambda: db.scalar(select(func.count()).where(models.Portfolio.user_id == user_id))
+
+    snapshots = count()
+    deep = snapshots // args.limit - 1
+    cursor = keyset_page(db, user_id, deep, args.limit)
+    print(f"{snapshots} snapshots, page {deep} of {args.limit}")
+    print(f"{'':<24} | {'ms':>8}")
+    print(f"{'OFFSET page':<24} | {median_ms(lambda: offset_page(db, user_id, deep, args.limit), args.repeat):>8.2f}")
+    print(f"{'keyset page':<24} | "
+          f"{median_ms(lambda: portfolio_repository.list_history(db, user_id, args.limit, cursor), args.repeat):>8.2f}")
+
+    newest = portfolio_repository.list_history(db, user_id, 2)[0]
+    to_id, from_id = newest[0].id, newest[1].id
+    print(f"{'diff, two loads':<24} | {median_ms(lambda: diff_in_python(db, user_id, from_id, to_id), args.repeat):>8.2f}")
+    print(f"{'diff, one query':<24} | "
+          f"{median_ms(lambda: portfolio_repository.diff_portfolios(db, user_id, from_id, to_id), args.repeat):>8.2f}")
+    db.expunge_all()
+
+    latest = lambda: portfolio_repository.get_latest_portfolio(db, user_id)
+    before_ms = median_ms(latest, args.repeat)
+    start = time.perf_counter()
+    deleted = portfolio_repository.compact_history(db, 30, 365, 1000, now=now)
+    compact_ms = (time.perf_counter() - start) * 1000
+    print(f"\ncompaction removed {deleted} of {snapshots} snapshots in {compact_ms:.0f} ms, {count()} left")
+    print(f"latest portfolio: {before_ms:.2f} ms before, {median_ms(latest, args.repeat):.2f} ms after")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import sys
+import time
+from typing import Dict, Iterator, List
+
+from sqlalchemy import func, insert, select, text
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import portfolio_repository
+
+TABLES = ["users", "portfolios", "portfolio_items"]
+EMAIL_PREFIX = "plan-bench-"
+
+def seed(db, users: int, saves: int, items: int):
+    """`users` users with `saves` portfolios of `items` holdings each, unless already seeded."""
+    existing = db.scalar(select(func.count()).where(models.User.email.like(f"{EMAIL_PREFIX}%")))
+    for u in range(existing, users):
+        user = models.User(email=f"{EMAIL_PREFIX}{u}@logmind.ai", hashed_password="-")
+        db.add(user)
+        db.flush()
+        for _ in range(saves):
+            portfolio_id = db.execute(
+                insert(models.Portfolio).values(user_id=user.id, name="Plan", total_value=0)
+                .returning(models.Portfolio.id)
+            ).scalar_one()
+            db.execute(insert(models.PortfolioItem), [
+                {"portfolio_id": portfolio_id, "symbol": f"SYM{i}", "quantity": 1, "avg_price": 100.0}
+                for i in range(items)
+            ])
+    db.commit()
+    with engine.begin() as conn:
+        for name in TABLES:
+            conn.execute(text(f"ANALYZE {name}"))
+
+def plan_nodes(node: Dict) -> Iterator[Dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+def check_latest_portfolio(db, user_id: str) -> List[str]:
+    """
+    EXPLAINs latest_portfolio_stmt as the app runs it and returns the problems found:
+    it must read both tables through their indexes, with no Seq Scan and no Sort.
+    """
+    sql = str(portfolio_repository.latest_portfolio_stmt(user_id).compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    ))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()[0]["Plan"]
+    nodes = list(plan_nodes(plan))
+    indexes = {node.get("Index Name") for node in nodes}
+    problems = [node["Node Type"] + (f" on {node['Relation Name']}" if "Relation Name" in node else "")
+                for node in nodes if node["Node Type"] in ("Seq Scan", "Sort")]
+    for index in ("ix_portfolios_user_id_created_at_id", "ix_portfolio_items_portfolio_id"):
+        if index not in indexes:
+            problems.append(f"{index} not used")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN checks of the hot portfolio queries (needs a PostgreSQL DATABASE_URL); exits 1 on a bad plan."
+    )
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--saves", type=int, default=5)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("query_plans needs a PostgreSQL DATABASE_URL")
+    for name in TABLES:
+        Base.metadata.tables[name].create(engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        seed(db, args.users, args.saves, args.items)
+        print(f"seeded in {time.perf_counter() - start:.1f}s")
+        user_id = db.scalar(select(models.User.id).where(models.User.email == f"{EMAIL_PREFIX}0@logmind.ai"))
+        problems = check_latest_portfolio(db, user_id)
+    finally:
+        db.close()
+
+    print(f"{'latest_portfolio_stmt':<24} | {'ok' if not problems else '; '.join(problems)}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.core.cache import InMemoryBackend
+from app.services import exchange_calendar
+from app.services.market_data import Quote, QuoteCache
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "005930.KS", "000660.KS", "035420.KQ"]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulated week of dashboard polling: upstream quote calls with the market-hours-aware cache.")
+    parser.add_argument("--start", default="2026-10-12T00:00:00+00:00", help="Simulation start (a Monday, UTC)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--open-ttl", type=float, default=3.0)
+    args = parser.parse_args()
+
+    now = datetime.fromisoformat(args.start)
+    end = now + timedelta(days=args.days)
+    step = timedelta(seconds=args.poll_interval)
+    cache = QuoteCache(open_ttl=args.open_ttl, clock=lambda: now, backend=InMemoryBackend())
+    calls = Counter()
+
+    def fetch(symbol: str) -> Quote:
+        exchange = exchange_calendar.exchange_for(symbol)
+        calls[(symbol, "open" if exchange and exchange.is_open(now) else "closed")] += 1
+        return Quote(symbol, 100.0, 99.0)
+
+    polls = 0
+    while now < end:
+        for symbol in SYMBOLS:
+            cache.get(symbol, fetch)
+        polls += 1
+        now += step
+
+    print(f"{args.days} days, one dashboard polling {len(SYMBOLS)} symbols every {args.poll_interval:g}s "
+          f"({polls} polls, {polls * len(SYMBOLS)} lookups)")
+    print(f"{'symbol':<10} | {'uncached':>9} | {'open calls':>10} | {'off-hours calls':>15}")
+    for symbol in SYMBOLS:
+        print(f"{symbol:<10} | {polls:>9} | {calls[(symbol, 'open')]:>10} | {calls[(symbol, 'closed')]:>15}")
+    total = sum(calls.values())
+    off_hours = sum(n for (_, state), n in calls.items() if state == "closed")
+    print(f"total upstream calls: {total} of {polls * len(SYMBOLS)} lookups "
+          f"({total / (polls * len(SYMBOLS)) * 100:.1f}%), off-hours: {off_hours}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.core.tokens import count_tokens
+from app.services.context_builder import build_context
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "005930.KS"]
+
+SENTENCES = [
+    "{symbol} reported revenue growth of {n}% year over year, ahead of consensus.",
+    "Gross margin held near {n}% as component costs eased.",
+    "Management guided for steady demand and flagged currency headwinds.",
+    "Analysts raised price targets but warned about valuation after the rally.",
+    "The company announced a buyback of {n} billion dollars over two years.",
+    "Rate sensitivity remains the main risk for the sector according to strategists.",
+    "Inventory levels normalized and channel checks point to firm orders.",
+    "Regulators opened a review of the {symbol} app store fee structure.",
+]
+
+def make_docs(n: int, sentences_per_doc: int, duplicate_rate: float, seed: int = 7):
+    """
+    Retrieved-doc fixture shaped like crawled news: long articles, and a share of
+    docs that syndicate (re-publish) an earlier article under another URL.
+    """
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        if docs and rng.random() < duplicate_rate:
+            original = rng.choice(docs)
+            docs.append(SimpleNamespace(source_url=f"bench://syndicated/{i}", content=original.content))
+            continue
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        content = " ".join(rng.choice(SENTENCES).format(symbol=symbol, n=rng.randint(2, 60))
+                           for _ in range(sentences_per_doc))
+        docs.append(SimpleNamespace(source_url=f"bench://{symbol}/{i}", content=content))
+    return docs
+
+def naive_context(docs) -> str:
+    """Previous generate_answer: every retrieved doc concatenated in full."""
+    return "\n\n".join(f"Source: {doc.source_url or 'Unknown'}\nContent: {doc.content}" for doc in docs)
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG prompt context size and assembly time: full concatenation vs. budgeted builder.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 6, 12])
+    parser.add_argument("--sentences", type=int, default=40, help="Sentences per retrieved doc")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--passage-tokens", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    query = "How exposed is NVDA to valuation and rate risk after the rally?"
+    print(f"budget {args.budget} tokens, {args.passage_tokens}-token passages, "
+          f"{args.sentences} sentences/doc, {args.duplicate_rate:.0%} syndicated")
+    print(f"{'top_k':>5} | {'naive tokens':>12} | {'built tokens':>12} | {'passages':>8} | "
+          f"{'dupes':>5} | {'dropped':>7} | {'build ms':>8}")
+    for top_k in args.top_k:
+        docs = make_docs(top_k, args.sentences, args.duplicate_rate)
+        naive_tokens = count_tokens(naive_context(docs))
+        samples, bundle = [], None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            bundle = build_context(query, docs, args.budget, args.passage_tokens)
+            samples.append(time.perf_counter() - start)
+        print(f"{top_k:>5} | {naive_tokens:>12} | {bundle.tokens:>12} | {bundle.passages_used:>8} | "
+              f"{bundle.duplicates_removed:>5} | {bundle.passages_dropped:>7} | "
+              f"{statistics.median(samples) * 1000:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fakes import FakeUpstreams
+from benchmarks.harness import BenchmarkApp, prepare_database
+from benchmarks.stats import summarize
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    body: Optional[Dict] = None
+    # Relative request volume; slow scenarios run fewer requests
+    weight: float = 1.0
+    needs_postgres: bool = False
+    headers: Dict[str, str] = field(default_factory=dict)
+
+SCREENSHOT_B64 = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048).decode()
+
+SCENARIOS = [
+    Scenario("prices", "GET", "/portfolio/prices"),
+    Scenario("portfolio", "GET", "/portfolio/"),
+    Scenario("rag_query", "POST", "/rag/query", {"query": "NVDA 실적 전망과 밸류에이션은 어떤가요?"}, 0.25, needs_postgres=True),
+    Scenario("analyze", "POST", "/portfolio/analyze", {"image_base64": SCREENSHOT_B64}, 0.25),
+    Scenario("report_download", "POST", "/portfolio/report/download", None, 0.1),
+]
+
+def run_scenario(base_url: str, scenario: Scenario, total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            for _ in counter:
+                start = time.perf_counter()
+                try:
+                    response = client.request(scenario.method, scenario.path, json=scenario.body, headers=scenario.headers)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed by more than `tolerance` (fraction)."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+def print_table(results: Dict[str, Dict], baseline: Dict[str, Dict]):
+    print(f"{'scenario':<16} {'reqs':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}  vs baseline p95")
+    for name, r in results.items():
+        base = baseline.get(name)
+        delta = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%" if base and base["p95_ms"] else "-"
+        print(f"{name:<16} {r['requests']:>5} {r['errors']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['throughput_rps']:>8.1f}  {delta}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline endpoint benchmarks against local fake upstreams.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"),
+                        help="Postgres+pgvector for all scenarios; SQLite skips rag_query")
+    parser.add_argument("--scenarios", nargs="+", default=[s.name for s in SCENARIOS])
+    parser.add_argument("--requests", type=int, default=200, help="Requests for a weight-1.0 scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--holdings", type=int, default=10)
+    parser.add_argument("--quote-latency", type=float, default=0.05)
+    parser.add_argument("--news-latency", type=float, default=0.15)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--embedding-latency", type=float, default=0.1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression vs. baseline (fraction)")
+    args = parser.parse_args()
+
+    upstreams = FakeUpstreams(args.quote_latency, args.news_latency, args.llm_latency, args.embedding_latency).start()
+    app = BenchmarkApp(args.database_url, upstreams)
+    is_postgres = args.database_url.startswith("postgresql")
+    results: Dict[str, Dict] = {}
+    try:
+        prepare_database(args.database_url, app.env)
+        app.start()
+        app.seed_portfolio(args.holdings)
+        for scenario in SCENARIOS:
+            if scenario.name not in args.scenarios:
+                continue
+            if scenario.needs_postgres and not is_postgres:
+                print(f"skipping {scenario.name}: needs Postgres with pgvector")
+                continue
+            total = max(5, int(args.requests * scenario.weight))
+            results[scenario.name] = run_scenario(app.base_url, scenario, total, args.concurrency)
+    finally:
+        app.stop()
+        upstreams.stop()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    print_table(results, baseline)
+    print(f"upstream calls: {upstreams.calls}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline")},
+                       "results": results}, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import statistics
+import time
+
+from app import models, schemas
+from app.database import Base, SessionLocal, engine
+from app.services import portfolio_repository
+
+TABLES = ["users", "portfolios", "portfolio_items"]
+
+def make_items(n: int):
+    return [
+        schemas.PortfolioItemBase(symbol=f"SYM{i}", name=f"Company {i}", quantity=10 + i, avg_price=100.0,
+                                  current_price=101.5, sector="Technology")
+        for i in range(n)
+    ]
+
+def save_per_row(db, user_id: str, items):
+    """Previous save_portfolio: commit, refresh, one add() per item, commit again."""
+    db_portfolio = models.Portfolio(name="Bench", total_value=0, user_id=user_id)
+    db.add(db_portfolio)
+    db.commit()
+    db.refresh(db_portfolio)
+    total_val = 0
+    for item in items:
+        db.add(models.PortfolioItem(
+            portfolio_id=db_portfolio.id, symbol=item.symbol, name=item.name, quantity=item.quantity,
+            avg_price=item.avg_price, current_price=item.current_price, sector=item.sector
+        ))
+        total_val += item.quantity * (item.current_price or item.avg_price)
+    db_portfolio.total_value = total_val
+    db.commit()
+
+def save_bulk(db, user_id: str, items):
+    portfolio_repository.create_portfolio(db, user_id, "Bench", items)
+    db.commit()
+
+def measure(fn, user_id: str, items, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            fn(db, user_id, items)
+            samples.append(time.perf_counter() - start)
+        finally:
+            db.close()
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Median save_portfolio latency, per-row vs. bulk insert (uses DATABASE_URL).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name in TABLES:
+        Base.metadata.tables[name].create(engine, checkfirst=True)
+    db = SessionLocal()
+    user = models.User(email=f"bench-{time.time_ns()}@logmind.ai", hashed_password="-")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    print(f"{'items':>6} | {'per-row (ms)':>12} | {'bulk (ms)':>10} | speedup")
+    for size in args.sizes:
+        items = make_items(size)
+        old = measure(save_per_row, user_id, items, args.repeat)
+        new = measure(save_bulk, user_id, items, args.repeat)
+        print(f"{size:>6} | {old:>12.2f} | {new:>10.2f} | {old / new:.2f}x")
+
+if __name__ == "__main__":
+    main()
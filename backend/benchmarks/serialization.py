@@ -0,0 +1,83 @@
+import argparse
+import gzip
+import math
+import statistics
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.core.compression import brotli
+from app.core.responses import FastJSONResponse
+from app.services import valuation
+
+RESPONSE_ADAPTER = TypeAdapter(schemas.PortfolioAnalysisResponse)
+
+def make_items(n: int):
+    """ORM-like portfolio items with Decimal columns, as loaded from Postgres."""
+    return [
+        SimpleNamespace(symbol=f"SYM{i}", name=f"Company {i} Holdings", quantity=Decimal(10 + i % 50),
+                        avg_price=Decimal("100.25"), current_price=Decimal("101.50"),
+                        sector=["Technology", "Healthcare", "Financials"][i % 3])
+        for i in range(n)
+    ]
+
+def serialize_models(items) -> bytes:
+    """Previous GET /portfolio: PortfolioItemBase per item, then response_model validation + dump."""
+    items_data = [
+        schemas.PortfolioItemBase(symbol=item.symbol, name=item.name, quantity=item.quantity,
+                                  avg_price=item.avg_price, current_price=item.current_price, sector=item.sector)
+        for item in items
+    ]
+    content = {"items": items_data, "total_value": 0.0, "risk_assessment": "Portfolio loaded successfully."}
+    return RESPONSE_ADAPTER.dump_json(RESPONSE_ADAPTER.validate_python(content))
+
+def serialize_fast(items) -> bytes:
+    """Current GET /portfolio: arrays from the valuation pass, plain dicts, one orjson dump."""
+    quantities = valuation.to_array(item.quantity for item in items)
+    avg_prices = valuation.to_array(item.avg_price for item in items)
+    prices = valuation.to_array(item.current_price for item in items)
+    items_data = [
+        {"symbol": item.symbol, "name": item.name, "quantity": q, "avg_price": a,
+         "current_price": None if math.isnan(p) else p, "sector": item.sector}
+        for item, q, a, p in zip(items, quantities.tolist(), avg_prices.tolist(), prices.tolist())
+    ]
+    content = {"items": items_data, "total_value": 0.0, "risk_assessment": "Portfolio loaded successfully."}
+    return FastJSONResponse(content).body
+
+def median_ms(fn, arg, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /portfolio serialization time and compressed size by portfolio size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} | {'models (ms)':>11} | {'orjson (ms)':>11} | speedup | {'raw KB':>8} | "
+          f"{'gzip KB':>8} {'ms':>6} | {'br KB':>8} {'ms':>6}")
+    for size in args.sizes:
+        items = make_items(size)
+        old = median_ms(serialize_models, items, args.repeat)
+        new = median_ms(serialize_fast, items, args.repeat)
+        body = serialize_fast(items)
+        gz = gzip.compress(body, compresslevel=6)
+        gz_ms = median_ms(lambda b: gzip.compress(b, compresslevel=6), body, args.repeat)
+        if brotli is not None:
+            br = brotli.compress(body, mode=brotli.MODE_TEXT, quality=4)
+            br_ms = median_ms(lambda b: brotli.compress(b, mode=brotli.MODE_TEXT, quality=4), body, args.repeat)
+            br_cols = f"{len(br) / 1024:>8.1f} {br_ms:>6.2f}"
+        else:
+            br_cols = f"{'-':>8} {'-':>6}"
+        print(f"{size:>6} | {old:>11.3f} | {new:>11.3f} | {old / new:>6.2f}x | {len(body) / 1024:>8.1f} | "
+              f"{len(gz) / 1024:>8.1f} {gz_ms:>6.2f} | {br_cols}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "005930.KS", "000660.KS"]
+
+def replica(cache_url: str, prefix: str, seconds: float, threads: int, open_ttl: float, fetch_ms: float, out):
+    """One backend pod: `threads` request workers polling every symbol through its own QuoteCache."""
+    os.environ["CACHE_URL"] = cache_url
+    os.environ["CACHE_KEY_PREFIX"] = prefix
+    from app.services.market_data import Quote, QuoteCache
+
+    quotes = QuoteCache(open_ttl=open_ttl, market_hours=False)
+    fetches, lock = [0], threading.Lock()
+
+    def fetch(symbol: str) -> Quote:
+        with lock:
+            fetches[0] += 1
+        time.sleep(fetch_ms / 1000)
+        return Quote(symbol, 100.0, 99.0)
+
+    def worker():
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for symbol in SYMBOLS:
+                quotes.get(symbol, fetch)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    out.put(fetches[0])
+
+def run(cache_url: str, args) -> int:
+    out = multiprocessing.Queue()
+    prefix = f"bench{time.time_ns()}"
+    processes = [multiprocessing.Process(target=replica, args=(cache_url, prefix, args.seconds, args.threads,
+                                                               args.open_ttl, args.fetch_ms, out))
+                 for _ in range(args.replicas)]
+    for p in processes:
+        p.start()
+    total = sum(out.get() for _ in processes)
+    for p in processes:
+        p.join()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Upstream quote fetches from several replicas: per-process cache vs. shared CACHE_URL backend.")
+    parser.add_argument("--cache-url", default=os.getenv("BENCH_CACHE_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="Request workers per replica")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--open-ttl", type=float, default=3)
+    parser.add_argument("--fetch-ms", type=float, default=150, help="Simulated upstream latency")
+    args = parser.parse_args()
+
+    ideal = len(SYMBOLS) * (int(args.seconds // args.open_ttl) + 1)
+    print(f"{args.replicas} replicas x {args.threads} workers polling {len(SYMBOLS)} symbols for {args.seconds:g}s, "
+          f"TTL {args.open_ttl:g}s (once cluster-wide per TTL: ~{ideal} fetches)")
+    for name, url in (("in-process", ""), ("shared", args.cache_url)):
+        print(f"{name:<10} | upstream fetches: {run(url, args)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must stay out of the import path of app.main; they are loaded on first use
+HEAVY_MODULES = ["yfinance", "pandas", "matplotlib", "reportlab", "bs4", "openai"]
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed}} {{','.join(heavy)}}")
+"""
+
+def measure_import() -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+    ).stdout.strip().split(" ")
+    return float(out[0]), [m for m in (out[1] if len(out) > 1 else "").split(",") if m]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_first_request(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("app did not answer within timeout")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time and time-to-first-request of app.main.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-import-ms", type=float, default=1500.0)
+    parser.add_argument("--max-first-request-ms", type=float, default=4000.0)
+    args = parser.parse_args()
+
+    imports, heavy = [], []
+    for _ in range(args.repeat):
+        elapsed, heavy = measure_import()
+        imports.append(elapsed * 1000)
+    first_requests = [measure_first_request() * 1000 for _ in range(args.repeat)]
+
+    import_ms = statistics.median(imports)
+    first_ms = statistics.median(first_requests)
+    print(f"import app.main        : {import_ms:8.1f} ms (budget {args.max_import_ms:.0f})")
+    print(f"time to first request  : {first_ms:8.1f} ms (budget {args.max_first_request_ms:.0f})")
+    print(f"heavy modules imported : {', '.join(heavy) or 'none'}")
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {heavy}")
+    if import_ms > args.max_import_ms:
+        failures.append("import time over budget")
+    if first_ms > args.max_first_request_ms:
+        failures.append("time to first request over budget")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
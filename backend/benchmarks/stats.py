@@ -0,0 +1,21 @@
+import math
+from typing import Dict, List
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile; samples need not be sorted."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Dict:
+    """Latency percentiles in ms plus throughput for one scenario run."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
@@ -0,0 +1,77 @@
+import argparse
+import time
+
+import requests
+
+from app.core.cache import InMemoryBackend
+from app.core.resilience import CircuitBreaker, TokenBucket, UpstreamGuard
+from app.services.market_data import Quote, QuoteCache
+from benchmarks.stats import percentile
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "META", "AMZN", "GOOGL", "005930.KS", "000660.KS", "035420.KQ"]
+
+class ThrottledUpstream:
+    """Answers in `ok_ms` until the outage starts, then fails every call after `fail_ms` (a 429 or timeout)."""
+
+    def __init__(self, ok_ms: float, fail_ms: float):
+        self.ok_ms = ok_ms
+        self.fail_ms = fail_ms
+        self.down = False
+        self.calls = 0
+
+    def quote(self, symbol: str) -> Quote:
+        self.calls += 1
+        if self.down:
+            time.sleep(self.fail_ms / 1000)
+            response = requests.Response()
+            response.status_code = 429
+            raise requests.HTTPError("429 Too Many Requests", response=response)
+        time.sleep(self.ok_ms / 1000)
+        return Quote(symbol, 100.0, 99.0)
+
+def run(guarded: bool, args):
+    """Per-poll latency (ms) of one GET /portfolio-style loop over SYMBOLS during the outage."""
+    upstream = ThrottledUpstream(args.ok_ms, args.fail_ms)
+    quotes = QuoteCache(open_ttl=args.open_ttl, market_hours=False, backend=InMemoryBackend())
+    if guarded:
+        guard = UpstreamGuard("upstream", TokenBucket(args.rate, args.burst),
+                              CircuitBreaker("upstream", 0.5, 10, 60, args.open_seconds), max_wait=2)
+        fetch = lambda symbol: guard.call(upstream.quote, symbol)
+    else:
+        fetch = upstream.quote
+
+    def poll() -> float:
+        start = time.perf_counter()
+        for symbol in SYMBOLS:
+            try:
+                quotes.get(symbol, fetch)
+            except Exception:
+                pass # Endpoint falls back to the saved price
+        return (time.perf_counter() - start) * 1000
+
+    poll() # Warm: every symbol has a last good quote
+    upstream.down = True
+    upstream.calls = 0
+    time.sleep(args.open_ttl)
+    samples = [poll() for _ in range(args.polls)]
+    return samples, upstream.calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard poll latency while the quote upstream is throttling us.")
+    parser.add_argument("--polls", type=int, default=30)
+    parser.add_argument("--ok-ms", type=float, default=80)
+    parser.add_argument("--fail-ms", type=float, default=300, help="Time a throttled call takes to fail")
+    parser.add_argument("--open-ttl", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=5)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--open-seconds", type=float, default=30)
+    args = parser.parse_args()
+
+    print(f"{len(SYMBOLS)} symbols per poll, {args.polls} polls during the outage, failing calls take {args.fail_ms:g} ms")
+    print(f"{'':<10} | {'p50 ms':>8} | {'p95 ms':>8} | {'upstream calls':>14}")
+    for name, guarded in (("unguarded", False), ("guarded", True)):
+        samples, calls = run(guarded, args)
+        print(f"{name:<10} | {percentile(samples, 50):>8.1f} | {percentile(samples, 95):>8.1f} | {calls:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import statistics
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.services import valuation
+
+def make_items(n: int):
+    """ORM-like items: Decimal columns as loaded from Postgres, some without a cached price."""
+    return [
+        SimpleNamespace(symbol=f"SYM{i}", quantity=Decimal(10 + i % 50), avg_price=Decimal("100.25"),
+                        current_price=None if i % 7 == 0 else Decimal("101.50"))
+        for i in range(n)
+    ]
+
+def value_loop(items, live_prices):
+    """Previous per-call-site math: per-item float()/Decimal conversions in Python loops."""
+    total_value = 0
+    rows = []
+    for item, live in zip(items, live_prices):
+        price = float(live or item.current_price or item.avg_price)
+        avg_price = float(item.avg_price)
+        rows.append(round(((price - avg_price) / avg_price) * 100, 2) if avg_price > 0 else 0.0)
+        total_value += float(item.quantity) * price
+    weights = [float(item.quantity) * float(live or item.current_price or item.avg_price) / total_value
+               for item, live in zip(items, live_prices)]
+    return total_value, rows, weights
+
+def value_vectorized(items, live_prices):
+    result = valuation.value_items(items, live_prices)
+    return result.total_value, result.profit_rates, result.weights
+
+def value_arrays(arrays, _):
+    """Valuation alone on pre-converted float arrays (what repeated valuations of loaded data cost)."""
+    return valuation.value_positions(*arrays)
+
+def measure(fn, items, live_prices, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items, live_prices)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Median valuation time (values, weights, P&L), Python loop vs. vectorized.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'positions':>9} | {'loop (ms)':>10} | {'vectorized (ms)':>15} | {'arrays only (ms)':>16} | speedup")
+    for size in args.sizes:
+        items = make_items(size)
+        live_prices = [None if i % 5 == 0 else 102.0 + i % 3 for i in range(size)]
+        old_total = value_loop(items, live_prices)[0]
+        new_total = value_vectorized(items, live_prices)[0]
+        assert abs(old_total - new_total) < 1e-6 * max(1.0, old_total), (old_total, new_total)
+        old = measure(value_loop, items, live_prices, args.repeat)
+        new = measure(value_vectorized, items, live_prices, args.repeat)
+        arrays = (valuation.to_array(item.quantity for item in items), valuation.to_array(item.avg_price for item in items),
+                  valuation.coalesce(valuation.to_array(live_prices), valuation.to_array(item.current_price for item in items),
+                                     valuation.to_array(item.avg_price for item in items)))
+        core = measure(value_arrays, arrays, None, args.repeat)
+        print(f"{size:>9} | {old:>10.3f} | {new:>15.3f} | {core:>16.3f} | {old / new:.2f}x")
+
+if __name__ == "__main__":
+    main()
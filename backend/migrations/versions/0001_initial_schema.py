@@ -0,0 +1,100 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Databases created by the former import-time ``create_all`` already have some of
+these tables, so existing tables are skipped and indexes use IF NOT EXISTS.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(name, *columns):
+    if op.get_context().as_sql or not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    _create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_table(
+        "portfolios",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("total_value", sa.DECIMAL()),
+        sa.Column("cash_balance", sa.DECIMAL()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_table(
+        "portfolio_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("portfolio_id", sa.Integer(), sa.ForeignKey("portfolios.id")),
+        sa.Column("symbol", sa.String(), nullable=False),
+        sa.Column("name", sa.String()),
+        sa.Column("quantity", sa.DECIMAL(), nullable=False),
+        sa.Column("avg_price", sa.DECIMAL(), nullable=False),
+        sa.Column("current_price", sa.DECIMAL()),
+        sa.Column("sector", sa.String()),
+        sa.Column("last_updated", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_table(
+        "financial_statements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String(), nullable=False),
+        sa.Column("fiscal_date", sa.Date(), nullable=False),
+        sa.Column("revenue", sa.Integer()),
+        sa.Column("operating_income", sa.Integer()),
+        sa.Column("net_income", sa.Integer()),
+        sa.Column("cash_flow", sa.Integer()),
+        sa.Column("metrics", postgresql.JSONB()),
+        sa.Column("source", sa.Text()),
+    )
+    _create_table(
+        "journals",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+        sa.Column("symbol", sa.String()),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("screenshot_path", sa.Text()),
+        sa.Column("sentiment_score", sa.DECIMAL()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_table(
+        "market_knowledge",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String()),
+        sa.Column("content", sa.Text()),
+        sa.Column("embedding", Vector(1536)),
+        sa.Column("source_url", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)")
+    for table in ("portfolios", "portfolio_items", "financial_statements", "journals", "market_knowledge"):
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_id ON {table} (id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_portfolios_user_id_created_at ON portfolios (user_id, created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_portfolio_items_portfolio_id ON portfolio_items (portfolio_id)")
+
+
+def downgrade() -> None:
+    for table in ("market_knowledge", "journals", "financial_statements", "portfolio_items", "portfolios", "users"):
+        op.drop_table(table)
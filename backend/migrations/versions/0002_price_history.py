@@ -0,0 +1,28 @@
+"""price history
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "price_history",
+        sa.Column("symbol", sa.String(), primary_key=True),
+        sa.Column("ts", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("close", sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("price_history")
@@ -0,0 +1,38 @@
+"""market knowledge full-text and trigram search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "market_knowledge",
+        sa.Column(
+            "content_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple'::regconfig, coalesce(symbol, '') || ' ' || coalesce(content, ''))",
+                        persisted=True),
+        ),
+    )
+    op.create_index("ix_market_knowledge_content_tsv", "market_knowledge", ["content_tsv"], postgresql_using="gin")
+    op.create_index("ix_market_knowledge_content_trgm", "market_knowledge", ["content"], postgresql_using="gin",
+                    postgresql_ops={"content": "gin_trgm_ops"})
+
+
+def downgrade() -> None:
+    op.drop_index("ix_market_knowledge_content_trgm", table_name="market_knowledge")
+    op.drop_index("ix_market_knowledge_content_tsv", table_name="market_knowledge")
+    op.drop_column("market_knowledge", "content_tsv")
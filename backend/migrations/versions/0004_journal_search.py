@@ -0,0 +1,44 @@
+"""journal embeddings, full-text search and listing indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("journals", sa.Column("embedding", Vector(1536)))
+    op.add_column(
+        "journals",
+        sa.Column(
+            "content_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple'::regconfig, coalesce(symbol, '') || ' ' || coalesce(content, ''))",
+                        persisted=True),
+        ),
+    )
+    op.create_index("ix_journals_user_id_created_at_id", "journals", ["user_id", "created_at", "id"])
+    op.create_index("ix_journals_content_tsv", "journals", ["content_tsv"], postgresql_using="gin")
+    op.create_index("ix_journals_embedding", "journals", ["embedding"], postgresql_using="hnsw",
+                    postgresql_ops={"embedding": "vector_cosine_ops"})
+    op.create_index("ix_journals_pending", "journals", ["id"],
+                    postgresql_where=sa.text("sentiment_score IS NULL OR embedding IS NULL"))
+
+
+def downgrade() -> None:
+    for name in ("ix_journals_pending", "ix_journals_embedding", "ix_journals_content_tsv",
+                 "ix_journals_user_id_created_at_id"):
+        op.drop_index(name, table_name="journals")
+    op.drop_column("journals", "content_tsv")
+    op.drop_column("journals", "embedding")
@@ -0,0 +1,25 @@
+"""portfolio history keyset index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (user_id, created_at, id) serves both the latest-portfolio lookup and keyset history pages
+    op.create_index("ix_portfolios_user_id_created_at_id", "portfolios", ["user_id", "created_at", "id"])
+    op.drop_index("ix_portfolios_user_id_created_at", table_name="portfolios")
+
+
+def downgrade() -> None:
+    op.create_index("ix_portfolios_user_id_created_at", "portfolios", ["user_id", "created_at"])
+    op.drop_index("ix_portfolios_user_id_created_at_id", table_name="portfolios")
@@ -0,0 +1,29 @@
+"""journal scorer retry backoff; per-user exact journal similarity search
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("journals", sa.Column("score_attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("journals", sa.Column("score_retry_at", sa.DateTime(timezone=True)))
+    # Journal similarity now scans the user's own rows exactly; the shared HNSW index went unused
+    op.drop_index("ix_journals_embedding", table_name="journals")
+
+
+def downgrade() -> None:
+    op.create_index("ix_journals_embedding", "journals", ["embedding"], postgresql_using="hnsw",
+                    postgresql_ops={"embedding": "vector_cosine_ops"})
+    op.drop_column("journals", "score_retry_at")
+    op.drop_column("journals", "score_attempts")
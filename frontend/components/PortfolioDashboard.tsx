@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { PieChart, Pie, Cell, ResponsiveContainer, Tooltip, Legend } from "recharts";
 import { motion } from "framer-motion";
 import { ArrowUp, ArrowDown, TrendingUp } from "lucide-react";
@@ -27,6 +27,8 @@ export default function PortfolioDashboard() {
     const [loading, setLoading] = useState(true);
     const [aiInsight, setAiInsight] = useState<string | null>(null);
     const [aiLoading, setAiLoading] = useState(false);
+    // Newest quote version seen; polls then only return symbols that changed
+    const quoteVersion = useRef<string | null>(null);
 
     useEffect(() => {
         fetchPortfolio();
@@ -75,9 +77,12 @@ export default function PortfolioDashboard() {
 
         const interval = setInterval(async () => {
             try {
-                const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8001'}/portfolio/prices`);
+                const since = quoteVersion.current ? `?since=${quoteVersion.current}` : '';
+                const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8001'}/portfolio/prices${since}`);
                 if (res.ok) {
                     const prices = await res.json();
+                    quoteVersion.current = res.headers.get('X-Quote-Version') ?? quoteVersion.current;
+                    if (Object.keys(prices).length === 0) return;
 
                     setData(prevData => {
                         if (!prevData) return null;